@@ -1,76 +1,249 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Body, BackgroundTasks, WebSocket, WebSocketDisconnect, Query, Request
-from fastapi.responses import JSONResponse
-from ..db import VideoDB
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from ..db import VideoDB, get_tombstones
 from ..video import VideoStorage, sanitize_video_id
-from ..video.frame_processing import process_video_frames, FRAMES_DIR
+from ..video.probe import get_video_fps_and_duration
+from ..video.job_queues import queue_for_duration, get_queue, CLONE_JOB, LOW_QUEUE, VIDEO_JOB
+from ..video.deletion import tombstone_videos
+from ..video.tracing import list_traces
+from ..video.upload_sessions import get_upload_sessions
+from ..config.config import config
 import asyncio
+import logging
+import time
 import redis.asyncio as aioredis
-import shutil
 import os
-from chromadb.utils import embedding_functions
+from datetime import datetime
 import json
 from ..streaming.video_progress_ws_manager import VideoProgressWebSocketManager
 from ..streaming.types import ProgressStateData, ProgressStateEvent
-from .video_jobs import q  # Import the RQ queue
-from ..video.video_worker import process_video_job  # Import the job function
-import chromadb
+from ..metrics import metrics
+from ..search.warmup import readiness
+from ..redis.model_slots import get_model_slots
+from ..search import VideoNameCache, search_frames as run_frame_search, search_frames_batch as run_batch_search, search_segments as run_segment_search
 
 VALKEY_URL = "redis://localhost:6379"  # Adjust as needed
+logger = logging.getLogger(__name__)
 video_progress_ws_manager = VideoProgressWebSocketManager()
-CHROMA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".data", "chromadb"))
-
-def get_frame_collection():
-    client = chromadb.PersistentClient(path=CHROMA_DIR)
-    return client.get_or_create_collection("video_frames")
 
 router = APIRouter()
 video_db = VideoDB()
 video_storage = VideoStorage()
+video_name_cache = VideoNameCache(video_db)
+model_slots = get_model_slots()
+if model_slots is not None:
+    metrics.gauge("model_slots_waiting", "Model calls queued for a cluster-wide slot", lambda: model_slots.stats()["waiting"])
+    metrics.gauge("model_slots_in_use", "Cluster-wide model slots held", lambda: model_slots.stats()["in_use"])
 
 
-@router.post("/upload")
-async def upload_video(file: UploadFile = File(...)):
-    # Generate raw video_id and sanitize it immediately
-    from datetime import datetime
-    raw_video_id = f"{file.filename}-{datetime.utcnow().isoformat()}"
-    video_id = sanitize_video_id(raw_video_id)
-    video_info = await video_storage.save_video(file, video_id=video_id)
+async def register_upload(video_info, trace: Optional[bool] = None):
+    """
+    Record a stored upload and either index it from an identical processed video or enqueue its job.
+    trace turns per-job trace capture on or off for this job (None follows VIDEO_TRACE).
+    """
+    duplicate_of = video_db.find_processed_duplicate(video_info['content_hash'])
+    if duplicate_of is not None:
+        # Same bytes were already indexed: a low-priority job reuses frames, descriptions and vectors
+        # instead of reprocessing, and marks the video done when the copy is in place
+        video_db.add_video(
+            video_id=video_info['video_id'],
+            save_path=video_info['save_path'],
+            file_name=video_info['file_name'],
+            created_at=video_info['created_at'],
+            updated_at=video_info['updated_at'],
+            frame_count=duplicate_of.get('frame_count') or 0,
+            content_hash=video_info['content_hash']
+        )
+        get_queue(LOW_QUEUE).enqueue(CLONE_JOB, duplicate_of['video_id'], video_info['video_id'], video_info['save_path'])
+        video_name_cache.invalidate(video_info['video_id'])
+        return JSONResponse({"status": "done", "video_id": video_info['video_id'], "processing": "duplicate", "duplicate_of": duplicate_of['video_id']})
     video_db.add_video(
         video_id=video_info['video_id'],
         save_path=video_info['save_path'],
         file_name=video_info['file_name'],
         created_at=video_info['created_at'],
-        updated_at=video_info['updated_at']
+        updated_at=video_info['updated_at'],
+        content_hash=video_info['content_hash']
     )
-    # Enqueue video processing job in Redis queue
-    q.enqueue(process_video_job, video_info['save_path'], video_info['video_id'])
+    # Enqueue video processing job in Redis queue; short videos jump ahead of long ones
+    try:
+        _, duration = await asyncio.to_thread(get_video_fps_and_duration, video_info['save_path'])
+    except Exception:
+        duration = None
+    queue_for_duration(duration).enqueue(VIDEO_JOB, video_info['save_path'], video_info['video_id'], trace=trace)
+    video_name_cache.invalidate(video_info['video_id'])
     return JSONResponse({"status": "done", "video_id": video_info['video_id'], "processing": "queued"})
 
+@router.post("/upload")
+async def upload_video(file: UploadFile = File(...), trace: Optional[bool] = Query(None)):
+    # Generate raw video_id and sanitize it immediately
+    raw_video_id = f"{file.filename}-{datetime.utcnow().isoformat()}"
+    video_id = sanitize_video_id(raw_video_id)
+    video_info = await video_storage.save_video(file, video_id=video_id)
+    return await register_upload(video_info, trace)
+
+# Resumable chunked uploads: create a session, PUT chunks at byte offsets (in parallel, in any order),
+# GET the session to see which ranges are still missing after a disconnect, then complete it.
+
+def _upload_status(upload_id: str):
+    try:
+        return get_upload_sessions().status(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+def _pwrite_all(fd: int, data: bytes, offset: int):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+@router.post("/uploads")
+def create_upload(file_name: str = Body(...), size: int = Body(..., ge=0)):
+    upload_sessions = get_upload_sessions()
+    upload_sessions.expire(config.upload.session_ttl_hours * 3600)
+    return upload_sessions.create(os.path.basename(file_name), size)
+
+@router.get("/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    return _upload_status(upload_id)
+
+@router.put("/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, request: Request, offset: int = Query(..., ge=0)):
+    upload_sessions = get_upload_sessions()
+    size = _upload_status(upload_id)["size"]
+    length = int(request.headers.get("content-length") or 0)
+    if length > upload_sessions.max_chunk_bytes:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {upload_sessions.max_chunk_bytes} bytes")
+    if offset + length > size:
+        raise HTTPException(status_code=416, detail="Chunk extends past the end of the upload")
+    fd = await asyncio.to_thread(upload_sessions.open_for_write, upload_id)
+    written = 0
+    try:
+        async for data in request.stream():
+            if offset + written + len(data) > size or written + len(data) > upload_sessions.max_chunk_bytes:
+                raise HTTPException(status_code=416, detail="Chunk extends past the end of the upload")
+            await asyncio.to_thread(_pwrite_all, fd, data, offset + written)
+            written += len(data)
+    finally:
+        os.close(fd)
+        # Whatever reached the file counts, so a dropped chunk only has to resend its tail
+        await asyncio.to_thread(upload_sessions.mark_received, upload_id, offset, offset + written)
+    return _upload_status(upload_id)
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, trace: Optional[bool] = Query(None)):
+    upload_sessions = get_upload_sessions()
+    status = _upload_status(upload_id)
+    if status["missing"]:
+        return JSONResponse({"detail": "Upload is incomplete", "missing": status["missing"]}, status_code=409)
+    content_hash = await asyncio.to_thread(upload_sessions.content_hash, upload_id)
+    video_id = sanitize_video_id(f"{status['file_name']}-{datetime.utcnow().isoformat()}")
+    video_info = await asyncio.to_thread(video_storage.adopt_file, upload_sessions.data_path(upload_id), status["file_name"], video_id)
+    video_info['content_hash'] = content_hash
+    upload_sessions.delete(upload_id)
+    return await register_upload(video_info, trace)
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload(upload_id: str):
+    _upload_status(upload_id)
+    get_upload_sessions().delete(upload_id)
+    return JSONResponse({"status": "deleted", "upload_id": upload_id})
+
 @router.get("/videos")
-def list_videos():
-    videos = video_db.list_videos()
-    return JSONResponse(videos)
+def list_videos(
+    request: Request,
+    processing_state: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+):
+    """
+    Videos sorted by created_at, optionally filtered and paged. Without `limit` every match is returned.
+    The next page's cursor comes back in X-Next-Cursor. Responses carry an ETag from the records'
+    generation counter, so polling with If-None-Match gets a 304 until something changes (not with
+    METADATA_BACKEND=chroma, which has no shared counter).
+    """
+    generation = video_db.get_generation()
+    etag = f'"{generation}"' if generation is not None else None
+    headers = {"Cache-Control": "no-cache"}
+    if etag:
+        headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if etag and if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    try:
+        videos, next_cursor = video_db.query_videos(
+            processing_state=processing_state, name_prefix=name_prefix,
+            descending=(order == "desc"), cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(videos, headers=headers)
 
-@router.delete("/videos/{video_id}")
+@router.delete("/videos/{video_id}", status_code=202)
 def delete_video(video_id: str):
-    results = video_db.collection.get(ids=[video_id])
-    if not results['metadatas']:
+    """Tombstone the video and return; its files, vectors and index rows are removed by the background collector."""
+    video = video_db.get_video(video_id)
+    if video is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    tombstone_videos([video], video_db)
+    video_name_cache.invalidate(video_id)
+    return JSONResponse({"status": "deleting", "video_id": video_id}, status_code=202)
+
+@router.post("/videos/delete", status_code=202)
+def delete_videos(video_ids: List[str] = Body(..., embed=True)):
+    """Bulk DELETE: tombstones every known video in one go; unknown ids are reported, not an error."""
+    if len(video_ids) > config.deletion.bulk_max_videos:
+        raise HTTPException(status_code=413, detail=f"At most {config.deletion.bulk_max_videos} videos per request")
+    found, not_found = [], []
+    for video_id in dict.fromkeys(video_ids):
+        video = video_db.get_video(video_id)
+        if video is None:
+            not_found.append(video_id)
+        else:
+            found.append(video)
+    if found:
+        tombstone_videos(found, video_db)
+        for video in found:
+            video_name_cache.invalidate(video["video_id"])
+    return JSONResponse({"status": "deleting", "video_ids": [video["video_id"] for video in found], "not_found": not_found}, status_code=202)
+
+@router.get("/deletions")
+def get_deletions():
+    """Progress of the background collector: pending and failing tombstones, age of the oldest pending one."""
+    return get_tombstones().stats()
+
+@router.get("/ready")
+def get_readiness():
+    """200 once the search warm-up has finished (embedding model loaded, stores open), 503 until then."""
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@router.get("/videos/{video_id}/timings")
+def get_video_timings(video_id: str):
+    """Per-stage time spent on the video, summed over every job (and shard) that processed it."""
+    video = video_db.get_video(video_id)
+    if video is None:
         raise HTTPException(status_code=404, detail="Video not found")
-    save_path = results['documents'][0]
-    video_db.delete_video(video_id)
-    video_storage.delete_video_file(save_path)
-    # Delete frames directory
-    frames_dir = os.path.join(FRAMES_DIR, video_id.replace(":", "_").replace(" ", "_"))
-    if os.path.exists(frames_dir):
-        shutil.rmtree(frames_dir, ignore_errors=True)
-    # Delete uploaded_videos directory
-    uploaded_dir = os.path.dirname(save_path)
-    if os.path.exists(uploaded_dir):
-        shutil.rmtree(uploaded_dir, ignore_errors=True)
-    # Delete all frame vectors from ChromaDB for this video
-    frame_collection = get_frame_collection()
-    frame_collection.delete(where={"video_id": video_id})
-    return JSONResponse({"status": "deleted", "video_id": video_id})
+    timings = json.loads(video['job_timings']) if video.get('job_timings') else {}
+    return {"video_id": video_id, "timings": timings}
+
+@router.get("/videos/{video_id}/traces")
+def get_video_traces(video_id: str):
+    """Chrome trace files written by traced jobs of the video, oldest first (open in Perfetto or chrome://tracing)."""
+    return {"video_id": video_id, "traces": list_traces(video_id)}
+
+@router.get("/videos/{video_id}/traces/{name}")
+def get_video_trace(video_id: str, name: str):
+    if name not in list_traces(video_id):
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return FileResponse(os.path.join(config.tracing.dir, name), media_type="application/json", filename=name)
 
 @router.patch("/videos/{video_id}")
 def update_video(video_id: str, video_name: str = Body(..., embed=True)):
@@ -78,29 +251,29 @@ def update_video(video_id: str, video_name: str = Body(..., embed=True)):
         video_db.update_video(video_id, video_name=video_name)
     except ValueError:
         raise HTTPException(status_code=404, detail="Video not found")
+    video_name_cache.invalidate(video_id)
     return JSONResponse({"status": "updated", "video_id": video_id, "video_name": video_name})
 
 @router.websocket("/ws/progress/{video_id}")
 async def websocket_progress(websocket: WebSocket, video_id: str):
-    print(f"[WebSocket] New connection for video_id={video_id}")
+    logger.debug(f"[WebSocket] New connection for video_id={video_id}")
     async def on_receive(data):
         try:
-            print(f"[WebSocket] Received data for video_id={video_id}: {data}")
+            logger.debug(f"[WebSocket] Received data for video_id={video_id}: {data}")
             msg = json.loads(data)
             if msg.get("type") == "get_progress":
-                print(f"[WebSocket] Handling get_progress for video_id={video_id}")
-                progress = video_progress_ws_manager.get_progress_state(video_id)
-                print(f"[WebSocket] Progress state for video_id={video_id}: {progress}")
+                since = msg.get("since")
+                progress = video_progress_ws_manager.get_progress_state(video_id, since=str(since) if since is not None else None)
+                logger.debug(f"[WebSocket] Progress state for video_id={video_id}: seq={progress['seq']} done={progress['done_count']}")
                 extraction_in_progress = (progress.get('total_frames', 0) == 0)
                 progress_data = ProgressStateData(**progress)
                 event = ProgressStateEvent(type="progress_state", data=progress_data)
                 event_dict = event.dict()
                 event_dict['extraction_in_progress'] = extraction_in_progress
-                print(f"[WebSocket] Sending ProgressStateEvent for video_id={video_id}: {event_dict}")
-                await video_progress_ws_manager.send_json(video_id, event_dict)
-                print(f"[WebSocket] Sent progress_state for video_id={video_id}")
+                await video_progress_ws_manager.send_json_to(websocket, event_dict)
+                logger.debug(f"[WebSocket] Sent progress_state for video_id={video_id}")
         except Exception as e:
-            print(f"[WebSocket] Error in on_receive for video_id={video_id}: {e}")
+            logger.warning(f"[WebSocket] Error in on_receive for video_id={video_id}: {e}")
     await video_progress_ws_manager.handle_websocket_with_pubsub(
         key=video_id,
         websocket=websocket,
@@ -113,32 +286,73 @@ async def search_frames(request: Request):
     data = await request.json() if request.method == 'POST' else {}
     query = data.get('query')
     video_ids = data.get('video_ids')
-    ef = embedding_functions.DefaultEmbeddingFunction()
-    query_vec = ef([query])[0]
-    chroma_query = {
-        'query_embeddings': [query_vec],
-        'n_results': 10,
-        'include': ["metadatas"]
-    }
-    if video_ids:
-        chroma_query['where'] = {'video_id': {'$in': video_ids}}
-    frame_collection = get_frame_collection()
-    results = frame_collection.query(**chroma_query)
-    matches = []
-    for meta in results.get("metadatas", [[]])[0]:
-        video_info = video_db.collection.get(ids=[meta["video_id"]])
-        video_name = None
-        if video_info and video_info.get('metadatas') and len(video_info['metadatas']) > 0:
-            video_name = video_info['metadatas'][0].get('video_name')
-        matches.append({
-            "video_id": meta["video_id"],
-            "frame_idx": meta["frame_idx"],
-            "description": meta["description"],
-            "timestamp": meta.get("timestamp"),
-            "video_name": video_name
-        })
+    keyword_weight = data.get('keyword_weight')
+    if keyword_weight is not None and (not isinstance(keyword_weight, (int, float)) or not 0 <= keyword_weight <= 1):
+        raise HTTPException(status_code=400, detail="keyword_weight must be a number between 0 and 1")
+    metrics.inc("search_queries_total", endpoint="search")
+    # Embedding, the Chroma query and the keyword lookup all block; keep them off the event loop
+    with metrics.time("search_seconds", endpoint="search"):
+        matches = await run_in_threadpool(run_frame_search, query, video_name_cache, video_ids=video_ids, keyword_weight=keyword_weight)
     return {"results": matches} 
 
+def _validate_batch_query(index: int, item):
+    if not isinstance(item, dict) or not isinstance(item.get('query'), str) or not item['query']:
+        raise HTTPException(status_code=400, detail=f"queries[{index}].query must be a non-empty string")
+    video_ids = item.get('video_ids')
+    if video_ids is not None and (not isinstance(video_ids, list) or not all(isinstance(vid, str) for vid in video_ids)):
+        raise HTTPException(status_code=400, detail=f"queries[{index}].video_ids must be a list of strings")
+    n_results = item.get('n_results', 10)
+    if not isinstance(n_results, int) or not 1 <= n_results <= 100:
+        raise HTTPException(status_code=400, detail=f"queries[{index}].n_results must be an integer between 1 and 100")
+    keyword_weight = item.get('keyword_weight')
+    if keyword_weight is not None and (not isinstance(keyword_weight, (int, float)) or not 0 <= keyword_weight <= 1):
+        raise HTTPException(status_code=400, detail=f"queries[{index}].keyword_weight must be a number between 0 and 1")
+
+@router.post("/search/batch")
+async def search_batch(request: Request):
+    """
+    Many searches in one request: {"queries": [{"query", "video_ids", "n_results", "keyword_weight"}, ...]}.
+    Streams one NDJSON line per query, {"index": i, "results": [...]}, in completion order.
+    """
+    data = await request.json()
+    queries = data.get('queries') if isinstance(data, dict) else None
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="queries must be a non-empty list")
+    if len(queries) > config.search.batch_max_queries:
+        raise HTTPException(status_code=400, detail=f"At most {config.search.batch_max_queries} queries per batch")
+    for index, item in enumerate(queries):
+        _validate_batch_query(index, item)
+
+    def lines():
+        started = time.perf_counter()
+        for index, matches in run_batch_search(queries, video_name_cache):
+            yield json.dumps({"index": index, "results": matches}) + "\n"
+        metrics.observe("search_seconds", time.perf_counter() - started, endpoint="batch")
+
+    metrics.inc("search_queries_total", len(queries), endpoint="batch")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.post("/search/segments")
+async def search_segments(request: Request):
+    """Coarse-to-fine search returning [start, end] time ranges, each with the best matching frame as thumbnail."""
+    data = await request.json()
+    query = data.get('query')
+    if not isinstance(query, str) or not query:
+        raise HTTPException(status_code=400, detail="query must be a non-empty string")
+    n_results = data.get('n_results', 10)
+    if not isinstance(n_results, int) or not 1 <= n_results <= 100:
+        raise HTTPException(status_code=400, detail="n_results must be an integer between 1 and 100")
+    metrics.inc("search_queries_total", endpoint="segments")
+    with metrics.time("search_seconds", endpoint="segments"):
+        segments = await run_in_threadpool(run_segment_search, query, video_name_cache, video_ids=data.get('video_ids'), n_results=n_results)
+    return {"results": segments}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Pipeline and search metrics of the API and all workers, in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @router.get("/debug/chroma")
 def debug_chroma():
     import os
@@ -1,13 +1,11 @@
 from fastapi import APIRouter, UploadFile, File
-from redis import Redis
-from rq import Queue
+from ..video.job_queues import get_queue, DEFAULT_QUEUE
 import os
 import uuid
 
 router = APIRouter()
 
-redis_conn = Redis(host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)))
-q = Queue('video-jobs', connection=redis_conn)
+q = get_queue(DEFAULT_QUEUE)
 
 def process_video_job(video_path, job_id):
     # Placeholder for actual processing logic
@@ -0,0 +1,137 @@
+"""
+Batch search throughput benchmark.
+
+Seeds the frame index with synthetic descriptions, then answers the same list of queries twice through
+the API (in-process ASGI client): once by looping POST /api/search, once with a single POST
+/api/search/batch. The query embedding cache is cleared before each run so both pay for embeddings.
+
+    python -m backend.benchmarks.batch_search --queries 500 --videos 20 --frames 300
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from .fake_redis import FakeRedisServer
+
+SUBJECTS = ["a dog", "a red car", "two people", "a cyclist", "a child", "a cat", "a truck", "a chef", "a crowd", "a bird"]
+ACTIONS = ["running", "talking", "driving", "eating", "jumping", "sitting", "waving", "cooking", "dancing", "flying"]
+PLACES = ["on a beach", "in a kitchen", "on a highway", "in a park", "at night", "in the snow", "near a lake", "in an office"]
+
+
+def seed_frames(prefix: str, videos: int, frames: int, rng: random.Random):
+    from ..db import get_frame_collection, get_keyword_index
+    from ..video.embedding import get_embedding_function
+    collection = get_frame_collection()
+    keyword_index = get_keyword_index()
+    embed = get_embedding_function()
+    video_ids = [f"{prefix}-{v}" for v in range(videos)]
+    for video_id in video_ids:
+        metadatas = [{
+            "video_id": video_id,
+            "frame_idx": idx,
+            "description": f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} {rng.choice(PLACES)}",
+            "timestamp": float(idx),
+            "frame_path": "",
+        } for idx in range(frames)]
+        for start in range(0, frames, 1000):
+            batch = metadatas[start:start + 1000]
+            collection.upsert(
+                ids=[f"{video_id}_frame_{meta['frame_idx']}" for meta in batch],
+                embeddings=embed([meta["description"] for meta in batch]),
+                metadatas=batch,
+            )
+            if keyword_index is not None:
+                keyword_index.upsert_frames(batch)
+    return video_ids
+
+
+def make_queries(count: int, video_ids, filters: int, rng: random.Random):
+    # A handful of distinct filters (as dashboards scoped to a few video sets would send)
+    filter_sets = [None] + [sorted(rng.sample(video_ids, min(3, len(video_ids)))) for _ in range(max(0, filters - 1))]
+    return [{
+        "query": f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} {rng.choice(PLACES)}",
+        "video_ids": rng.choice(filter_sets),
+        "n_results": 10,
+    } for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=300, help="Frames per synthetic video")
+    parser.add_argument("--filters", type=int, default=5, help="Distinct video_ids filters across the queries")
+    parser.add_argument("--keyword-weight", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    redis_server = FakeRedisServer().start()
+    os.environ["REDIS_URL"] = redis_server.url
+    from fastapi.testclient import TestClient
+    from ..main import app
+    from ..db import get_frame_collection, get_keyword_index
+    from ..video.embedding import query_embedding_cache
+
+    prefix = f"bench-batch-{os.getpid()}"
+    video_ids = seed_frames(prefix, args.videos, args.frames, rng)
+    queries = make_queries(args.queries, video_ids, args.filters, rng)
+    if args.keyword_weight is not None:
+        for query in queries:
+            query["keyword_weight"] = args.keyword_weight
+    client = TestClient(app)
+    try:
+        client.post("/api/search", json={"query": "warm up"})
+
+        query_embedding_cache.clear()
+        started = time.perf_counter()
+        looped = [client.post("/api/search", json=query).json()["results"] for query in queries]
+        loop_seconds = time.perf_counter() - started
+
+        query_embedding_cache.clear()
+        started = time.perf_counter()
+        response = client.post("/api/search/batch", json={"queries": queries})
+        batched = {}
+        for line in response.iter_lines():
+            if line:
+                item = json.loads(line)
+                batched[item["index"]] = item["results"]
+        batch_seconds = time.perf_counter() - started
+
+        same = sum(
+            [hit["frame_idx"] for hit in looped[i]] == [hit["frame_idx"] for hit in batched.get(i, [])]
+            for i in range(len(queries))
+        )
+        result = {
+            "queries": len(queries),
+            "indexed_frames": args.videos * args.frames,
+            "distinct_filters": len({tuple(q["video_ids"] or []) for q in queries}),
+            "loop_seconds": loop_seconds,
+            "loop_qps": len(queries) / loop_seconds,
+            "batch_seconds": batch_seconds,
+            "batch_qps": len(queries) / batch_seconds,
+            "speedup": loop_seconds / batch_seconds,
+            "identical_rankings": same,
+        }
+    finally:
+        collection = get_frame_collection()
+        keyword_index = get_keyword_index()
+        for video_id in video_ids:
+            collection.delete(where={"video_id": video_id})
+            if keyword_index is not None:
+                keyword_index.delete_video(video_id)
+        redis_server.shutdown()
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
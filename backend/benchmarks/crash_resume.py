@@ -0,0 +1,139 @@
+"""
+Crash-injection check for resumable ingestion jobs. Runs process_video_job on a synthetic video in a
+child process, SIGKILLs it once the (fake) model has received --crash-after requests, then runs the
+job again and checks the result, exiting non-zero when a check fails.
+
+With frame selection and the frame cache disabled every frame costs one model call, and descriptions
+are checkpointed as soon as the model returns, so total calls must stay at the frame count plus at
+most the requests in flight when the worker died. The index must end with exactly one row per frame.
+
+    python -m backend.benchmarks.crash_resume --duration 30 --crash-after 12
+    python -m backend.benchmarks.crash_resume --streaming
+
+Requires ffmpeg/ffprobe on PATH and a platform with fork().
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from .fake_ollama import FakeOllamaServer
+from .fake_redis import FakeRedisServer
+from .ingest import generate_video
+
+
+def run_first_attempt(video_path: str, video_id: str):
+    # Imported here so the parent has no database handles open when it forks
+    from ..db import VideoDB
+    from ..video.video_worker import process_video_job
+    now = datetime.utcnow().isoformat()
+    VideoDB().add_video(video_id, video_path, os.path.basename(video_path), now, now)
+    process_video_job(video_path, video_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=30, help="Synthetic video length in seconds (one frame per second)")
+    parser.add_argument("--crash-after", type=int, default=None, help="Model requests before the worker is killed (default: half the frames)")
+    parser.add_argument("--model-latency", type=float, default=0.1)
+    parser.add_argument("--model-capacity", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4, help="Model requests the worker keeps in flight at most")
+    parser.add_argument("--streaming", action="store_true", help="Use the streaming extract-describe pipeline")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    crash_after = args.crash_after or max(1, args.duration // 2)
+
+    ollama = FakeOllamaServer(("127.0.0.1", 0), latency=args.model_latency, capacity=args.model_capacity).start()
+    redis_server = FakeRedisServer().start()
+    os.environ["OLLAMA_API_URL"] = ollama.url
+    os.environ["REDIS_URL"] = redis_server.url
+    os.environ["VIDEO_STREAMING"] = "1" if args.streaming else "0"
+    os.environ["FRAME_SELECTION_ENABLED"] = "0"
+    os.environ["FRAME_CACHE_ENABLED"] = "0"
+    os.environ["OLLAMA_MAX_CONCURRENCY"] = str(args.concurrency)
+
+    workdir = tempfile.mkdtemp(prefix="crash-resume-")
+    video_path = os.path.join(workdir, "video.mp4")
+    video_id = f"crash-resume-{os.getpid()}-{int(time.time())}"
+    generate_video(video_path, "mandelbrot", args.duration, "320x180")
+
+    child = multiprocessing.get_context("fork").Process(target=run_first_attempt, args=(video_path, video_id))
+    child.start()
+    while child.is_alive() and ollama.stats()["requests"] < crash_after:
+        time.sleep(0.005)
+    crashed = child.is_alive()
+    if crashed:
+        os.kill(child.pid, signal.SIGKILL)
+    child.join()
+    # Requests the worker sent may still be in the server's backlog; let them run into the closed socket
+    while ollama.stats()["in_flight"]:
+        time.sleep(0.01)
+    time.sleep(max(0.2, args.model_latency))
+    stats = ollama.stats()
+    calls_first_attempt = stats["requests"]
+
+    from ..db import VideoDB, get_frame_collection
+    from ..video.frame_processing import FRAMES_DIR, job_checkpoints
+    from ..video.video_worker import process_video_job
+    video_db = VideoDB()
+    try:
+        committed_at_crash = len(job_checkpoints.committed_frames(video_id))
+        described_at_crash = len(job_checkpoints.described_frames(video_id))
+        # Requests whose answer the worker had not saved when it died: never answered (still running or
+        # queued at the server) or answered but not yet read and checkpointed
+        in_flight_at_kill = calls_first_attempt - described_at_crash
+        process_video_job(video_path, video_id)
+        state, frame_count = video_db.get_processing_state(video_id)
+        total_calls = ollama.stats()["requests"]
+        rows = get_frame_collection().get(where={"video_id": video_id}, include=[])
+        result = {
+            "streaming": args.streaming,
+            "crashed": crashed,
+            "frame_count": frame_count,
+            "final_state": state,
+            "calls_first_attempt": calls_first_attempt,
+            "unanswered_at_kill": calls_first_attempt - stats["completed"],
+            "in_flight_at_kill": in_flight_at_kill,
+            "described_at_crash": described_at_crash,
+            "committed_at_crash": committed_at_crash,
+            "calls_after_resume": total_calls - calls_first_attempt,
+            "total_model_calls": total_calls,
+            "redescribed_frames": total_calls - frame_count,
+            "index_rows": len(rows["ids"]),
+            "index_rows_unique": len(set(rows["ids"])) == len(rows["ids"]) == frame_count,
+        }
+        result["passed"] = (
+            state == "success"
+            and total_calls <= frame_count + in_flight_at_kill
+            # Only the requests outstanding at once may be lost, not everything described but not yet committed
+            and in_flight_at_kill <= args.concurrency
+            and result["index_rows_unique"]
+        )
+    finally:
+        get_frame_collection().delete(where={"video_id": video_id})
+        video_db.delete_video(video_id)
+        job_checkpoints.clear(video_id)
+        shutil.rmtree(os.path.join(FRAMES_DIR, video_id), ignore_errors=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+        ollama.shutdown()
+        redis_server.shutdown()
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if not result["passed"]:
+        print(f"FAILED: {total_calls} model calls for {frame_count} frames, {in_flight_at_kill} in flight at the kill "
+              f"(at most {args.concurrency}), {result['index_rows']} index rows", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cluster-wide model scheduling simulation: several workers share one fake Ollama server while a large
+video is being described and small videos keep arriving.
+
+Each simulated worker has its own DescriptionClient (and AIMD limiter) and a thread pool of --threads,
+like an RQ worker. The large video is sharded over all workers but the last; the last worker takes the
+small videos in arrival order. Modes:
+
+    none   no global limit; every worker sends up to --threads requests
+    fifo   FairModelSemaphore with --model-capacity slots, one flow for everything (first come, first served)
+    fair   FairModelSemaphore with one flow per video (weighted fair queuing)
+
+Reports the model server's peak in-flight requests, small-video latency (arrival to last frame),
+large-video time and overall frames/sec.
+
+    python -m backend.benchmarks.fair_scheduling --workers 4 --model-capacity 4 --big-frames 300
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .fake_ollama import FakeOllamaServer
+from .fake_redis import FakeRedisServer
+
+MODES = ("none", "fifo", "fair")
+
+
+def run(mode: str, args, redis_url: str):
+    from ..video.llava_client import AdaptiveConcurrencyLimiter, DescriptionClient
+    from ..redis.model_slots import FairModelSemaphore
+    ollama = FakeOllamaServer(("127.0.0.1", 0), latency=args.model_latency, jitter=args.model_latency / 10,
+                              capacity=args.model_capacity).start()
+    slots = None
+    if mode != "none":
+        slots = FairModelSemaphore(redis_url, args.model_capacity, prefix=f"bench-slots-{os.getpid()}-{mode}",
+                                   poll_interval=args.poll_ms / 1000.0)
+    clients = [
+        DescriptionClient(ollama.url, "llava", "Describe this image in detail.", slots=slots,
+                          limiter=AdaptiveConcurrencyLimiter(initial=args.threads, max_limit=args.threads))
+        for _ in range(args.workers)
+    ]
+    image = base64.b64encode(os.urandom(args.frame_bytes)).decode()
+
+    def run_job(client: DescriptionClient, video_id: str, frames: int):
+        flow = video_id if mode == "fair" else "all"
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(lambda _: client.describe(image, flow=flow), range(frames)))
+
+    started = time.perf_counter()
+    big_done = {}
+    small_latencies = []
+
+    def big_shard(client: DescriptionClient, frames: int):
+        run_job(client, "big", frames)
+        big_done[id(client)] = time.perf_counter() - started
+
+    def small_jobs(client: DescriptionClient):
+        for i in range(args.small_videos):
+            arrival = args.small_start + i * args.small_interval
+            time.sleep(max(0.0, arrival - (time.perf_counter() - started)))
+            run_job(client, f"small-{i}", args.small_frames)
+            small_latencies.append(time.perf_counter() - started - arrival)
+
+    shard_workers = clients[:-1]
+    shares = [args.big_frames // len(shard_workers) + (i < args.big_frames % len(shard_workers)) for i in range(len(shard_workers))]
+    threads = [threading.Thread(target=big_shard, args=(client, share)) for client, share in zip(shard_workers, shares)]
+    threads.append(threading.Thread(target=small_jobs, args=(clients[-1],)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stats = ollama.stats()
+    ollama.shutdown()
+    frames = args.big_frames + args.small_videos * args.small_frames
+    return {
+        "model_max_in_flight": stats["max_in_flight"],
+        "small_p50_seconds": statistics.median(small_latencies),
+        "small_max_seconds": max(small_latencies),
+        "big_seconds": max(big_done.values()),
+        "wall_seconds": elapsed,
+        "frames_per_second": frames / elapsed,
+        "slots_after": slots.stats() if slots else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="Description threads per worker")
+    parser.add_argument("--model-latency", type=float, default=0.1)
+    parser.add_argument("--model-capacity", type=int, default=4, help="Requests the model server serves at full speed; also the global slot count")
+    parser.add_argument("--big-frames", type=int, default=300)
+    parser.add_argument("--small-videos", type=int, default=6)
+    parser.add_argument("--small-frames", type=int, default=8)
+    parser.add_argument("--small-start", type=float, default=0.5, help="Seconds before the first small video arrives")
+    parser.add_argument("--small-interval", type=float, default=1.0)
+    parser.add_argument("--frame-bytes", type=int, default=20000)
+    parser.add_argument("--poll-ms", type=float, default=5.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    if args.workers < 2:
+        parser.error("--workers must be at least 2 (one for the large video, one for small ones)")
+
+    redis_server = FakeRedisServer().start()
+    os.environ["REDIS_URL"] = redis_server.url
+    result = {"config": {k: v for k, v in vars(args).items() if k not in ("modes", "output")}}
+    for mode in args.modes.split(","):
+        result[mode] = run(mode, args, redis_server.url)
+        print(f"{mode}: {json.dumps(result[mode])}", file=sys.stderr)
+    redis_server.shutdown()
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Local stand-in for Ollama's /api/generate, for exercising the description client offline.
+
+Responses are streamed as NDJSON like the real server. Latency is configurable and degrades
+once more than --capacity requests are in flight, to mimic a saturated model server.
+
+    python -m backend.benchmarks.fake_ollama --port 11435 --latency 0.4 --capacity 4
+    OLLAMA_API_URL=http://localhost:11435/api/generate python -m backend.video.video_worker
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.2, jitter: float = 0.05, capacity: int = 4,
+                 error_rate: float = 0.0, chunks: int = 4):
+        super().__init__(address, FakeOllamaHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.chunks = chunks
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.completed = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    def start(self) -> "FakeOllamaServer":
+        threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True).start()
+        return self
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.requests, "errors": self.errors, "completed": self.completed,
+                    "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeOllamaServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            overload = max(0, server.in_flight - server.capacity)
+        try:
+            if random.random() < server.error_rate:
+                with server.lock:
+                    server.errors += 1
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            # Requests beyond capacity queue behind the ones being served
+            delay = server.latency * (1 + overload / max(1, server.capacity)) + random.uniform(0, server.jitter)
+            image_size = len(payload.get("images", [""])[0])
+            words = [f"Synthetic description of a {image_size} byte frame", " with", " some", " objects."]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(server.chunks):
+                time.sleep(delay / server.chunks)
+                line = json.dumps({"model": payload.get("model"), "response": words[i % len(words)], "done": False}) + "\n"
+                self._write_chunk(line.encode())
+            self._write_chunk((json.dumps({"model": payload.get("model"), "response": "", "done": True}) + "\n").encode())
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            with server.lock:
+                server.completed += 1
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per request at or below capacity")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=4, help="Concurrent requests served without slowdown")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeOllamaServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                              capacity=args.capacity, error_rate=args.error_rate)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
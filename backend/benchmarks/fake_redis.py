@@ -0,0 +1,498 @@
+"""
+In-process Redis stand-in speaking RESP2 over TCP, so the real redis-py clients used by the
+pipeline can run without a Redis server. Implements only the commands this codebase uses.
+
+    server = FakeRedisServer().start()
+    os.environ["REDIS_URL"] = server.url
+"""
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+
+class RespError(Exception):
+    pass
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, bool):
+        return f":{int(value)}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, str) and value in ("OK", "QUEUED", "PONG"):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, (bytes, bytearray)):
+        return b"$%d\r\n%s\r\n" % (len(value), bytes(value))
+    if isinstance(value, (list, tuple, set)):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value)}")
+
+
+class _ZSet(dict):
+    """member -> score"""
+
+
+class FakeRedisStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.data: Dict[bytes, object] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.channels: Dict[bytes, Set["FakeRedisHandler"]] = {}
+        self.patterns: Dict[bytes, Set["FakeRedisHandler"]] = {}
+        self.commands = 0
+
+    def _expire_check(self, key: bytes):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def _get(self, key: bytes, kind):
+        self._expire_check(key)
+        value = self.data.get(key)
+        if value is not None and not isinstance(value, kind):
+            raise RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    # -- strings -------------------------------------------------------------
+    def cmd_get(self, key):
+        value = self._get(key, bytearray)
+        return bytes(value) if value is not None else None
+
+    def cmd_set(self, key, value, *options):
+        opts = [o.upper() for o in options]
+        exists = self._get(key, object) is not None
+        if b"NX" in opts and exists:
+            return None
+        if b"XX" in opts and not exists:
+            return None
+        self.data[key] = bytearray(value)
+        self.expires.pop(key, None)
+        for flag, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+            if flag in opts:
+                self.expires[key] = time.time() + float(options[opts.index(flag) + 1]) * scale
+        return "OK"
+
+    def cmd_incrby(self, key, amount):
+        value = int(self._get(key, bytearray) or b"0") + int(amount)
+        self.data[key] = bytearray(str(value).encode())
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_decr(self, key):
+        return self.cmd_incrby(key, b"-1")
+
+    def cmd_decrby(self, key, amount):
+        return self.cmd_incrby(key, -int(amount))
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            self._expire_check(key)
+            if self.data.pop(key, None) is not None:
+                removed += 1
+            self.expires.pop(key, None)
+        return removed
+
+    def cmd_exists(self, *keys):
+        count = 0
+        for key in keys:
+            self._expire_check(key)
+            count += key in self.data
+        return count
+
+    def cmd_expire(self, key, seconds):
+        if self._get(key, object) is None:
+            return 0
+        self.expires[key] = time.time() + int(seconds)
+        return 1
+
+    # -- bitmaps -------------------------------------------------------------
+    def cmd_setbit(self, key, offset, value):
+        offset = int(offset)
+        bits = self._get(key, bytearray)
+        if bits is None:
+            bits = self.data[key] = bytearray()
+        byte, mask = offset // 8, 0x80 >> (offset % 8)
+        if len(bits) <= byte:
+            bits.extend(b"\0" * (byte + 1 - len(bits)))
+        old = int(bool(bits[byte] & mask))
+        if int(value):
+            bits[byte] |= mask
+        else:
+            bits[byte] &= ~mask & 0xFF
+        return old
+
+    def cmd_getbit(self, key, offset):
+        offset = int(offset)
+        bits = self._get(key, bytearray) or bytearray()
+        byte = offset // 8
+        return int(byte < len(bits) and bool(bits[byte] & (0x80 >> (offset % 8))))
+
+    def cmd_bitcount(self, key):
+        return sum(bin(b).count("1") for b in (self._get(key, bytearray) or b""))
+
+    # -- lists ---------------------------------------------------------------
+    def cmd_rpush(self, key, *values):
+        items = self._get(key, list)
+        if items is None:
+            items = self.data[key] = []
+        items.extend(values)
+        return len(items)
+
+    def cmd_llen(self, key):
+        return len(self._get(key, list) or [])
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._get(key, list) or []
+        start, stop = int(start), int(stop)
+        if start < 0:
+            start = max(0, len(items) + start)
+        stop = len(items) + stop if stop < 0 else min(stop, len(items) - 1)
+        return items[start:stop + 1]
+
+    # -- sets ----------------------------------------------------------------
+    def _set(self, key, create=False) -> Optional[set]:
+        value = self._get(key, set)
+        if value is None and create:
+            value = self.data[key] = set()
+        return value
+
+    def cmd_sadd(self, key, *members):
+        s = self._set(key, create=True)
+        before = len(s)
+        s.update(members)
+        return len(s) - before
+
+    def cmd_srem(self, key, *members):
+        s = self._set(key)
+        if not s:
+            return 0
+        before = len(s)
+        s.difference_update(members)
+        if not s:
+            self.data.pop(key, None)
+        return before - len(s)
+
+    def cmd_smembers(self, key):
+        return list(self._set(key) or [])
+
+    def cmd_scard(self, key):
+        return len(self._set(key) or [])
+
+    def cmd_sismember(self, key, member):
+        return int(member in (self._set(key) or ()))
+
+    # -- hashes --------------------------------------------------------------
+    def _hash(self, key, create=False) -> Optional[dict]:
+        value = self._get(key, dict)
+        if value is None and create:
+            value = self.data[key] = {}
+        return value
+
+    def cmd_hset(self, key, *pairs):
+        h = self._hash(key, create=True)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in h
+            h[field] = bytes(value)
+        return added
+
+    def cmd_hget(self, key, field):
+        return (self._hash(key) or {}).get(field)
+
+    def cmd_hgetall(self, key):
+        return [item for pair in (self._hash(key) or {}).items() for item in pair]
+
+    def cmd_hincrbyfloat(self, key, field, amount):
+        h = self._hash(key, create=True)
+        value = float(h.get(field, b"0")) + float(amount)
+        h[field] = repr(value).encode()
+        return h[field]
+
+    # -- sorted sets ---------------------------------------------------------
+    def _zset(self, key, create=False) -> Optional[Dict[bytes, float]]:
+        value = self._get(key, _ZSet)
+        if value is None and create:
+            value = self.data[key] = _ZSet()
+        return value
+
+    @staticmethod
+    def _bound(raw: bytes):
+        """(score, exclusive) for a ZRANGEBYSCORE bound: 1.5, (1.5, -inf or +inf."""
+        exclusive = raw.startswith(b"(")
+        return float(raw[1:] if exclusive else raw), exclusive
+
+    def _ordered(self, z: Dict[bytes, float]) -> List[bytes]:
+        return sorted(z, key=lambda member: (z[member], member))
+
+    def _in_range(self, score: float, low, high) -> bool:
+        (lo, lo_ex), (hi, hi_ex) = low, high
+        return (score > lo if lo_ex else score >= lo) and (score < hi if hi_ex else score <= hi)
+
+    def cmd_zadd(self, key, *args):
+        flags = set()
+        while args and args[0].upper() in (b"NX", b"XX", b"GT", b"LT", b"CH"):
+            flags.add(args[0].upper())
+            args = args[1:]
+        z = self._zset(key, create=True)
+        changed = 0
+        for score, member in zip(args[::2], args[1::2]):
+            score = float(score)
+            old = z.get(member)
+            if (old is None and b"XX" in flags) or (old is not None and b"NX" in flags):
+                continue
+            if old is not None and ((b"GT" in flags and score <= old) or (b"LT" in flags and score >= old)):
+                continue
+            z[member] = score
+            changed += old is None or (b"CH" in flags and old != score)
+        if not z:
+            self.data.pop(key, None)
+        return changed
+
+    def cmd_zincrby(self, key, amount, member):
+        z = self._zset(key, create=True)
+        z[member] = z.get(member, 0.0) + float(amount)
+        return repr(z[member]).encode()
+
+    def cmd_zrem(self, key, *members):
+        z = self._zset(key) or {}
+        removed = sum(z.pop(member, None) is not None for member in members)
+        if not z:
+            self.data.pop(key, None)
+        return removed
+
+    def cmd_zcard(self, key):
+        return len(self._zset(key) or {})
+
+    def cmd_zscore(self, key, member):
+        score = (self._zset(key) or {}).get(member)
+        return repr(score).encode() if score is not None else None
+
+    def cmd_zrank(self, key, member):
+        z = self._zset(key) or {}
+        return self._ordered(z).index(member) if member in z else None
+
+    def cmd_zrange(self, key, start, stop, *options):
+        z = self._zset(key) or {}
+        ordered = self._ordered(z)
+        start, stop = int(start), int(stop)
+        stop = len(ordered) + stop if stop < 0 else stop
+        members = ordered[max(0, start):stop + 1]
+        if b"WITHSCORES" in [o.upper() for o in options]:
+            return [item for member in members for item in (member, repr(z[member]).encode())]
+        return members
+
+    def cmd_zrangebyscore(self, key, low, high, *options):
+        z = self._zset(key) or {}
+        low, high = self._bound(low), self._bound(high)
+        members = [member for member in self._ordered(z) if self._in_range(z[member], low, high)]
+        opts = [o.upper() for o in options]
+        if b"LIMIT" in opts:
+            offset, count = int(options[opts.index(b"LIMIT") + 1]), int(options[opts.index(b"LIMIT") + 2])
+            members = members[offset:offset + count if count >= 0 else None]
+        if b"WITHSCORES" in opts:
+            return [item for member in members for item in (member, repr(z[member]).encode())]
+        return members
+
+    def cmd_zremrangebyscore(self, key, low, high):
+        z = self._zset(key) or {}
+        low, high = self._bound(low), self._bound(high)
+        doomed = [member for member, score in z.items() if self._in_range(score, low, high)]
+        for member in doomed:
+            del z[member]
+        if not z:
+            self.data.pop(key, None)
+        return len(doomed)
+
+    # -- server --------------------------------------------------------------
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_echo(self, message):
+        return message
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_client(self, *args):
+        return "OK"
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return "OK"
+
+    def cmd_flushdb(self, *args):
+        return self.cmd_flushall()
+
+    # -- pub/sub -------------------------------------------------------------
+    def publish(self, channel: bytes, message: bytes) -> int:
+        receivers = 0
+        for handler in list(self.channels.get(channel, ())):
+            handler.push([b"message", channel, message])
+            receivers += 1
+        for pattern, handlers in list(self.patterns.items()):
+            if fnmatch.fnmatchcase(channel.decode(errors="replace"), pattern.decode(errors="replace")):
+                for handler in list(handlers):
+                    handler.push([b"pmessage", pattern, channel, message])
+                    receivers += 1
+        return receivers
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    server: "FakeRedisServer"
+
+    def setup(self):
+        super().setup()
+        # Replies are written one per command; without NODELAY pipelined replies stall on delayed ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.write_lock = threading.Lock()
+        self.subscriptions: Set[bytes] = set()
+        self.psubscriptions: Set[bytes] = set()
+        self.transaction: Optional[List[List[bytes]]] = None
+
+    def push(self, value):
+        try:
+            with self.write_lock:
+                self.wfile.write(_encode(value))
+                self.wfile.flush()
+        except OSError:
+            pass
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        try:
+            while True:
+                args = self._read_command()
+                if args is None:
+                    break
+                if not args:
+                    continue
+                self.push_reply(self.execute(store, args))
+        finally:
+            with store.lock:
+                for channel in self.subscriptions:
+                    store.channels.get(channel, set()).discard(self)
+                for pattern in self.psubscriptions:
+                    store.patterns.get(pattern, set()).discard(self)
+
+    def push_reply(self, reply):
+        if isinstance(reply, _Multi):
+            with self.write_lock:
+                for item in reply.replies:
+                    self.wfile.write(_encode(item))
+                self.wfile.flush()
+        else:
+            self.push(reply)
+
+    def execute(self, store: FakeRedisStore, args: List[bytes]):
+        name = args[0].decode().lower()
+        params = args[1:]
+        with store.lock:
+            store.commands += 1
+        if name == "multi":
+            self.transaction = []
+            return "OK"
+        if name == "exec":
+            queued, self.transaction = self.transaction or [], None
+            with store.lock:
+                return [self._dispatch(store, cmd[0].decode().lower(), cmd[1:]) for cmd in queued]
+        if name == "discard":
+            self.transaction = None
+            return "OK"
+        if self.transaction is not None:
+            self.transaction.append(args)
+            return "QUEUED"
+        if name in ("subscribe", "psubscribe", "unsubscribe", "punsubscribe"):
+            return self._pubsub(store, name, params)
+        with store.lock:
+            return self._dispatch(store, name, params)
+
+    def _dispatch(self, store: FakeRedisStore, name: str, params: List[bytes]):
+        if name == "publish":
+            return store.publish(params[0], params[1])
+        method = getattr(store, f"cmd_{name}", None)
+        if method is None:
+            return RespError(f"ERR unknown command '{name}'")
+        try:
+            return method(*params)
+        except RespError as e:
+            return e
+        except (TypeError, ValueError, IndexError) as e:
+            return RespError(f"ERR {e}")
+
+    def _pubsub(self, store: FakeRedisStore, name: str, params: List[bytes]):
+        pattern = name.startswith("p")
+        registry = store.patterns if pattern else store.channels
+        mine = self.psubscriptions if pattern else self.subscriptions
+        replies = []
+        with store.lock:
+            targets = params or list(mine)
+            for target in targets:
+                if name.endswith("unsubscribe"):
+                    registry.get(target, set()).discard(self)
+                    mine.discard(target)
+                else:
+                    registry.setdefault(target, set()).add(self)
+                    mine.add(target)
+                replies.append([name.encode(), target, len(self.subscriptions) + len(self.psubscriptions)])
+        return _Multi(replies)
+
+
+class _Multi:
+    """Several top-level replies to a single command (SUBSCRIBE with many channels)."""
+    def __init__(self, replies):
+        self.replies = replies
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), FakeRedisHandler)
+        self.store = FakeRedisStore()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        # RESP2 only; redis-py >= 8 would otherwise negotiate RESP3 with HELLO
+        return f"redis://{host}:{port}/0?protocol=2"
+
+    def start(self) -> "FakeRedisServer":
+        threading.Thread(target=self.serve_forever, name="fake-redis", daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the in-process Redis stand-in as a standalone server.")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    server = FakeRedisServer(port=args.port)
+    print(f"Fake Redis listening on {server.url}")
+    server.serve_forever()
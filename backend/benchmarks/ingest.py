@@ -0,0 +1,128 @@
+"""
+End-to-end ingestion benchmark: process_video_job on a synthetic video, with LLaVA stubbed by the
+local fake Ollama server and Redis by the in-process stand-in. Reports per-stage busy time and
+throughput plus overall frames/sec, optionally saved as JSON for comparison across commits.
+
+    python -m backend.benchmarks.ingest --duration 120 --source mixed --model-latency 0.3 --output ingest.json
+
+Stage times are summed across threads, so for concurrent stages (description, progress) they can exceed wall time.
+Requires ffmpeg/ffprobe on PATH.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import shutil
+from datetime import datetime
+
+from .fake_ollama import FakeOllamaServer
+from .fake_redis import FakeRedisServer
+
+# lavfi sources; "static" stands in for slides / talking heads, "mandelbrot" changes every frame
+SOURCES = {
+    "testsrc2": "testsrc2=size={size}:rate=25",
+    "static": "smptebars=size={size}:rate=25",
+    "mandelbrot": "mandelbrot=size={size}:rate=25",
+}
+
+
+def generate_video(path: str, source: str, duration: int, size: str):
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"]
+    if source == "mixed":
+        half = max(1, duration // 2)
+        for name in ("static", "mandelbrot"):
+            cmd += ["-f", "lavfi", "-t", str(half), "-i", SOURCES[name].format(size=size)]
+        cmd += ["-filter_complex", "[0:v][1:v]concat=n=2:v=1[v]", "-map", "[v]"]
+    else:
+        cmd += ["-f", "lavfi", "-t", str(duration), "-i", SOURCES[source].format(size=size)]
+    cmd += ["-c:v", "libx264", "-pix_fmt", "yuv420p", path]
+    subprocess.run(cmd, check=True)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=60, help="Synthetic video length in seconds")
+    parser.add_argument("--source", choices=sorted(SOURCES) + ["mixed"], default="mixed")
+    parser.add_argument("--size", default="640x360")
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--model-capacity", type=int, default=4)
+    parser.add_argument("--streaming", action="store_true", help="Use the streaming extract-describe pipeline")
+    parser.add_argument("--frame-cache", action="store_true", help="Keep the persistent frame cache enabled")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--keep", action="store_true", help="Keep the indexed frames and records afterwards")
+    args = parser.parse_args()
+
+    ollama = FakeOllamaServer(("127.0.0.1", 0), latency=args.model_latency, capacity=args.model_capacity).start()
+    redis_server = FakeRedisServer().start()
+    # Settings are read at import time, so point the pipeline at the stand-ins before importing it
+    os.environ["OLLAMA_API_URL"] = ollama.url
+    os.environ["REDIS_URL"] = redis_server.url
+    os.environ["VIDEO_STREAMING"] = "1" if args.streaming else "0"
+    if not args.frame_cache:
+        os.environ["FRAME_CACHE_ENABLED"] = "0"
+
+    from ..db import VideoDB, get_frame_collection
+    from ..video.frame_processing import FRAMES_DIR, sanitize_video_id
+    from ..video.stage_timer import stage_timer
+    from ..video.video_worker import process_video_job
+
+    workdir = tempfile.mkdtemp(prefix="ingest-bench-")
+    video_path = os.path.join(workdir, "video.mp4")
+    video_id = sanitize_video_id(f"bench-{args.source}-{datetime.utcnow().isoformat()}")
+    video_db = VideoDB()
+    try:
+        generate_video(video_path, args.source, args.duration, args.size)
+        now = datetime.utcnow().isoformat()
+        video_db.add_video(video_id, video_path, os.path.basename(video_path), now, now)
+        stage_timer.reset()
+        started = time.perf_counter()
+        process_video_job(video_path, video_id)
+        wall = time.perf_counter() - started
+        _, frame_count = video_db.get_processing_state(video_id)
+        stages = {}
+        for stage, entry in stage_timer.snapshot().items():
+            entry["items_per_second"] = entry["items"] / entry["seconds"] if entry["seconds"] else None
+            stages[stage] = entry
+        result = {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "params": vars(args),
+            "wall_seconds": wall,
+            "frame_count": frame_count,
+            "frames_per_second": frame_count / wall if wall else None,
+            "model_calls": ollama.stats()["requests"],
+            "model_max_in_flight": ollama.stats()["max_in_flight"],
+            "redis_commands": redis_server.store.commands,
+            "stages": stages,
+        }
+    finally:
+        if not args.keep:
+            get_frame_collection().delete(where={"video_id": video_id})
+            try:
+                video_db.delete_video(video_id)
+            except Exception:
+                pass
+            shutil.rmtree(os.path.join(FRAMES_DIR, video_id), ignore_errors=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+        ollama.shutdown()
+        redis_server.shutdown()
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
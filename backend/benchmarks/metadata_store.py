@@ -0,0 +1,96 @@
+"""
+Video metadata store microbenchmark: point reads, bulk name lookups and state updates against the
+legacy Chroma-backed store and the SQLite store, on throwaway copies populated with synthetic records.
+
+    python -m backend.benchmarks.metadata_store --videos 2000 --ops 500
+"""
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+import os
+
+from ..db.chroma_store import ChromaVideoStore
+from ..db.sqlite_store import SQLiteVideoStore
+from .search_latency import percentile
+
+
+def summarize(samples_ms):
+    return {
+        "p50_ms": percentile(samples_ms, 50),
+        "p99_ms": percentile(samples_ms, 99),
+        "mean_ms": sum(samples_ms) / len(samples_ms),
+    }
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples)
+
+
+def bench_store(store, video_ids, ops, seed):
+    rng = random.Random(seed)
+    picks = [rng.choice(video_ids) for _ in range(ops)]
+    return {
+        "get_processing_state": timed(store.get_processing_state, [(vid,) for vid in picks]),
+        "get_video": timed(store.get_video, [(vid,) for vid in picks]),
+        "get_video_names_10": timed(store.get_video_names, [(rng.sample(video_ids, 10),) for _ in range(ops)]),
+        "update_processing_state": timed(
+            lambda vid, n: store.update_processing_state(vid, processing_state='processing', frame_count=n),
+            [(vid, i) for i, vid in enumerate(picks)]
+        ),
+        "list_videos": timed(store.list_videos, [()] * max(1, ops // 50)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=1000, help="Records to populate each store with")
+    parser.add_argument("--ops", type=int, default=300, help="Operations timed per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp(prefix="metadata-bench-")
+    try:
+        video_ids = [f"bench-video-{i}" for i in range(args.videos)]
+        records = [{
+            "video_id": vid,
+            "save_path": f"/data/uploaded_videos/{vid}/video.mp4",
+            "video_name": f"video {i}.mp4",
+            "created_at": "2024-01-01T00:00:00",
+            "updated_at": "2024-01-01T00:00:00",
+            "processing_state": "success",
+            "frame_count": 600,
+        } for i, vid in enumerate(video_ids)]
+        chroma = ChromaVideoStore(os.path.join(workdir, "chromadb"))
+        t0 = time.perf_counter()
+        for record in records:
+            chroma.add_video(record["video_id"], record["save_path"], record["video_name"],
+                             record["created_at"], record["updated_at"], record["processing_state"], record["frame_count"])
+        chroma_load = time.perf_counter() - t0
+        sqlite = SQLiteVideoStore(os.path.join(workdir, "videos.sqlite3"))
+        t0 = time.perf_counter()
+        sqlite.import_videos(records)
+        sqlite_load = time.perf_counter() - t0
+        result = {
+            "videos": args.videos,
+            "ops": args.ops,
+            "chroma": {"load_seconds": chroma_load, **bench_store(chroma, video_ids, args.ops, args.seed)},
+            "sqlite": {"load_seconds": sqlite_load, **bench_store(sqlite, video_ids, args.ops, args.seed)},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Progress snapshot benchmark: records a video's frame progress the way the worker does (in process,
+then done) against the in-process Redis stand-in, replaying the ops of a fraction of the frames as a
+retried job would, and times full and delta get_progress_state snapshots.
+
+Also checks that the reported counts match the bitmaps after the replays; exits 1 if they don't.
+
+    python -m backend.benchmarks.progress_snapshot --frames 20000 --replay 0.1
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from .fake_redis import FakeRedisServer
+from .search_latency import percentile
+
+
+def covered(ranges):
+    return sum(end - start for start, end in ranges)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"p50_ms": percentile(samples, 50), "p99_ms": percentile(samples, 99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--replay", type=float, default=0.1, help="Fraction of frames whose ops are sent twice")
+    parser.add_argument("--in-process", type=int, default=8, help="Frames left in process at the end")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    from ..redis.redis_progress_manager import RedisProgressManager
+    server = FakeRedisServer().start()
+    progress = RedisProgressManager(server.url)
+    video_id = "bench-progress"
+    rng = random.Random(args.seed)
+    progress.clear_progress(video_id)
+    progress.execute_ops(progress.total_frames_ops(video_id, args.frames))
+    done_frames = args.frames - args.in_process
+    for start in range(0, args.frames, 500):
+        ops = []
+        for frame_idx in range(start, min(start + 500, args.frames)):
+            repeats = 2 if rng.random() < args.replay else 1
+            for _ in range(repeats):
+                ops += progress.frame_in_process_ops(video_id, frame_idx)
+            if frame_idx < done_frames:
+                for _ in range(repeats):
+                    ops += progress.frame_done_ops(video_id, frame_idx)
+        progress.execute_ops(ops)
+
+    full = progress.get_progress_state(video_id)
+    mid = f"{full['seq'].split(':')[0]}:{int(full['seq'].split(':')[1]) - 100}"
+    consistent = (
+        full["done_count"] == covered(full["done"]) == done_frames
+        and full["in_process_count"] == covered(full["in_process"]) == args.in_process
+    )
+    result = {
+        "frames": args.frames,
+        "replay": args.replay,
+        "done_count": full["done_count"],
+        "in_process_count": full["in_process_count"],
+        "done_ranges": len(full["done"]),
+        "counts_match_bitmaps": consistent,
+        "full_snapshot": timed(lambda: progress.get_progress_state(video_id), args.repeat),
+        "delta_snapshot_100": timed(lambda: progress.get_progress_state(video_id, since=mid), args.repeat),
+    }
+    server.shutdown()
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if not consistent:
+        print("FAILED: progress counts do not match the bitmaps", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Search latency benchmark.
+
+Runs the same code path as POST /api/search against the local Chroma data and reports
+cold (first call) and warm (repeated query) latency percentiles.
+
+    python -m backend.benchmarks.search_latency --query "a dog on a beach" --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+from ..db import VideoDB
+from ..search import VideoNameCache, search_frames
+from ..video.embedding import get_embedding_function
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile over len - 1 (shared by every benchmark so their p95/p99 compare); None without samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def run(queries, repeat, video_ids=None, keyword_weight=None):
+    started = time.perf_counter()
+    get_embedding_function()
+    model_load_ms = (time.perf_counter() - started) * 1000
+    name_cache = VideoNameCache(VideoDB())
+    cold = []
+    for query in queries:
+        t0 = time.perf_counter()
+        search_frames(query, name_cache, video_ids=video_ids, keyword_weight=keyword_weight)
+        cold.append((time.perf_counter() - t0) * 1000)
+    warm = []
+    for i in range(repeat):
+        query = queries[i % len(queries)]
+        t0 = time.perf_counter()
+        search_frames(query, name_cache, video_ids=video_ids, keyword_weight=keyword_weight)
+        warm.append((time.perf_counter() - t0) * 1000)
+    return {
+        "model_load_ms": model_load_ms,
+        "cold_ms": {"mean": statistics.mean(cold), "max": max(cold)},
+        "warm_ms": {
+            "p50": percentile(warm, 50),
+            "p95": percentile(warm, 95),
+            "p99": percentile(warm, 99),
+            "mean": statistics.mean(warm),
+        },
+        "queries": len(queries),
+        "repeat": repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--query", action="append", dest="queries", help="Query text (repeatable)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--video-id", action="append", dest="video_ids")
+    parser.add_argument("--keyword-weight", type=float, default=None, help="Keyword share of the fused ranking (0 = vector only)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    queries = args.queries or ["a person talking", "a car on the road", "text on a screen"]
+    result = run(queries, args.repeat, video_ids=args.video_ids, keyword_weight=args.keyword_weight)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+API startup benchmark: import time of backend.main and time to the first fast search.
+
+Seeds the frame index with synthetic descriptions, then starts the app (with its lifespan) in fresh
+interpreters, once per mode:
+
+    warmup  the lifespan warm-up runs; the client waits for /api/ready, then searches
+    lazy    SEARCH_WARMUP=0; the client searches at once and the first request loads everything
+
+Each child searches repeatedly and reports its import time, the time until /api/ready, the latency
+of the first search and the time from interpreter start until a search returns within --fast-ms.
+
+    python -m backend.benchmarks.startup --runs 3
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+START = time.perf_counter()
+
+
+def child(mode: str, fast_ms: float, searches: int):
+    from .fake_redis import FakeRedisServer
+    redis_server = FakeRedisServer().start()
+    os.environ["REDIS_URL"] = redis_server.url
+    if mode == "lazy":
+        os.environ["SEARCH_WARMUP"] = "0"
+    started = time.perf_counter()
+    from fastapi.testclient import TestClient
+    from ..main import app
+    import_seconds = time.perf_counter() - started
+    heavy = [name for name in ("chromadb", "onnxruntime", "rq", "backend.video.frame_processing") if name in sys.modules]
+    result = {"mode": mode, "import_seconds": import_seconds, "heavy_modules_at_import": heavy}
+    with TestClient(app) as client:
+        ready_started = time.perf_counter()
+        while mode == "warmup" and client.get("/api/ready").status_code != 200:
+            time.sleep(0.01)
+        result["ready_seconds"] = time.perf_counter() - ready_started
+        latencies = []
+        for i in range(searches):
+            t0 = time.perf_counter()
+            client.post("/api/search", json={"query": f"a dog running on a beach {i % 5}", "n_results": 10})
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if "first_fast_search_seconds" not in result and latencies[-1] <= fast_ms:
+                result["first_fast_search_seconds"] = time.perf_counter() - START
+        result["first_search_ms"] = latencies[0]
+        result["steady_p50_ms"] = statistics.median(latencies[1:] or latencies)
+    redis_server.shutdown()
+    json.dump(result, sys.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per mode")
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=300, help="Frames per synthetic video")
+    parser.add_argument("--searches", type=int, default=20, help="Searches per process")
+    parser.add_argument("--fast-ms", type=float, default=100.0, help="Latency under which a search counts as fast")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter for the child processes")
+    parser.add_argument("--child", choices=["warmup", "lazy"], help=argparse.SUPPRESS)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.fast_ms, args.searches)
+        return
+
+    from .batch_search import seed_frames
+    from ..db import get_frame_collection, get_keyword_index
+    prefix = f"bench-startup-{os.getpid()}"
+    video_ids = seed_frames(prefix, args.videos, args.frames, random.Random(0))
+    runs = {"warmup": [], "lazy": []}
+    try:
+        for _ in range(args.runs):
+            for mode in runs:
+                out = subprocess.run(
+                    [args.python, "-m", "backend.benchmarks.startup", "--child", mode,
+                     "--fast-ms", str(args.fast_ms), "--searches", str(args.searches)],
+                    check=True, capture_output=True, text=True,
+                    cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
+                )
+                runs[mode].append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        collection = get_frame_collection()
+        keyword_index = get_keyword_index()
+        for video_id in video_ids:
+            collection.delete(where={"video_id": video_id})
+            if keyword_index is not None:
+                keyword_index.delete_video(video_id)
+
+    result = {"indexed_frames": args.videos * args.frames, "fast_ms": args.fast_ms}
+    for mode, samples in runs.items():
+        result[mode] = {
+            key: statistics.median(sample[key] for sample in samples)
+            for key in ("import_seconds", "ready_seconds", "first_search_ms", "steady_p50_ms", "first_fast_search_seconds")
+            if all(key in sample for sample in samples)
+        }
+        result[mode]["heavy_modules_at_import"] = samples[0]["heavy_modules_at_import"]
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Filtered-search benchmark: memory-mapped vector cache scan vs Chroma's HNSW + metadata filter.
+
+Seeds the frame collection with synthetic videos (random unit embeddings in clusters, like shots),
+writes a vector cache per video, then runs queries scoped to --scope videos through both paths.
+Reports latency percentiles and recall@k of each against an exact float32 brute force.
+
+    python -m backend.benchmarks.vector_cache --videos 50 --frames 2000 --scope 2
+"""
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .search_latency import percentile
+
+
+def seed(prefix: str, videos: int, frames: int, dim: int, rng: np.random.Generator):
+    from ..db import get_frame_collection
+    collection = get_frame_collection()
+    data = {}
+    for v in range(videos):
+        video_id = f"{prefix}-{v}"
+        # Shots of 1-30 frames around a shared direction
+        centers = rng.standard_normal((frames, dim)).astype(np.float32)
+        shot = np.repeat(np.arange(frames), rng.integers(1, 30, size=frames))[:frames]
+        vectors = centers[shot] + 0.3 * rng.standard_normal((frames, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        metadatas = [{"video_id": video_id, "frame_idx": i, "description": "", "timestamp": float(i), "frame_path": ""} for i in range(frames)]
+        for start in range(0, frames, 1000):
+            collection.upsert(
+                ids=[f"{video_id}_frame_{i}" for i in range(start, min(frames, start + 1000))],
+                embeddings=vectors[start:start + 1000],
+                metadatas=metadatas[start:start + 1000],
+            )
+        data[video_id] = (metadatas, vectors)
+    return data
+
+
+def recall(found, truth):
+    return len(set(found) & set(truth)) / max(len(truth), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=2000, help="Frames per synthetic video")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--scope", type=int, default=2, help="Videos per query filter")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    from ..db import get_frame_collection
+    from ..search.vector_cache import VectorCache
+    prefix = f"bench-vcache-{args.seed}"
+    cache_root = tempfile.mkdtemp(prefix="vector-cache-")
+    data = seed(prefix, args.videos, args.frames, args.dim, rng)
+    video_ids = list(data)
+    collection = get_frame_collection()
+    try:
+        caches = {}
+        for dtype in ("int8", "float16"):
+            caches[dtype] = VectorCache(f"{cache_root}/{dtype}", dtype)
+            for video_id, (metadatas, vectors) in data.items():
+                caches[dtype].write(video_id, metadatas, vectors)
+
+        workload = []
+        for _ in range(args.queries):
+            scope = list(rng.choice(video_ids, size=args.scope, replace=False))
+            # Queries near a random frame of the scope, as text queries land near matching shots
+            anchor = data[scope[0]][1][rng.integers(args.frames)]
+            query = anchor + 0.5 * rng.standard_normal(args.dim).astype(np.float32)
+            query /= np.linalg.norm(query)
+            matrix = np.concatenate([data[v][1] for v in scope])
+            keys = [(v, i) for v in scope for i in range(args.frames)]
+            exact = np.argsort(((matrix - query) ** 2).sum(axis=1))[:args.k]
+            workload.append((scope, query, [keys[i] for i in exact]))
+
+        result = {"videos": args.videos, "frames_per_video": args.frames, "scope_videos": args.scope, "k": args.k}
+        latencies, recalls = [], []
+        for scope, query, truth in workload:
+            t0 = time.perf_counter()
+            rows = collection.query(query_embeddings=[query.tolist()], n_results=args.k, where={"video_id": {"$in": scope}}, include=["metadatas"])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            recalls.append(recall([(m["video_id"], m["frame_idx"]) for m in rows["metadatas"][0]], truth))
+        result["chroma"] = {"p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95), "recall": statistics.mean(recalls)}
+        for dtype, cache in caches.items():
+            latencies, recalls = [], []
+            for scope, query, truth in workload:
+                t0 = time.perf_counter()
+                hits = cache.search([query], scope, args.k)[0]
+                latencies.append((time.perf_counter() - t0) * 1000)
+                recalls.append(recall([(video_id, frame_idx) for video_id, frame_idx, _ in hits], truth))
+            result[f"cache_{dtype}"] = {"p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95), "recall": statistics.mean(recalls)}
+    finally:
+        for video_id in video_ids:
+            collection.delete(where={"video_id": video_id})
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
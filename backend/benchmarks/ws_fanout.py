@@ -0,0 +1,120 @@
+"""
+Progress WebSocket fan-out load test.
+
+Connects thousands of simulated clients (in-memory sockets) to the shared pub/sub hub across a
+number of videos, publishes progress events through Redis and measures end-to-end delivery latency,
+drops for deliberately slow clients, and the hub's CPU use while idle.
+
+    python -m backend.benchmarks.ws_fanout --clients 5000 --videos 50 --messages 200
+    python -m backend.benchmarks.ws_fanout --redis-url redis://localhost:6379   # against a real server
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from .fake_redis import FakeRedisServer
+from .search_latency import percentile
+from ..streaming.websocket_manager import WebSocketManagerBase
+
+
+class SimulatedSocket:
+    """Stands in for a FastAPI WebSocket; records per-message delivery latency."""
+    def __init__(self, send_delay: float = 0.0):
+        self.send_delay = send_delay
+        self.latencies = []
+        self.received = 0
+
+    async def send_text(self, message: str):
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        sent_at = json.loads(message)["sent_at"]
+        self.latencies.append(time.perf_counter() - sent_at)
+        self.received += 1
+
+
+async def run(redis_url: str, clients: int, videos: int, messages: int, rate: float, slow_fraction: float, slow_delay: float, max_queue: int):
+    manager = WebSocketManagerBase(redis_url, pattern="progress:*", max_queue=max_queue)
+    sockets = []
+    slow_every = int(1 / slow_fraction) if slow_fraction > 0 else 0
+    for i in range(clients):
+        slow = slow_every and i % slow_every == 0
+        ws = SimulatedSocket(send_delay=slow_delay if slow else 0.0)
+        await manager.subscribe(f"progress:bench-{i % videos}", ws)
+        sockets.append((ws, slow))
+
+    # Idle: the hub should use (almost) no CPU with no traffic
+    cpu0 = time.process_time()
+    await asyncio.sleep(1.0)
+    idle_cpu = time.process_time() - cpu0
+
+    cpu0 = time.process_time()
+    started = time.perf_counter()
+    for n in range(messages):
+        video = n % videos
+        await manager.publish(f"progress:bench-{video}", json.dumps({"type": "frame_processed", "seq": n, "sent_at": time.perf_counter()}))
+        if rate:
+            await asyncio.sleep(1.0 / rate)
+    expected = sum(1 for ws, slow in sockets if not slow) * messages // videos
+    deadline = time.perf_counter() + 30
+    while sum(ws.received for ws, slow in sockets if not slow) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    busy_cpu = time.process_time() - cpu0
+
+    fast = [lat for ws, slow in sockets if not slow for lat in ws.latencies]
+    stats = manager.pubsub_stats()
+    await manager.close()
+    return {
+        "clients": clients,
+        "videos": videos,
+        "messages_published": messages,
+        "deliveries": len(fast),
+        "expected_fast_deliveries": expected,
+        "elapsed_seconds": elapsed,
+        "deliveries_per_second": len(fast) / elapsed if elapsed else None,
+        "latency_ms": {
+            "p50": (percentile(fast, 50) or 0) * 1000,
+            "p99": (percentile(fast, 99) or 0) * 1000,
+            "mean": statistics.mean(fast) * 1000 if fast else None,
+        },
+        "slow_clients": sum(1 for _, slow in sockets if slow),
+        "dropped_for_slow_clients": stats["dropped"],
+        "idle_cpu_seconds_per_second": idle_cpu,
+        "busy_cpu_seconds": busy_cpu,
+        "redis_messages_received": stats["received"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=0, help="Messages/sec to publish (0 = as fast as possible)")
+    parser.add_argument("--slow-fraction", type=float, default=0.01, help="Share of clients with a slow socket")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="Seconds per send for slow clients")
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--redis-url", help="Use a real Redis instead of the in-process stand-in")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    server = None
+    redis_url = args.redis_url
+    if redis_url is None:
+        server = FakeRedisServer().start()
+        redis_url = server.url
+    try:
+        result = asyncio.run(run(redis_url, args.clients, args.videos, args.messages, args.rate,
+                                 args.slow_fraction, args.slow_delay, args.max_queue))
+    finally:
+        if server is not None:
+            server.shutdown()
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,18 +8,158 @@ CHROMA_DIR = os.path.join(DATA_DIR, "chromadb")
 FRAMES_DIR = os.path.join(DATA_DIR, "frames")
 
 class OllamaSettings(BaseSettings):
-    api_url: str = Field("http://localhost:11434/api/generate", env="OLLAMA_API_URL")
+    api_url: str = Field("http://localhost:11434/api/generate", validation_alias="OLLAMA_API_URL")
+    connect_timeout: float = Field(5.0, validation_alias="OLLAMA_CONNECT_TIMEOUT")
+    read_timeout: float = Field(120.0, validation_alias="OLLAMA_READ_TIMEOUT")
+    max_retries: int = Field(3, validation_alias="OLLAMA_MAX_RETRIES")
+    # Adaptive in-flight request limit (AIMD) per worker process
+    initial_concurrency: int = Field(4, validation_alias="OLLAMA_INITIAL_CONCURRENCY")
+    min_concurrency: int = Field(1, validation_alias="OLLAMA_MIN_CONCURRENCY")
+    max_concurrency: int = Field(16, validation_alias="OLLAMA_MAX_CONCURRENCY")
+    latency_tolerance: float = Field(2.0, validation_alias="OLLAMA_LATENCY_TOLERANCE")
+    # Model calls in flight across all workers, granted fairly across videos through Redis (0 = no global limit)
+    global_concurrency: int = Field(0, validation_alias="OLLAMA_GLOBAL_CONCURRENCY")
+    global_lease_seconds: float = Field(300.0, validation_alias="OLLAMA_GLOBAL_LEASE_SECONDS")
+    global_poll_ms: float = Field(20.0, validation_alias="OLLAMA_GLOBAL_POLL_MS")
+    global_waiter_ttl_seconds: float = Field(30.0, validation_alias="OLLAMA_GLOBAL_WAITER_TTL_SECONDS")
+    global_key_prefix: str = Field("model_slots", validation_alias="OLLAMA_GLOBAL_KEY_PREFIX")
 
 class RedisSettings(BaseSettings):
-    url: str = Field("redis://localhost:6379", env="REDIS_URL")
-    pubsub_channel_prefix: str = Field("progress", env="REDIS_PUBSUB_CHANNEL_PREFIX")
+    url: str = Field("redis://localhost:6379", validation_alias="REDIS_URL")
+    pubsub_channel_prefix: str = Field("progress", validation_alias="REDIS_PUBSUB_CHANNEL_PREFIX")
+    # Coalesce progress writes from all frame threads into one pipeline per window (0 = one pipeline per call)
+    progress_coalesce_ms: float = Field(0.0, validation_alias="REDIS_PROGRESS_COALESCE_MS")
+    # Per-websocket bound on undelivered progress events; the oldest are dropped for slow clients
+    websocket_send_queue: int = Field(256, validation_alias="REDIS_WEBSOCKET_SEND_QUEUE")
+
+class EmbeddingSettings(BaseSettings):
+    batch_size: int = Field(32, validation_alias="EMBEDDING_BATCH_SIZE")
+    max_wait_ms: float = Field(50.0, validation_alias="EMBEDDING_MAX_WAIT_MS")
+    query_cache_size: int = Field(1024, validation_alias="EMBEDDING_QUERY_CACHE_SIZE")
+
+class FrameSelectionSettings(BaseSettings):
+    enabled: bool = Field(True, validation_alias="FRAME_SELECTION_ENABLED")
+    hash_size: int = Field(8, validation_alias="FRAME_SELECTION_HASH_SIZE")
+    # Frames whose dHash differs from the current representative by at most this many bits are aliased to it
+    max_hamming_distance: int = Field(4, validation_alias="FRAME_SELECTION_MAX_HAMMING_DISTANCE")
+
+class FrameCacheSettings(BaseSettings):
+    enabled: bool = Field(True, validation_alias="FRAME_CACHE_ENABLED")
+    path: str = Field(os.path.join(DATA_DIR, "frame_cache.sqlite3"), validation_alias="FRAME_CACHE_PATH")
+    max_entries: int = Field(200000, validation_alias="FRAME_CACHE_MAX_ENTRIES")
+    # A hit only rewrites last_used (for LRU eviction) once it is older than this
+    touch_seconds: float = Field(300.0, validation_alias="FRAME_CACHE_TOUCH_SECONDS")
+
+class PipelineSettings(BaseSettings):
+    # Describe frames while ffmpeg is still decoding instead of after a full extraction pass
+    streaming: bool = Field(False, validation_alias="VIDEO_STREAMING")
+    max_queued_frames: int = Field(32, validation_alias="VIDEO_STREAMING_MAX_QUEUED_FRAMES")
+    max_in_flight_frames: int = Field(16, validation_alias="VIDEO_STREAMING_MAX_IN_FLIGHT_FRAMES")
+    # Most frames aliased to one representative, in batch and streaming mode alike
+    max_alias_run: int = Field(30, validation_alias="VIDEO_STREAMING_MAX_ALIAS_RUN")
+    extraction_event_every: int = Field(10, validation_alias="VIDEO_STREAMING_EXTRACTION_EVENT_EVERY")
+    # Per-video job checkpoints (extraction done, committed frames) so retried jobs resume
+    checkpoint_path: str = Field(os.path.join(DATA_DIR, "job_checkpoints.sqlite3"), validation_alias="VIDEO_CHECKPOINT_PATH")
+    # Fan-out: after extraction, split videos with more than this many frames to describe into shard jobs
+    # of this size on the low-priority queue (0 = the video's job describes every frame itself)
+    shard_size: int = Field(0, validation_alias="VIDEO_SHARD_SIZE")
+    shard_job_timeout: int = Field(3600, validation_alias="VIDEO_SHARD_JOB_TIMEOUT")
+    # A failed or timed-out shard is requeued this many times before the video is marked failed
+    shard_retries: int = Field(2, validation_alias="VIDEO_SHARD_RETRIES")
+    # Uploads no longer than this many seconds are queued ahead of everything else
+    priority_max_seconds: float = Field(300.0, validation_alias="VIDEO_PRIORITY_MAX_SECONDS")
+
+class MetadataSettings(BaseSettings):
+    # Where video records live: "sqlite" (indexed, in-place updates) or "chroma" (the legacy videos collection)
+    backend: str = Field("sqlite", validation_alias="METADATA_BACKEND")
+    sqlite_path: str = Field(os.path.join(DATA_DIR, "videos.sqlite3"), validation_alias="METADATA_SQLITE_PATH")
+
+class UploadSettings(BaseSettings):
+    # Resumable chunked uploads: partial files live here until finalized into the upload dir
+    sessions_dir: str = Field(os.path.join(DATA_DIR, "upload_sessions"), validation_alias="UPLOAD_SESSIONS_DIR")
+    max_chunk_bytes: int = Field(64 * 1024 * 1024, validation_alias="UPLOAD_MAX_CHUNK_BYTES")
+    session_ttl_hours: float = Field(48.0, validation_alias="UPLOAD_SESSION_TTL_HOURS")
+
+class SearchSettings(BaseSettings):
+    # BM25 keyword index over frame descriptions, fused with vector search by reciprocal rank fusion
+    keyword_enabled: bool = Field(True, validation_alias="SEARCH_KEYWORD_ENABLED")
+    keyword_index_path: str = Field(os.path.join(DATA_DIR, "keyword_index.sqlite3"), validation_alias="SEARCH_KEYWORD_INDEX_PATH")
+    # Share of the fused score given to keyword ranks (0 = vector only, 1 = keyword only); overridable per query
+    keyword_weight: float = Field(0.5, validation_alias="SEARCH_KEYWORD_WEIGHT")
+    rrf_k: int = Field(60, validation_alias="SEARCH_RRF_K")
+    # Each retriever returns n_results * this many candidates for fusion
+    candidate_multiplier: int = Field(4, validation_alias="SEARCH_CANDIDATE_MULTIPLIER")
+    # Upper bound on queries per POST /api/search/batch request
+    batch_max_queries: int = Field(1000, validation_alias="SEARCH_BATCH_MAX_QUERIES")
+    # Load the embedding model and open the search stores when the API starts; /api/ready reports when done
+    warmup: bool = Field(True, validation_alias="SEARCH_WARMUP")
+
+class SegmentSettings(BaseSettings):
+    # Coarse index of time ranges (adjacent similar frames with a pooled embedding) searched before frames
+    enabled: bool = Field(True, validation_alias="SEGMENTS_ENABLED")
+    # A frame joins the open segment while its cosine similarity to the segment's mean embedding is at least this
+    min_similarity: float = Field(0.85, validation_alias="SEGMENTS_MIN_SIMILARITY")
+    max_frames: int = Field(120, validation_alias="SEGMENTS_MAX_FRAMES")
+    # Frame-level candidates fetched per winning segment during refinement
+    refine_frames_per_segment: int = Field(3, validation_alias="SEGMENTS_REFINE_FRAMES_PER_SEGMENT")
+
+class VectorCacheSettings(BaseSettings):
+    # Per-video memory-mapped embedding matrices for exact brute-force search over small filtered scopes
+    enabled: bool = Field(True, validation_alias="VECTOR_CACHE_ENABLED")
+    root: str = Field(os.path.join(DATA_DIR, "vector_cache"), validation_alias="VECTOR_CACHE_DIR")
+    # Storage for the scan matrix: "int8" (per-row scale) or "float16"; float32 rows are kept for the rerank
+    dtype: str = Field("int8", validation_alias="VECTOR_CACHE_DTYPE")
+    # Searches whose video_ids cover at most this many frames scan the cache instead of querying Chroma
+    max_rows: int = Field(50000, validation_alias="VECTOR_CACHE_MAX_ROWS")
+    # Candidates from the quantized scan re-scored exactly, per requested result
+    rerank_factor: int = Field(4, validation_alias="VECTOR_CACHE_RERANK_FACTOR")
+
+class MetricsSettings(BaseSettings):
+    # Every process pushes its counter/histogram deltas to Redis hashes under this prefix for /api/metrics
+    redis_prefix: str = Field("metrics", validation_alias="METRICS_REDIS_PREFIX")
+    flush_interval_seconds: float = Field(5.0, validation_alias="METRICS_FLUSH_INTERVAL_SECONDS")
+
+class DeletionSettings(BaseSettings):
+    # DELETE writes a tombstone (search hides the video at once); a background collector removes the data in batches
+    tombstone_path: str = Field(os.path.join(DATA_DIR, "tombstones.sqlite3"), validation_alias="DELETION_TOMBSTONE_PATH")
+    # Run the collector in the API process; disable when it runs elsewhere (python -m backend.video.deletion)
+    gc_enabled: bool = Field(True, validation_alias="DELETION_GC_ENABLED")
+    gc_interval_seconds: float = Field(5.0, validation_alias="DELETION_GC_INTERVAL_SECONDS")
+    gc_batch_size: int = Field(50, validation_alias="DELETION_GC_BATCH_SIZE")
+    # A batch not marked collected within this long (collector crashed) is picked up again
+    gc_lease_seconds: float = Field(300.0, validation_alias="DELETION_GC_LEASE_SECONDS")
+    # Collected tombstones keep hiding late frames from still-running jobs this long, then are pruned
+    tombstone_retention_seconds: float = Field(86400.0, validation_alias="DELETION_TOMBSTONE_RETENTION_SECONDS")
+    # How stale another process's view of the tombstones may be in search filters
+    filter_refresh_seconds: float = Field(1.0, validation_alias="DELETION_FILTER_REFRESH_SECONDS")
+    bulk_max_videos: int = Field(1000, validation_alias="DELETION_BULK_MAX_VIDEOS")
+
+class TracingSettings(BaseSettings):
+    # Opt-in per-job Chrome trace (Perfetto-compatible) of stages, frames and pool queueing; a job flag overrides
+    enabled: bool = Field(False, validation_alias="VIDEO_TRACE")
+    # Also sample every thread's Python stack into the trace
+    profile: bool = Field(False, validation_alias="VIDEO_TRACE_PROFILE")
+    sample_interval_ms: float = Field(5.0, validation_alias="VIDEO_TRACE_SAMPLE_INTERVAL_MS")
+    dir: str = Field(os.path.join(DATA_DIR, "traces"), validation_alias="VIDEO_TRACE_DIR")
 
 class AppConfig(BaseSettings):
     ollama: OllamaSettings = OllamaSettings()
     redis: RedisSettings = RedisSettings()
+    embedding: EmbeddingSettings = EmbeddingSettings()
+    frame_selection: FrameSelectionSettings = FrameSelectionSettings()
+    frame_cache: FrameCacheSettings = FrameCacheSettings()
+    pipeline: PipelineSettings = PipelineSettings()
+    metadata: MetadataSettings = MetadataSettings()
+    upload: UploadSettings = UploadSettings()
+    search: SearchSettings = SearchSettings()
+    segments: SegmentSettings = SegmentSettings()
+    vector_cache: VectorCacheSettings = VectorCacheSettings()
+    metrics: MetricsSettings = MetricsSettings()
+    tracing: TracingSettings = TracingSettings()
+    deletion: DeletionSettings = DeletionSettings()
     data_dir: str = DATA_DIR
     upload_dir: str = UPLOAD_DIR
     chroma_dir: str = CHROMA_DIR
     frames_dir: str = FRAMES_DIR
 
-config = AppConfig() 
\ No newline at end of file
+config = AppConfig() 
@@ -1,5 +1,9 @@
 import os
-import chromadb
+import logging
+import threading
+from ..config.config import config
+
+logger = logging.getLogger(__name__)
 
 def sanitize_video_id(video_id: str) -> str:
     return video_id.replace(":", "_").replace(" ", "_")
@@ -7,76 +11,179 @@ def sanitize_video_id(video_id: str) -> str:
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".data"))
 CHROMA_DIR = os.path.join(DATA_DIR, "chromadb")
 
+_chroma_client = None
+_frame_collection = None
+_frame_collection_lock = threading.Lock()
+
+def _get_chroma_client():
+    # chromadb is imported on first use: it dominates import time and the API only needs it once it serves
+    global _chroma_client
+    if _chroma_client is None:
+        import chromadb
+        _chroma_client = chromadb.PersistentClient(path=CHROMA_DIR)
+    return _chroma_client
+
+def get_frame_collection():
+    """Return the process-wide handle to the video_frames collection."""
+    global _frame_collection
+    if _frame_collection is None:
+        with _frame_collection_lock:
+            if _frame_collection is None:
+                _frame_collection = _get_chroma_client().get_or_create_collection("video_frames")
+    return _frame_collection
+
+def fetch_video_frames(video_id: str, batch_size: int = 1000):
+    """All frame rows of one video as (metadatas, embeddings), read in batches."""
+    collection = get_frame_collection()
+    metadatas, embeddings = [], []
+    while True:
+        rows = collection.get(where={"video_id": video_id}, include=["embeddings", "metadatas"], limit=batch_size, offset=len(metadatas))
+        if not rows["ids"]:
+            break
+        metadatas += rows["metadatas"]
+        embeddings += list(rows["embeddings"])
+    return metadatas, embeddings
+
+_segment_collection = None
+
+def get_segment_collection():
+    """Return the process-wide handle to the video_segments collection (pooled embeddings of frame ranges)."""
+    global _segment_collection
+    if _segment_collection is None:
+        with _frame_collection_lock:
+            if _segment_collection is None:
+                _segment_collection = _get_chroma_client().get_or_create_collection("video_segments")
+    return _segment_collection
+
+_video_stores = {}
+_video_stores_lock = threading.Lock()
+
+def get_video_store(backend: str = None):
+    """
+    Return the process-wide store for video records (config.metadata.backend by default).
+    The first time the SQLite store is created, records from the legacy Chroma collection are copied into it.
+    """
+    backend = backend or config.metadata.backend
+    with _video_stores_lock:
+        store = _video_stores.get(backend)
+        if store is not None:
+            return store
+        if backend == "sqlite":
+            from .sqlite_store import SQLiteVideoStore
+            path = config.metadata.sqlite_path
+            created = not os.path.exists(path)
+            store = SQLiteVideoStore(path)
+            if created and os.path.isdir(CHROMA_DIR):
+                from .migrate import migrate_chroma_to_sqlite
+                copied = migrate_chroma_to_sqlite(CHROMA_DIR, store)
+                logger.info(f"Copied {copied} video records from Chroma into {path}")
+        elif backend == "chroma":
+            from .chroma_store import ChromaVideoStore
+            store = ChromaVideoStore(CHROMA_DIR)
+        else:
+            raise ValueError(f"Unknown metadata backend: {backend}")
+        _video_stores[backend] = store
+        return store
+
+_keyword_index = None
+
+def get_keyword_index():
+    """
+    Return the process-wide BM25 index over frame descriptions, or None when keyword search is disabled.
+    The first time the index file is created it is filled from the frames already in Chroma.
+    """
+    global _keyword_index
+    if not config.search.keyword_enabled:
+        return None
+    with _video_stores_lock:
+        if _keyword_index is None:
+            from .keyword_index import KeywordIndex
+            path = config.search.keyword_index_path
+            created = not os.path.exists(path)
+            index = KeywordIndex(path)
+            if created and os.path.isdir(CHROMA_DIR):
+                collection = get_frame_collection()
+                offset = 0
+                while True:
+                    rows = collection.get(include=["metadatas"], limit=1000, offset=offset)
+                    if not rows["ids"]:
+                        break
+                    index.upsert_frames(rows["metadatas"])
+                    offset += len(rows["ids"])
+                logger.info(f"Indexed {offset} existing frame descriptions into {path}")
+            _keyword_index = index
+    return _keyword_index
+
+_tombstones = None
+
+def get_tombstones():
+    """Return the process-wide store of deleted videos (see TombstoneStore)."""
+    global _tombstones
+    with _video_stores_lock:
+        if _tombstones is None:
+            from .tombstones import TombstoneStore
+            _tombstones = TombstoneStore(config.deletion.tombstone_path, refresh_seconds=config.deletion.filter_refresh_seconds,
+                                         retention_seconds=config.deletion.tombstone_retention_seconds)
+    return _tombstones
+
 class VideoDB:
-    def __init__(self):
-        self.client = chromadb.PersistentClient(path=CHROMA_DIR)
-        self.collection = self.client.get_or_create_collection("videos")
+    """
+    Video records, backed by the configured metadata store. Cheap to construct; all instances share one
+    store, which is opened (and created or migrated) on first use rather than on construction.
+    """
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = get_video_store()
+        return self._store
 
-    def add_video(self, video_id, save_path, file_name, created_at, updated_at, processing_state='processing', frame_count=0):
+    def add_video(self, video_id, save_path, file_name, created_at, updated_at, processing_state='processing', frame_count=0, content_hash=None):
         video_id = sanitize_video_id(video_id)
-        self.collection.add(
-            documents=[save_path],
-            metadatas=[{
-                "video_id": video_id,
-                "video_name": file_name,
-                "created_at": created_at,
-                "updated_at": updated_at,
-                "processing_state": processing_state,
-                "frame_count": frame_count
-            }],
-            ids=[video_id]
-        )
+        self.store.add_video(video_id, save_path, file_name, created_at, updated_at, processing_state, frame_count, content_hash)
+
+    def find_processed_duplicate(self, content_hash):
+        """The earliest fully processed video with the same file contents, or None."""
+        if not content_hash:
+            return None
+        return self.store.find_by_content_hash(content_hash, processing_state='success')
 
     def list_videos(self):
-        results = self.collection.get()
-        videos = []
-        for meta in results.get('metadatas', []):
-            video = {
-                'video_id': meta.get('video_id'),
-                'video_name': meta.get('video_name'),
-                'created_at': meta.get('created_at'),
-                'updated_at': meta.get('updated_at'),
-                'processing_state': meta.get('processing_state', 'processing'),
-                'frame_count': meta.get('frame_count', 0),
-            }
-            videos.append(video)
-        return videos
+        return self.store.list_videos()
+
+    def query_videos(self, processing_state=None, name_prefix=None, descending=False, cursor=None, limit=None):
+        """A page of videos sorted by created_at and the cursor for the next one (None when done). Raises ValueError on a bad cursor."""
+        return self.store.query_videos(processing_state=processing_state, name_prefix=name_prefix,
+                                       descending=descending, cursor=cursor, limit=limit)
+
+    def get_generation(self):
+        """Counter bumped by every write to the video records, used as the listing ETag; None if the store has none."""
+        return self.store.get_generation()
+
+    def get_video(self, video_id):
+        """Full record including save_path, or None."""
+        return self.store.get_video(video_id)
+
+    def get_video_names(self, video_ids):
+        """Resolve many video ids to their names with a single lookup."""
+        if not video_ids:
+            return {}
+        return self.store.get_video_names(video_ids)
 
     def delete_video(self, video_id):
-        self.collection.delete(ids=[video_id])
+        self.store.delete_video(video_id)
 
     def update_video(self, video_id, **kwargs):
-        results = self.collection.get(ids=[video_id])
-        if not results['metadatas']:
-            raise ValueError('Video not found')
-        meta = results['metadatas'][0]
-        meta.update(kwargs)
-        self.collection.delete(ids=[video_id])
-        self.collection.add(
-            documents=results['documents'],
-            metadatas=[meta],
-            ids=[video_id]
-        )
+        self.store.update_video(video_id, **kwargs)
+
+    def merge_job_timings(self, video_id, timings):
+        """Add one job's timing breakdown (stage seconds/items/calls, wall time) to the video's totals."""
+        self.store.merge_job_timings(video_id, timings)
 
     def update_processing_state(self, video_id, processing_state=None, frame_count=None):
-        results = self.collection.get(ids=[video_id])
-        if not results['metadatas']:
-            raise ValueError('Video not found')
-        meta = results['metadatas'][0]
-        if processing_state is not None:
-            meta['processing_state'] = processing_state
-        if frame_count is not None:
-            meta['frame_count'] = frame_count
-        self.collection.delete(ids=[video_id])
-        self.collection.add(
-            documents=results['documents'],
-            metadatas=[meta],
-            ids=[video_id]
-        )
+        self.store.update_processing_state(video_id, processing_state=processing_state, frame_count=frame_count)
 
     def get_processing_state(self, video_id):
-        results = self.collection.get(ids=[video_id])
-        if not results['metadatas']:
-            return None
-        meta = results['metadatas'][0]
-        return meta.get('processing_state', 'processing'), meta.get('frame_count', 0) 
\ No newline at end of file
+        return self.store.get_processing_state(video_id)
@@ -0,0 +1,144 @@
+import json
+import chromadb
+from .cursor import encode_cursor, decode_cursor
+from .timings import merge_timings
+
+
+class ChromaVideoStore:
+    """Legacy video records kept as metadata on the Chroma `videos` collection (the save path is the document)."""
+    def __init__(self, path: str):
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection("videos")
+
+    def get_generation(self):
+        # No counter shared between processes (or kept across restarts), so listings are not ETagged
+        return None
+
+    def add_video(self, video_id, save_path, file_name, created_at, updated_at, processing_state='processing', frame_count=0, content_hash=None):
+        meta = {
+            "video_id": video_id,
+            "video_name": file_name,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "processing_state": processing_state,
+            "frame_count": frame_count
+        }
+        if content_hash is not None:
+            meta["content_hash"] = content_hash
+        self.collection.add(documents=[save_path], metadatas=[meta], ids=[video_id])
+
+    def list_videos(self):
+        results = self.collection.get()
+        videos = []
+        for meta in results.get('metadatas', []):
+            video = {
+                'video_id': meta.get('video_id'),
+                'video_name': meta.get('video_name'),
+                'created_at': meta.get('created_at'),
+                'updated_at': meta.get('updated_at'),
+                'processing_state': meta.get('processing_state', 'processing'),
+                'frame_count': meta.get('frame_count', 0),
+            }
+            videos.append(video)
+        return videos
+
+    def query_videos(self, processing_state=None, name_prefix=None, descending=False, cursor=None, limit=None):
+        """Same contract as SQLiteVideoStore.query_videos, filtered and sorted in memory over the whole collection."""
+        videos = [
+            video for video in self.list_videos()
+            if (processing_state is None or video['processing_state'] == processing_state)
+            and (not name_prefix or (video['video_name'] or '').lower().startswith(name_prefix.lower()))
+        ]
+        sort_key = lambda video: (video['created_at'] or '', video['video_id'])
+        videos.sort(key=sort_key, reverse=descending)
+        if cursor is not None:
+            after = decode_cursor(cursor)
+            videos = [video for video in videos if (sort_key(video) < after if descending else sort_key(video) > after)]
+        if limit is None or len(videos) <= limit:
+            return videos, None
+        videos = videos[:limit]
+        return videos, encode_cursor(videos[-1]['created_at'], videos[-1]['video_id'])
+
+    def get_video(self, video_id):
+        results = self.collection.get(ids=[video_id])
+        if not results['metadatas']:
+            return None
+        return self._record(results['ids'][0], results['documents'][0], results['metadatas'][0])
+
+    def find_by_content_hash(self, content_hash, processing_state=None):
+        where = {"content_hash": content_hash}
+        if processing_state is not None:
+            where = {"$and": [where, {"processing_state": processing_state}]}
+        results = self.collection.get(where=where)
+        records = [
+            self._record(video_id, document, meta)
+            for video_id, document, meta in zip(results['ids'], results['documents'], results['metadatas'])
+        ]
+        return min(records, key=lambda record: record['created_at'] or '') if records else None
+
+    def export_videos(self):
+        """Every record including its save path, for migration."""
+        results = self.collection.get()
+        return [
+            self._record(video_id, document, meta)
+            for video_id, document, meta in zip(results['ids'], results['documents'], results['metadatas'])
+        ]
+
+    @staticmethod
+    def _record(video_id, save_path, meta):
+        return {
+            'video_id': meta.get('video_id', video_id),
+            'save_path': save_path,
+            'video_name': meta.get('video_name'),
+            'created_at': meta.get('created_at'),
+            'updated_at': meta.get('updated_at'),
+            'processing_state': meta.get('processing_state', 'processing'),
+            'frame_count': meta.get('frame_count', 0),
+            'content_hash': meta.get('content_hash'),
+            'job_timings': meta.get('job_timings'),
+        }
+
+    def get_video_names(self, video_ids):
+        results = self.collection.get(ids=list(video_ids), include=["metadatas"])
+        return {
+            video_id: (meta or {}).get('video_name')
+            for video_id, meta in zip(results.get('ids', []), results.get('metadatas', []))
+        }
+
+    def delete_video(self, video_id):
+        self.collection.delete(ids=[video_id])
+
+    def update_video(self, video_id, **kwargs):
+        results = self.collection.get(ids=[video_id])
+        if not results['metadatas']:
+            raise ValueError('Video not found')
+        meta = results['metadatas'][0]
+        meta.update(kwargs)
+        self.collection.delete(ids=[video_id])
+        self.collection.add(
+            documents=results['documents'],
+            metadatas=[meta],
+            ids=[video_id]
+        )
+
+    def merge_job_timings(self, video_id, timings):
+        results = self.collection.get(ids=[video_id], include=["metadatas"])
+        if not results['metadatas']:
+            return
+        current = results['metadatas'][0].get('job_timings')
+        self.update_video(video_id, job_timings=json.dumps(merge_timings(json.loads(current) if current else {}, timings)))
+
+    def update_processing_state(self, video_id, processing_state=None, frame_count=None):
+        changes = {}
+        if processing_state is not None:
+            changes['processing_state'] = processing_state
+        if frame_count is not None:
+            changes['frame_count'] = frame_count
+        self.update_video(video_id, **changes)
+
+    def get_processing_state(self, video_id):
+        results = self.collection.get(ids=[video_id])
+        if not results['metadatas']:
+            return None
+        meta = results['metadatas'][0]
+        return meta.get('processing_state', 'processing'), meta.get('frame_count', 0)
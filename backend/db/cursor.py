@@ -0,0 +1,16 @@
+import json
+import base64
+from typing import Optional, Tuple
+
+
+def encode_cursor(created_at: Optional[str], video_id: str) -> str:
+    """Opaque keyset cursor for the last record of a page."""
+    return base64.urlsafe_b64encode(json.dumps([created_at or "", video_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, video_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(created_at), str(video_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
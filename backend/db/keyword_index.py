@@ -0,0 +1,108 @@
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def video_token(video_id: str) -> str:
+    """Single all-digit token standing for a video id, so video filters are posting-list lookups (and immune to stemming)."""
+    return "v" + str(int(hashlib.sha1(video_id.encode()).hexdigest()[:15], 16))
+
+
+def match_expression(query: str, video_ids: Optional[List[str]] = None) -> Optional[str]:
+    """FTS5 MATCH expression OR-ing the query's terms, optionally restricted to some videos. None if the query has no terms."""
+    terms = _TOKEN_RE.findall(query or "")
+    if not terms:
+        return None
+    expr = "description : (" + " OR ".join(f'"{term}"' for term in terms) + ")"
+    if video_ids:
+        expr = "vid : (" + " OR ".join(video_token(vid) for vid in video_ids) + ") AND " + expr
+    return expr
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index over frame descriptions (SQLite FTS5, porter-stemmed), kept next to the vector
+    index: frames are upserted as they are described and removed with their video. Each video id is
+    also indexed as one token so per-video filters intersect posting lists instead of scanning matches.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS frame_keys (
+                id INTEGER PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                frame_idx INTEGER NOT NULL,
+                timestamp REAL,
+                UNIQUE (video_id, frame_idx)
+            )
+        """)
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS frame_text USING fts5(description, vid, tokenize='porter unicode61')")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert_frames(self, frames: Iterable[Dict[str, Any]]):
+        """Index frames given as metadata dicts (video_id, frame_idx, description, timestamp)."""
+        conn = self._conn()
+        with conn:
+            for frame in frames:
+                video_id, frame_idx = frame["video_id"], frame["frame_idx"]
+                conn.execute(
+                    "INSERT INTO frame_keys (video_id, frame_idx, timestamp) VALUES (?, ?, ?) "
+                    "ON CONFLICT (video_id, frame_idx) DO UPDATE SET timestamp = excluded.timestamp",
+                    (video_id, frame_idx, frame.get("timestamp"))
+                )
+                (rowid,) = conn.execute(
+                    "SELECT id FROM frame_keys WHERE video_id = ? AND frame_idx = ?", (video_id, frame_idx)
+                ).fetchone()
+                conn.execute("DELETE FROM frame_text WHERE rowid = ?", (rowid,))
+                conn.execute(
+                    "INSERT INTO frame_text (rowid, description, vid) VALUES (?, ?, ?)",
+                    (rowid, frame.get("description") or "", video_token(video_id))
+                )
+
+    def delete_video(self, video_id: str):
+        self.delete_videos([video_id])
+
+    def delete_videos(self, video_ids: List[str]):
+        """Remove every frame of the videos in one transaction."""
+        conn = self._conn()
+        with conn:
+            for video_id in video_ids:
+                conn.execute("DELETE FROM frame_text WHERE rowid IN (SELECT id FROM frame_keys WHERE video_id = ?)", (video_id,))
+                conn.execute("DELETE FROM frame_keys WHERE video_id = ?", (video_id,))
+
+    def search(self, query: str, video_ids: Optional[List[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best BM25 matches first, as frame metadata dicts."""
+        expr = match_expression(query, video_ids)
+        if expr is None or limit <= 0:
+            return []
+        rows = self._conn().execute("""
+            SELECT k.video_id, k.frame_idx, k.timestamp, t.description
+            FROM frame_text t JOIN frame_keys k ON k.id = t.rowid
+            WHERE frame_text MATCH ?
+            ORDER BY bm25(frame_text, 1.0, 0.0)
+            LIMIT ?
+        """, (expr, limit)).fetchall()
+        return [
+            {"video_id": video_id, "frame_idx": frame_idx, "timestamp": timestamp, "description": description}
+            for video_id, frame_idx, timestamp, description in rows
+        ]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM frame_keys").fetchone()[0]
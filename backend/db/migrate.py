@@ -0,0 +1,30 @@
+"""
+Copy video records from the legacy Chroma `videos` collection into the SQLite metadata store.
+Safe to re-run: records already in SQLite are left untouched.
+
+    python -m backend.db.migrate
+    python -m backend.db.migrate --chroma-dir /path/to/chromadb --sqlite-path /path/to/videos.sqlite3
+"""
+from .chroma_store import ChromaVideoStore
+from .sqlite_store import SQLiteVideoStore
+
+
+def migrate_chroma_to_sqlite(chroma_dir: str, target: SQLiteVideoStore) -> int:
+    """Returns the number of records added to the target."""
+    records = ChromaVideoStore(chroma_dir).export_videos()
+    if not records:
+        return 0
+    return target.import_videos(records)
+
+
+if __name__ == "__main__":
+    import argparse
+    from . import CHROMA_DIR
+    from ..config.config import config
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chroma-dir", default=CHROMA_DIR)
+    parser.add_argument("--sqlite-path", default=config.metadata.sqlite_path)
+    args = parser.parse_args()
+    target = SQLiteVideoStore(args.sqlite_path)
+    added = migrate_chroma_to_sqlite(args.chroma_dir, target)
+    print(f"Added {added} video records to {args.sqlite_path} ({len(target.export_videos())} total)")
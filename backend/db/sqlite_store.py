@@ -0,0 +1,203 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .cursor import encode_cursor, decode_cursor
+from .timings import merge_timings
+
+COLUMNS = ("video_id", "save_path", "video_name", "created_at", "updated_at", "processing_state", "frame_count", "content_hash", "job_timings")
+# Fields callers may change through update_video
+UPDATABLE = {"save_path", "video_name", "created_at", "updated_at", "processing_state", "frame_count", "content_hash"}
+
+
+
+def _column_value(record: Dict[str, Any], column: str) -> Any:
+    # created_at is part of the listing sort key, so keep it non-null
+    if column == "created_at":
+        return record.get(column) or ""
+    return record.get(column)
+
+
+class SQLiteVideoStore:
+    """
+    Video records in an embedded SQLite database (WAL mode, one connection per thread).
+    Lookups go through the primary key, state filters through an index, and updates are in-place.
+    Every write bumps a generation counter stored alongside, so readers in any process can tell
+    whether the list changed without querying it.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                save_path TEXT NOT NULL,
+                video_name TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                processing_state TEXT NOT NULL DEFAULT 'processing',
+                frame_count INTEGER NOT NULL DEFAULT 0,
+                content_hash TEXT,
+                job_timings TEXT
+            )
+        """)
+        existing = [row[1] for row in conn.execute("PRAGMA table_info(videos)")]
+        for column in ("content_hash", "job_timings"):
+            if column not in existing:
+                conn.execute(f"ALTER TABLE videos ADD COLUMN {column} TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS videos_processing_state ON videos(processing_state)")
+        conn.execute("CREATE INDEX IF NOT EXISTS videos_content_hash ON videos(content_hash)")
+        conn.execute("CREATE INDEX IF NOT EXISTS videos_created_at ON videos(created_at, video_id)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump_generation(self, conn: sqlite3.Connection):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+
+    def get_generation(self) -> int:
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+
+    def add_video(self, video_id, save_path, file_name, created_at, updated_at, processing_state='processing', frame_count=0, content_hash=None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR IGNORE INTO videos (video_id, save_path, video_name, created_at, updated_at, processing_state, frame_count, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (video_id, save_path, file_name, created_at or "", updated_at, processing_state, frame_count, content_hash)
+        )
+        self._bump_generation(conn)
+        conn.commit()
+
+    def import_videos(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert full records (as returned by export_videos) in one transaction, keeping existing rows. Returns rows added."""
+        conn = self._conn()
+        cur = conn.executemany(
+            f"INSERT OR IGNORE INTO videos ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+            [tuple(_column_value(record, column) for column in COLUMNS) for record in records]
+        )
+        self._bump_generation(conn)
+        conn.commit()
+        return cur.rowcount
+
+    def list_videos(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT video_id, video_name, created_at, updated_at, processing_state, frame_count FROM videos ORDER BY rowid"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query_videos(self, processing_state: Optional[str] = None, name_prefix: Optional[str] = None,
+                     descending: bool = False, cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of videos ordered by (created_at, video_id), plus the cursor for the next page (None on the last)."""
+        where, params = [], []
+        if processing_state is not None:
+            where.append("processing_state = ?")
+            params.append(processing_state)
+        if name_prefix:
+            escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("video_name LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+        if cursor is not None:
+            where.append(f"(created_at, video_id) {'<' if descending else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+        direction = "DESC" if descending else "ASC"
+        sql = "SELECT video_id, video_name, created_at, updated_at, processing_state, frame_count FROM videos"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY created_at {direction}, video_id {direction}"
+        if limit is not None:
+            # One extra row tells us whether there is a next page
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = [dict(row) for row in self._conn().execute(sql, params).fetchall()]
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["video_id"])
+
+    def get_video(self, video_id) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def find_by_content_hash(self, content_hash: str, processing_state: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        sql = f"SELECT {', '.join(COLUMNS)} FROM videos WHERE content_hash = ?"
+        params = [content_hash]
+        if processing_state is not None:
+            sql += " AND processing_state = ?"
+            params.append(processing_state)
+        row = self._conn().execute(sql + " ORDER BY created_at LIMIT 1", params).fetchone()
+        return dict(row) if row is not None else None
+
+    def export_videos(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM videos ORDER BY rowid").fetchall()
+        return [dict(row) for row in rows]
+
+    def get_video_names(self, video_ids) -> Dict[str, Optional[str]]:
+        video_ids = list(video_ids)
+        rows = self._conn().execute(
+            f"SELECT video_id, video_name FROM videos WHERE video_id IN ({', '.join('?' for _ in video_ids)})",
+            video_ids
+        ).fetchall()
+        return {row["video_id"]: row["video_name"] for row in rows}
+
+    def delete_video(self, video_id):
+        conn = self._conn()
+        conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+        self._bump_generation(conn)
+        conn.commit()
+
+    def update_video(self, video_id, **kwargs):
+        unknown = set(kwargs) - UPDATABLE
+        if unknown:
+            raise ValueError(f"Unknown video fields: {', '.join(sorted(unknown))}")
+        if not kwargs:
+            if self.get_processing_state(video_id) is None:
+                raise ValueError('Video not found')
+            return
+        conn = self._conn()
+        assignments = ", ".join(f"{column} = ?" for column in kwargs)
+        cur = conn.execute(f"UPDATE videos SET {assignments} WHERE video_id = ?", (*kwargs.values(), video_id))
+        if cur.rowcount:
+            self._bump_generation(conn)
+        conn.commit()
+        if cur.rowcount == 0:
+            raise ValueError('Video not found')
+
+    def merge_job_timings(self, video_id, timings: Dict[str, Any]):
+        """Add a job's per-stage timing breakdown to the video's totals (JSON in job_timings)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT job_timings FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if row is not None:
+                merged = merge_timings(json.loads(row[0]) if row[0] else {}, timings)
+                conn.execute("UPDATE videos SET job_timings = ? WHERE video_id = ?", (json.dumps(merged), video_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def update_processing_state(self, video_id, processing_state=None, frame_count=None):
+        changes = {}
+        if processing_state is not None:
+            changes['processing_state'] = processing_state
+        if frame_count is not None:
+            changes['frame_count'] = frame_count
+        self.update_video(video_id, **changes)
+
+    def get_processing_state(self, video_id) -> Optional[Tuple[str, int]]:
+        row = self._conn().execute(
+            "SELECT processing_state, frame_count FROM videos WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else None
@@ -0,0 +1,12 @@
+from typing import Any, Dict
+
+
+def merge_timings(total: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Add a job's timing breakdown into the video's running totals (nested dicts of numbers)."""
+    merged = dict(total)
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            merged[key] = merge_timings(merged.get(key) or {}, value)
+        else:
+            merged[key] = (merged.get(key) or 0) + value
+    return merged
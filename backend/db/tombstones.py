@@ -0,0 +1,145 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+
+class TombstoneStore:
+    """
+    Deleted videos, recorded before anything is removed. Search drops tombstoned videos at once; the
+    garbage collector leases pending tombstones in batches, removes their files, vectors and index
+    rows, then marks them collected. A collector that dies mid-batch lets its lease expire and the
+    batch is collected again (every removal is idempotent). Tombstones are kept for retention_seconds
+    after collection so frames written late by a still-running job stay hidden, then pruned, so the
+    search filter only grows with recent deletions.
+    """
+    def __init__(self, path: str, refresh_seconds: float = 1.0, retention_seconds: float = 86400.0):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._cache: Optional[tuple] = None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tombstones (
+                video_id TEXT PRIMARY KEY,
+                save_path TEXT,
+                deleted_at REAL NOT NULL,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                collected_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tombstones_pending ON tombstones (collected_at, deleted_at)")
+        conn.commit()
+
+    def prune(self) -> int:
+        """Forget tombstones collected more than retention_seconds ago. Returns how many were removed."""
+        conn = self._conn()
+        with conn:
+            removed = conn.execute("DELETE FROM tombstones WHERE collected_at < ?",
+                                   (time.time() - self.retention_seconds,)).rowcount
+        if removed:
+            self._invalidate()
+        return removed
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, videos: Iterable[Dict[str, Any]]):
+        """Tombstone videos given as {video_id, save_path} dicts; already tombstoned ones are left as they are."""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tombstones (video_id, save_path, deleted_at) VALUES (?, ?, ?)",
+                [(video["video_id"], video.get("save_path"), now) for video in videos]
+            )
+        self._invalidate()
+
+    def lease(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Claim up to limit uncollected tombstones (oldest first) whose lease is free or expired."""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            rows = conn.execute("""
+                UPDATE tombstones SET lease_until = ?, attempts = attempts + 1
+                WHERE video_id IN (
+                    SELECT video_id FROM tombstones
+                    WHERE collected_at IS NULL AND (lease_until IS NULL OR lease_until < ?)
+                    ORDER BY deleted_at LIMIT ?
+                )
+                RETURNING video_id, save_path, attempts
+            """, (now + lease_seconds, now, limit)).fetchall()
+        return [{"video_id": video_id, "save_path": save_path, "attempts": attempts} for video_id, save_path, attempts in rows]
+
+    def mark_collected(self, video_ids: List[str]):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "UPDATE tombstones SET collected_at = ?, lease_until = NULL, error = NULL WHERE video_id = ?",
+                [(time.time(), video_id) for video_id in video_ids]
+            )
+        self._invalidate()
+
+    def mark_failed(self, video_ids: List[str], error: str):
+        """Record the error and leave the tombstones pending; they are retried once their lease expires."""
+        conn = self._conn()
+        with conn:
+            conn.executemany("UPDATE tombstones SET error = ? WHERE video_id = ?", [(error, video_id) for video_id in video_ids])
+
+    def _invalidate(self):
+        with self._cache_lock:
+            self._cache = None
+
+    def _snapshot(self):
+        with self._cache_lock:
+            if self._cache is not None and time.monotonic() - self._cache[0] < self.refresh_seconds:
+                return self._cache
+        # Tombstones past retention are skipped even before the collector prunes them
+        rows = self._conn().execute(
+            "SELECT video_id, collected_at IS NULL FROM tombstones WHERE collected_at IS NULL OR collected_at >= ?",
+            (time.time() - self.retention_seconds,)
+        ).fetchall()
+        snapshot = (
+            time.monotonic(),
+            frozenset(video_id for video_id, _ in rows),
+            frozenset(video_id for video_id, pending in rows if pending),
+        )
+        with self._cache_lock:
+            self._cache = snapshot
+        return snapshot
+
+    def deleted_ids(self) -> FrozenSet[str]:
+        """Video ids pending collection or collected within retention. Cached for refresh_seconds; changes made through this store show at once."""
+        return self._snapshot()[1]
+
+    def pending_ids(self) -> FrozenSet[str]:
+        """Tombstoned video ids whose frames may still be in the indexes."""
+        return self._snapshot()[2]
+
+    def stats(self) -> Dict[str, Any]:
+        pending, failing, oldest, collected = self._conn().execute("""
+            SELECT
+                SUM(collected_at IS NULL),
+                SUM(collected_at IS NULL AND error IS NOT NULL),
+                MIN(CASE WHEN collected_at IS NULL THEN deleted_at END),
+                SUM(collected_at IS NOT NULL)
+            FROM tombstones
+        """).fetchone()
+        return {
+            "pending": pending or 0,
+            "failing": failing or 0,
+            "oldest_pending_seconds": time.time() - oldest if oldest is not None else None,
+            "collected": collected or 0,
+        }
@@ -1,10 +1,29 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from .api import router as api_router
+from .config.config import config
+from .search.warmup import warm_up, mark_ready
+from .video.deletion import DeletionCollector
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in a thread so the server accepts connections at once; /api/ready flips when it is done
+    if config.search.warmup:
+        app.state.warmup = asyncio.create_task(asyncio.to_thread(warm_up))
+    else:
+        mark_ready()
+    collector = None
+    if config.deletion.gc_enabled:
+        collector = DeletionCollector(config.deletion.gc_interval_seconds, config.deletion.gc_batch_size).start()
+    yield
+    if collector is not None:
+        await asyncio.to_thread(collector.stop)
+
+app = FastAPI(lifespan=lifespan)
 
 # Serve static files for frames and uploaded videos under /static
 frames_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '.data/frames'))
@@ -22,6 +41,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Prefix all API routes with /api
@@ -0,0 +1,197 @@
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from ..config.config import config
+
+logger = logging.getLogger(__name__)
+
+# Seconds; wide enough for a cached search (ms) and a model call or ffmpeg pass (minutes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms shared by the API and every RQ worker. Recording only updates process-local
+    deltas under a lock; a background thread adds them to Redis hashes every flush interval (and at
+    exit), so /api/metrics can render totals across processes in Prometheus text format. Gauges are
+    read when rendering instead.
+    """
+    def __init__(self, redis_url: str, prefix: str = "metrics", flush_interval: float = 5.0):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+        self._histograms: Dict[Tuple[str, LabelSet], List[float]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._client = None
+        self._flusher: Optional[threading.Thread] = None
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._help[name] = (kind, help_text)
+        if kind == "histogram":
+            self._buckets[name] = buckets
+
+    def gauge(self, name: str, help_text: str, fn: Callable[[], float]):
+        """A value read by fn when rendering, in the process serving /api/metrics (e.g. a queue length kept in Redis)."""
+        self._gauges[name] = (help_text, fn)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+        self._ensure_flusher()
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+        key = (name, _labels(labels))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                # one count per bucket plus +Inf, then sum and count
+                entry = self._histograms[key] = [0.0] * (len(buckets) + 3)
+            entry[bisect.bisect_left(buckets, value)] += 1
+            entry[-2] += value
+            entry[-1] += 1
+        self._ensure_flusher()
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                    self._flusher.start()
+                    atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Add this process's pending deltas to the shared totals in Redis."""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+        if not counters and not histograms:
+            return
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for (name, labels), value in counters.items():
+                pipe.hincrbyfloat(f"{self.prefix}:counters", json.dumps([name, labels]), value)
+            for (name, labels), entry in histograms.items():
+                for slot, value in enumerate(entry):
+                    if value:
+                        pipe.hincrbyfloat(f"{self.prefix}:histograms", json.dumps([name, labels, slot]), value)
+            if self._help:
+                pipe.hset(f"{self.prefix}:help", mapping={
+                    name: json.dumps([kind, text, list(self._buckets.get(name, ()))]) for name, (kind, text) in self._help.items()
+                })
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Metrics flush failed, keeping deltas: {e}")
+            with self._lock:
+                for key, value in counters.items():
+                    self._counters[key] = self._counters.get(key, 0.0) + value
+                for key, entry in histograms.items():
+                    current = self._histograms.setdefault(key, [0.0] * len(entry))
+                    for slot, value in enumerate(entry):
+                        current[slot] += value
+
+    def render(self) -> str:
+        """Totals across all processes in Prometheus text exposition format."""
+        self.flush()
+        client = self._redis()
+        help_rows = {name.decode(): json.loads(value) for name, value in client.hgetall(f"{self.prefix}:help").items()}
+        families: Dict[str, List[str]] = {}
+        for field, value in sorted(client.hgetall(f"{self.prefix}:counters").items()):
+            name, labels = json.loads(field)
+            families.setdefault(name, []).append(f"{name}{_format_labels(tuple(map(tuple, labels)))} {_format_value(float(value))}")
+        series: Dict[Tuple[str, LabelSet], Dict[int, float]] = {}
+        for field, value in client.hgetall(f"{self.prefix}:histograms").items():
+            name, labels, slot = json.loads(field)
+            series.setdefault((name, tuple(map(tuple, labels))), {})[slot] = float(value)
+        for (name, labels), slots in sorted(series.items()):
+            buckets = help_rows.get(name, [None, None, list(DEFAULT_BUCKETS)])[2] or list(DEFAULT_BUCKETS)
+            lines = families.setdefault(name, [])
+            cumulative = 0.0
+            for slot, bound in enumerate(buckets + ["+Inf"]):
+                cumulative += slots.get(slot, 0.0)
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(slots.get(len(buckets) + 1, 0.0))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(slots.get(len(buckets) + 2, 0.0))}")
+        out = []
+        for name in sorted(families):
+            kind, text = (help_rows.get(name) or ["untyped", ""])[:2]
+            if text:
+                out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(families[name])
+        for name, (text, fn) in sorted(self._gauges.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Gauge {name} failed: {e}")
+                continue
+            out += [f"# HELP {name} {text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return "\n".join(out) + "\n"
+
+
+metrics = MetricsRegistry(config.redis.url, prefix=config.metrics.redis_prefix, flush_interval=config.metrics.flush_interval_seconds)
+
+metrics.describe("video_stage_seconds", "histogram", "Wall time of one pipeline stage call (ffprobe, extraction, description, embedding, chroma_write, ...)")
+metrics.describe("video_stage_items_total", "counter", "Items (frames, rows, events) handled per pipeline stage")
+metrics.describe("video_jobs_total", "counter", "Finished RQ jobs by kind (video, shard) and status")
+metrics.describe("video_job_seconds", "histogram", "Wall time of RQ jobs by kind", buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0, 7200.0))
+metrics.describe("video_frames_total", "counter", "Frames indexed by source: model (LLaVA call), cache (frame cache hit), checkpoint (described before a worker restart) or alias (near-duplicate)")
+metrics.describe("video_frame_errors_total", "counter", "Representative frames that failed to be described or indexed")
+metrics.describe("videos_deleted_total", "counter", "Videos tombstoned by DELETE or bulk delete")
+metrics.describe("video_gc_collected_total", "counter", "Deleted videos whose files, vectors and index rows were removed by the collector")
+metrics.describe("video_gc_errors_total", "counter", "Collector batches that failed and will be retried")
+metrics.describe("video_gc_seconds", "histogram", "Wall time of one collector batch")
+metrics.describe("model_slot_wait_seconds", "histogram", "Time a model call waited for a cluster-wide slot (OLLAMA_GLOBAL_CONCURRENCY)")
+metrics.describe("model_slot_grants_total", "counter", "Cluster-wide model slots granted")
+metrics.describe("model_slot_lease_expired_total", "counter", "Model slots reclaimed from holders whose lease expired (crashed workers)")
+metrics.describe("search_seconds", "histogram", "Search request latency by endpoint")
+metrics.describe("search_queries_total", "counter", "Search queries by endpoint")
+metrics.describe("search_vector_backend_total", "counter", "Vector retrievals by backend: chroma (HNSW) or cache (memory-mapped scan)")
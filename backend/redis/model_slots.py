@@ -0,0 +1,150 @@
+import time
+import uuid
+import random
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from .redis_manager_base import RedisManagerBase
+from ..config.config import config
+from ..metrics import metrics
+
+
+class FairModelSemaphore(RedisManagerBase):
+    """
+    Cluster-wide limit on concurrent model calls, shared by every worker through Redis and granted in
+    weighted fair order across flows (videos) with start-time fair queuing: a request is tagged
+    finish = max(virtual clock, flow's previous finish) + cost / weight and waiters take free slots in
+    finish-tag order. A video with a long backlog only advances its own tags, so a newly uploaded short
+    video queues ahead of most of that backlog instead of behind it.
+
+    Held slots are leases, so a crashed holder frees its slot after lease_seconds; waiters refresh a
+    heartbeat on every poll and are dropped from the queue once it is older than waiter_ttl. Only plain
+    commands and MULTI/EXEC are used, no scripts.
+    """
+    def __init__(self, redis_url: str, capacity: int, prefix: str = "model_slots", lease_seconds: float = 300.0,
+                 poll_interval: float = 0.02, waiter_ttl: float = 30.0):
+        super().__init__(redis_url)
+        self.capacity = capacity
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.waiter_ttl = waiter_ttl
+        self._seq = f"{prefix}:seq"
+        self._holders = f"{prefix}:holders"
+        self._leases = f"{prefix}:leases"
+        self._queue = f"{prefix}:queue"
+        self._seen = f"{prefix}:seen"
+        self._flows = f"{prefix}:flows"
+        self._clock = f"{prefix}:clock"
+
+    def _enqueue(self, ticket: str, flow: str, cost: float) -> tuple:
+        clock = self.client.zscore(self._clock, "v") or 0.0
+        pipe = self.pipeline(transaction=True)
+        pipe.zadd(self._flows, {flow: clock}, gt=True)
+        pipe.zincrby(self._flows, cost, flow)
+        _, finish = pipe.execute()
+        pipe = self.pipeline(transaction=True)
+        pipe.zadd(self._queue, {ticket: finish})
+        pipe.zadd(self._seen, {ticket: time.time()})
+        pipe.execute()
+        return finish - cost, finish
+
+    def _reap(self, expired: List[bytes], stale: List[bytes]):
+        pipe = self.pipeline(transaction=True)
+        if expired:
+            pipe.zrem(self._holders, *expired)
+            pipe.zrem(self._leases, *expired)
+        if stale:
+            pipe.zrem(self._queue, *stale)
+            pipe.zrem(self._seen, *stale)
+        pipe.execute()
+        if expired:
+            metrics.inc("model_slot_lease_expired_total", len(expired))
+
+    def _try_grant(self, ticket: str, start: float, finish: float) -> bool:
+        now = time.time()
+        pipe = self.pipeline(transaction=True)
+        pipe.zrangebyscore(self._leases, "-inf", now)
+        pipe.zrangebyscore(self._seen, "-inf", now - self.waiter_ttl)
+        pipe.zadd(self._seen, {ticket: now})
+        # Re-queued with the original tag if this waiter was itself dropped as stale (e.g. a long pause)
+        pipe.zadd(self._queue, {ticket: finish}, nx=True)
+        pipe.zrank(self._queue, ticket)
+        pipe.zcard(self._holders)
+        expired, stale, _, _, rank, holders = pipe.execute()
+        stale = [member for member in stale if member.decode() != ticket]
+        if expired or stale:
+            self._reap(expired, stale)
+            holders -= len(expired)
+        if rank is None or rank >= self.capacity - holders:
+            return False
+        # Claim optimistically, then back out if concurrent claims pushed this one past capacity
+        seq = self.client.incr(self._seq)
+        pipe = self.pipeline(transaction=True)
+        pipe.zadd(self._holders, {ticket: seq})
+        pipe.zadd(self._leases, {ticket: now + self.lease_seconds})
+        pipe.zrank(self._holders, ticket)
+        _, _, position = pipe.execute()
+        if position >= self.capacity:
+            self.release(ticket)
+            return False
+        pipe = self.pipeline(transaction=True)
+        pipe.zrem(self._queue, ticket)
+        pipe.zrem(self._seen, ticket)
+        pipe.zadd(self._clock, {"v": start}, gt=True)
+        # Flows whose last tag is behind the clock would start at the clock anyway
+        pipe.zremrangebyscore(self._flows, "-inf", f"({start}")
+        pipe.execute()
+        return True
+
+    def acquire(self, flow: str, weight: float = 1.0, cost: float = 1.0) -> str:
+        """Block until a slot is granted to this request of flow; returns the token to release."""
+        ticket = uuid.uuid4().hex
+        started = time.perf_counter()
+        try:
+            start, finish = self._enqueue(ticket, flow, cost / weight)
+            while not self._try_grant(ticket, start, finish):
+                time.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+        except BaseException:
+            pipe = self.pipeline(transaction=True)
+            for key in (self._queue, self._seen, self._holders, self._leases):
+                pipe.zrem(key, ticket)
+            pipe.execute()
+            raise
+        metrics.inc("model_slot_grants_total")
+        metrics.observe("model_slot_wait_seconds", time.perf_counter() - started)
+        return ticket
+
+    def release(self, token: str):
+        pipe = self.pipeline(transaction=True)
+        pipe.zrem(self._holders, token)
+        pipe.zrem(self._leases, token)
+        pipe.execute()
+
+    @contextmanager
+    def slot(self, flow: str, weight: float = 1.0):
+        token = self.acquire(flow, weight)
+        try:
+            yield token
+        finally:
+            self.release(token)
+
+    def stats(self) -> Dict[str, Any]:
+        pipe = self.pipeline(transaction=False)
+        pipe.zcard(self._holders)
+        pipe.zcard(self._queue)
+        in_use, waiting = pipe.execute()
+        return {"capacity": self.capacity, "in_use": in_use, "waiting": waiting}
+
+
+def get_model_slots() -> Optional[FairModelSemaphore]:
+    """The semaphore configured by OLLAMA_GLOBAL_CONCURRENCY, or None when the global limit is off."""
+    settings = config.ollama
+    if settings.global_concurrency <= 0:
+        return None
+    return FairModelSemaphore(
+        config.redis.url,
+        settings.global_concurrency,
+        prefix=settings.global_key_prefix,
+        lease_seconds=settings.global_lease_seconds,
+        poll_interval=settings.global_poll_ms / 1000.0,
+        waiter_ttl=settings.global_waiter_ttl_seconds,
+    )
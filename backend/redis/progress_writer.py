@@ -0,0 +1,73 @@
+import time
+import logging
+import threading
+from typing import Any, List, Optional, Tuple
+from .redis_progress_manager import RedisProgressManager
+
+logger = logging.getLogger(__name__)
+
+Op = Tuple[str, Tuple[Any, ...]]
+
+
+class ProgressWriter:
+    """
+    Sends progress state changes and their pub/sub events to Redis in pipelines.
+    Each call is one round trip (e.g. SREM + SADD + PUBLISH for a finished frame). With coalesce_ms > 0,
+    calls are queued and a background thread flushes everything queued within the window as a
+    single pipeline. Ops keep their submission order either way. Safe to call from any thread.
+    """
+    def __init__(self, manager: RedisProgressManager, coalesce_ms: float = 0.0):
+        self._manager = manager
+        self.coalesce = coalesce_ms / 1000.0
+        self._pending: List[Op] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._flushing = False
+
+    def write(self, ops: List[Op]):
+        if self.coalesce <= 0:
+            self._execute(ops)
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                self._thread.start()
+            self._pending.extend(ops)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = 5.0):
+        """Block until everything queued so far has been sent."""
+        if self.coalesce <= 0:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._flushing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logger.warning(f"Progress writer flush timed out with {len(self._pending)} ops pending")
+                    return
+                self._cond.wait(remaining)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Let more events arrive within the coalescing window
+            time.sleep(self.coalesce)
+            with self._cond:
+                ops, self._pending = self._pending, []
+                self._flushing = True
+            try:
+                self._execute(ops)
+            except Exception as e:
+                logger.error(f"Failed to write {len(ops)} progress ops to Redis: {e}")
+            finally:
+                with self._cond:
+                    self._flushing = False
+                    self._cond.notify_all()
+
+    def _execute(self, ops: List[Op]):
+        if ops:
+            self._manager.execute_ops(ops)
@@ -1,34 +1,49 @@
 from backend.config.config import config
 import redis
-from typing import Any, List
+import threading
+from typing import Any, Dict, List
 
 class RedisManagerBase:
+    """
+    Thin wrapper over a redis client. Every manager pointing at the same URL shares one
+    connection pool per process, so callers (including ThreadPoolExecutor workers) reuse connections.
+    """
+    _pools: Dict[str, redis.ConnectionPool] = {}
+    _pools_lock = threading.Lock()
+
     def __init__(self, redis_url: str = None):
         self._redis_url = redis_url or config.redis.url
+        self._client = redis.Redis(connection_pool=self._pool_for(self._redis_url))
+
+    @classmethod
+    def _pool_for(cls, redis_url: str) -> redis.ConnectionPool:
+        with cls._pools_lock:
+            pool = cls._pools.get(redis_url)
+            if pool is None:
+                pool = cls._pools[redis_url] = redis.ConnectionPool.from_url(redis_url)
+            return pool
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client
+
+    def pipeline(self, transaction: bool = False):
+        return self._client.pipeline(transaction=transaction)
 
     def get(self, key: str) -> Any:
-        r = redis.Redis.from_url(self._redis_url)
-        value = r.get(key)
-        r.close()
-        return value
+        return self._client.get(key)
 
     def set(self, key: str, value: Any):
-        r = redis.Redis.from_url(self._redis_url)
-        r.set(key, value)
-        r.close()
+        self._client.set(key, value)
 
     def sadd(self, key: str, value: Any):
-        r = redis.Redis.from_url(self._redis_url)
-        r.sadd(key, value)
-        r.close()
+        self._client.sadd(key, value)
 
     def srem(self, key: str, value: Any):
-        r = redis.Redis.from_url(self._redis_url)
-        r.srem(key, value)
-        r.close()
+        self._client.srem(key, value)
 
     def smembers(self, key: str) -> List[Any]:
-        r = redis.Redis.from_url(self._redis_url)
-        members = list(r.smembers(key))
-        r.close()
-        return members 
\ No newline at end of file
+        return list(self._client.smembers(key))
+
+    def publish(self, channel: str, message: str):
+        self._client.publish(channel, message)
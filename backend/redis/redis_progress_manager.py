@@ -1,40 +1,159 @@
 from .redis_manager_base import RedisManagerBase
 from ..video.utils import get_frame_url
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
 from ..db import VideoDB
 
-class RedisProgressManager(RedisManagerBase):
-    def get_progress_state(self, video_id: str) -> Dict[str, Any]:
-        # Fetch total_frames from VideoDB
-        video_db = VideoDB()
-        _, total_frames = video_db.get_processing_state(video_id)
-        if total_frames is None or total_frames == 0:
-            # Extraction not done yet
-            in_process_with_urls = []
-            done_with_urls = []
-            first_frame_url = None
-            total_frames = 0
+_video_db = None
+
+
+def _get_video_db() -> VideoDB:
+    global _video_db
+    if _video_db is None:
+        _video_db = VideoDB()
+    return _video_db
+
+
+def bitmap_ranges(bitmap: Optional[bytes]) -> List[List[int]]:
+    """[start, end) runs of set bits in a Redis bitmap (bit 0 is the high bit of the first byte)."""
+    if not bitmap:
+        return []
+    bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8)).astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], bits, [0]))))
+    return edges.reshape(-1, 2).tolist()
+
+
+def index_ranges(indices: Iterable[int]) -> List[List[int]]:
+    """[start, end) runs covering a set of frame indices."""
+    ranges: List[List[int]] = []
+    for idx in sorted(indices):
+        if ranges and ranges[-1][1] == idx:
+            ranges[-1][1] = idx + 1
         else:
-            in_process = [int(x) for x in self.smembers(f"progress:{video_id}:in_process")]
-            done = [int(x) for x in self.smembers(f"progress:{video_id}:done")]
-            in_process_with_urls = [
-                {"frame_idx": idx, "frame_url": get_frame_url(video_id, idx)} for idx in in_process
-            ]
-            done_with_urls = [
-                {"frame_idx": idx, "frame_url": get_frame_url(video_id, idx)} for idx in done
+            ranges.append([idx, idx + 1])
+    return ranges
+
+
+def parse_seq(seq: Any) -> Optional[Tuple[int, int]]:
+    """(epoch, log position) from a "<epoch>:<position>" sequence, or None if it isn't one."""
+    try:
+        epoch, position = str(seq).split(":")
+        return int(epoch), int(position)
+    except ValueError:
+        return None
+
+
+class RedisProgressManager(RedisManagerBase):
+    """
+    Per-video frame progress kept as two Redis bitmaps (bit i set = frame i is in that state) and an
+    append-only log of state changes. Counts are BITCOUNTs of the bitmaps rather than separate counters,
+    so ops replayed by a retried job (setting a bit that is already set) can't make them drift.
+    The progress sequence is "<epoch>:<log length>", where the epoch is bumped each time the progress
+    is cleared for a new run: a client that has seen a sequence of the current epoch can ask for only
+    the changes after it instead of a full snapshot.
+    """
+    def _key(self, video_id: str, name: str) -> str:
+        return f"progress:{video_id}:{name}"
+
+    def get_progress_state(self, video_id: str, since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Snapshot of a video's progress with frame states as [start, end) index ranges.
+        With `since` (a sequence from an earlier snapshot of the same run), only frames whose state
+        changed after it are returned and `delta` is set. Frame URLs are left to the client (see get_frame_url).
+        """
+        full = since is None
+        pipe = self.pipeline(transaction=True)
+        pipe.get(self._key(video_id, "total_frames"))
+        pipe.bitcount(self._key(video_id, "in_process"))
+        pipe.bitcount(self._key(video_id, "done"))
+        pipe.get(self._key(video_id, "epoch"))
+        pipe.llen(self._key(video_id, "log"))
+        if full:
+            pipe.get(self._key(video_id, "in_process"))
+            pipe.get(self._key(video_id, "done"))
+        total, in_process_count, done_count, epoch, length, *bitmaps = pipe.execute()
+        epoch = int(epoch or 0)
+        if total is None:
+            # Not recorded by the worker yet (or progress predates it); fall back to the video record
+            _, total = _get_video_db().get_processing_state(video_id)
+        total_frames = int(total or 0)
+        state = {
+            "seq": f"{epoch}:{length}",
+            "delta": False,
+            "in_process": [],
+            "done": [],
+            "in_process_count": in_process_count,
+            "done_count": done_count,
+            "total_frames": total_frames,
+            "first_frame_url": get_frame_url(video_id, 0) if total_frames else None,
+        }
+        since_epoch, since_length = parse_seq(since) or (None, -1)
+        if not full and since_epoch == epoch and 0 <= since_length <= length:
+            entries = self._client.lrange(self._key(video_id, "log"), since_length, length - 1) if since_length < length else []
+            # Frame states only move forward, so the last entry per frame is its current state
+            latest: Dict[int, bytes] = {int(entry[1:]): entry[:1] for entry in entries}
+            state["delta"] = True
+            state["in_process"] = index_ranges(idx for idx, kind in latest.items() if kind == b"p")
+            state["done"] = index_ranges(idx for idx, kind in latest.items() if kind == b"d")
+            return state
+        if not full:
+            # The client's sequence is from a previous run of the job (or unreadable); send everything
+            pipe = self.pipeline(transaction=True)
+            pipe.get(self._key(video_id, "epoch"))
+            pipe.llen(self._key(video_id, "log"))
+            pipe.get(self._key(video_id, "in_process"))
+            pipe.get(self._key(video_id, "done"))
+            epoch, length, *bitmaps = pipe.execute()
+            state["seq"] = f"{int(epoch or 0)}:{length}"
+        state["in_process"] = bitmap_ranges(bitmaps[0])
+        state["done"] = bitmap_ranges(bitmaps[1])
+        return state
+
+    def frame_in_process_ops(self, video_id: str, frame_idx: int) -> List[tuple]:
+        return [
+            ("setbit", (self._key(video_id, "in_process"), frame_idx, 1)),
+            ("rpush", (self._key(video_id, "log"), f"p{frame_idx}")),
+        ]
+
+    def frame_done_ops(self, video_id: str, frame_idx: int, was_in_process: bool = True) -> List[tuple]:
+        ops = []
+        if was_in_process:
+            ops += [
+                ("setbit", (self._key(video_id, "in_process"), frame_idx, 0)),
             ]
-            first_frame_url = get_frame_url(video_id, 0)
-        return {"in_process": in_process_with_urls, "done": done_with_urls, "total_frames": total_frames, "first_frame_url": first_frame_url}
+        return ops + [
+            ("setbit", (self._key(video_id, "done"), frame_idx, 1)),
+            ("rpush", (self._key(video_id, "log"), f"d{frame_idx}")),
+        ]
+
+    def total_frames_ops(self, video_id: str, total_frames: int) -> List[tuple]:
+        return [("set", (self._key(video_id, "total_frames"), total_frames))]
+
+    def clear_progress(self, video_id: str, drop_epoch: bool = False):
+        """Start the video's progress over under a new epoch (or forget it entirely, for deleted videos)."""
+        pipe = self.pipeline(transaction=True)
+        pipe.delete(*[self._key(video_id, name) for name in
+                      ("in_process", "done", "log", "total_frames")])
+        if drop_epoch:
+            pipe.delete(self._key(video_id, "epoch"))
+        else:
+            pipe.incr(self._key(video_id, "epoch"))
+        pipe.execute()
+
+    def execute_ops(self, ops: List[tuple]):
+        pipe = self.pipeline()
+        for name, args in ops:
+            getattr(pipe, name)(*args)
+        pipe.execute()
 
     def add_frame_in_process(self, video_id: str, frame_idx: int):
-        self.sadd(f"progress:{video_id}:in_process", frame_idx)
+        self.execute_ops(self.frame_in_process_ops(video_id, frame_idx))
 
     def add_frame_done(self, video_id: str, frame_idx: int):
-        self.srem(f"progress:{video_id}:in_process", frame_idx)
-        self.sadd(f"progress:{video_id}:done", frame_idx)
+        self.execute_ops(self.frame_done_ops(video_id, frame_idx))
 
     def set_progress_value(self, key: str, value: Any):
         self.set(key, value)
 
     def get_progress_value(self, key: str) -> Any:
-        return self.get(key) 
\ No newline at end of file
+        return self.get(key)
@@ -0,0 +1,26 @@
+from .redis_manager_base import RedisManagerBase
+
+
+class ShardBarrier(RedisManagerBase):
+    """
+    Completion barrier for a video fanned out into shard jobs. Each shard records its index in a set when
+    it finishes; the shard whose arrival completes the set finalizes the video. Arrivals are idempotent,
+    so a retried shard never counts twice, and a retry after completion reports the barrier as passed.
+    """
+    TTL_SECONDS = 7 * 24 * 3600
+
+    def _key(self, video_id: str) -> str:
+        return f"shards:{video_id}:done"
+
+    def reset(self, video_id: str):
+        self.client.delete(self._key(video_id))
+
+    def arrive(self, video_id: str, shard_idx: int, shard_count: int) -> bool:
+        """Record shard_idx as finished; True once every shard of the video has arrived."""
+        key = self._key(video_id)
+        pipe = self.pipeline(transaction=True)
+        pipe.sadd(key, shard_idx)
+        pipe.scard(key)
+        pipe.expire(key, self.TTL_SECONDS)
+        _, arrived, _ = pipe.execute()
+        return arrived >= shard_count
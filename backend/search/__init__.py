@@ -0,0 +1,239 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from ..config.config import config
+from ..metrics import metrics
+from ..db import VideoDB, fetch_video_frames, get_frame_collection, get_keyword_index, get_tombstones
+from ..video.embedding import query_embedding_cache
+from .segments import delete_video_segments, index_video_segments, search_segment_hits
+from .vector_cache import get_vector_cache
+
+# Runs the keyword retriever while the calling thread queries Chroma
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
+
+class VideoNameCache:
+    """
+    In-memory video_id -> video_name map for decorating search hits.
+    Misses are resolved with one bulk lookup; upload/PATCH/DELETE call invalidate().
+    """
+    def __init__(self, video_db: VideoDB):
+        self._video_db = video_db
+        self._names: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, video_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        wanted = set(video_ids)
+        with self._lock:
+            missing = [vid for vid in wanted if vid not in self._names]
+        if missing:
+            fetched = self._video_db.get_video_names(missing)
+            with self._lock:
+                for vid in missing:
+                    self._names[vid] = fetched.get(vid)
+        with self._lock:
+            return {vid: self._names.get(vid) for vid in wanted}
+
+    def invalidate(self, video_id: Optional[str] = None):
+        with self._lock:
+            if video_id is None:
+                self._names.clear()
+            else:
+                self._names.pop(video_id, None)
+
+
+def reciprocal_rank_fusion(ranked_lists: List[Tuple[float, List[Dict[str, Any]]]], k: int) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    Merge (weight, hits) lists best first: each hit scores the sum of weight / (k + rank) over the lists
+    it appears in. Hits are identified by (video_id, frame_idx).
+    """
+    scores: Dict[Tuple[str, int], float] = {}
+    hits: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for weight, ranked in ranked_lists:
+        if weight <= 0:
+            continue
+        for rank, hit in enumerate(ranked, start=1):
+            key = (hit["video_id"], hit["frame_idx"])
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            hits.setdefault(key, hit)
+    return sorted(((score, hits[key]) for key, score in scores.items()), key=lambda item: -item[0])
+
+
+def _live_scope(video_ids: Optional[List[str]]) -> Optional[List[str]]:
+    """The video_ids filter without deleted videos: None still means every video, [] means nothing is left to search."""
+    if not video_ids:
+        return None
+    deleted = get_tombstones().deleted_ids()
+    return [video_id for video_id in video_ids if video_id not in deleted]
+
+
+def vector_search(query: str, video_ids: Optional[List[str]], n_results: int) -> List[Dict[str, Any]]:
+    return vector_search_many([query_embedding_cache.embed(query)], video_ids, n_results)[0]
+
+
+def _cached_vector_search(query_vecs: List[Any], video_ids: List[str], n_results: int) -> Optional[List[List[Dict[str, Any]]]]:
+    """Exact scan of the videos' memory-mapped vectors when they are all cached and few enough, else None."""
+    settings = config.vector_cache
+    vector_cache = get_vector_cache()
+    rows = vector_cache.rows(video_ids)
+    if rows is None or rows > settings.max_rows:
+        return None
+    ranked = vector_cache.search(query_vecs, video_ids, n_results, settings.rerank_factor)
+    if ranked is None:
+        return None
+    ids = list(dict.fromkeys(f"{video_id}_frame_{frame_idx}" for hits in ranked for video_id, frame_idx, _ in hits))
+    if not ids:
+        return [[] for _ in ranked]
+    rows = get_frame_collection().get(ids=ids, include=["metadatas"])
+    metadatas = dict(zip(rows["ids"], rows["metadatas"]))
+    return [
+        [metadatas[frame_id] for frame_id in (f"{video_id}_frame_{frame_idx}" for video_id, frame_idx, _ in hits) if frame_id in metadatas]
+        for hits in ranked
+    ]
+
+
+def vector_search_many(query_vecs: List[Any], video_ids: Optional[List[str]], n_results: int) -> List[List[Dict[str, Any]]]:
+    """
+    Nearest frames for several query embeddings sharing one filter: an exact scan of the vector cache
+    for small filtered scopes, otherwise a single Chroma query.
+    """
+    if video_ids and get_vector_cache() is not None:
+        cached = _cached_vector_search(query_vecs, video_ids, n_results)
+        if cached is not None:
+            metrics.inc("search_vector_backend_total", backend="cache")
+            return cached
+    metrics.inc("search_vector_backend_total", backend="chroma")
+    chroma_query = {
+        'query_embeddings': query_vecs,
+        'n_results': n_results,
+        'include': ["metadatas"]
+    }
+    if video_ids:
+        chroma_query['where'] = {'video_id': {'$in': video_ids}}
+    else:
+        # Deleted videos whose frames the collector has not removed yet
+        pending = get_tombstones().pending_ids()
+        if pending:
+            chroma_query['where'] = {'video_id': {'$nin': sorted(pending)}}
+    results = get_frame_collection().query(**chroma_query)
+    return results.get("metadatas") or [[] for _ in query_vecs]
+
+
+def _keyword_weight(keyword_weight: Optional[float]) -> float:
+    if keyword_weight is None:
+        keyword_weight = config.search.keyword_weight
+    return min(max(keyword_weight, 0.0), 1.0)
+
+
+def _candidates(n_results: int, keyword_weight: float) -> int:
+    """How many hits each retriever contributes; fusion needs more than the final page."""
+    return n_results * config.search.candidate_multiplier if keyword_weight > 0 else n_results
+
+
+def _fused_matches(vector_hits, keyword_hits, keyword_weight: float, n_results: int, names: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+    deleted = get_tombstones().deleted_ids()
+    if deleted:
+        vector_hits = [hit for hit in vector_hits if hit["video_id"] not in deleted]
+        keyword_hits = [hit for hit in keyword_hits if hit["video_id"] not in deleted]
+    ranked_lists = [(1.0 - keyword_weight, vector_hits), (keyword_weight, keyword_hits)] if keyword_weight > 0 else [(1.0, vector_hits)]
+    matches = []
+    for score, meta in reciprocal_rank_fusion(ranked_lists, config.search.rrf_k)[:n_results]:
+        matches.append({
+            "video_id": meta["video_id"],
+            "frame_idx": meta["frame_idx"],
+            "description": meta["description"],
+            "timestamp": meta.get("timestamp"),
+            "video_name": names.get(meta["video_id"]),
+            "score": score
+        })
+    return matches
+
+
+def search_frames(query: str, name_cache: VideoNameCache, video_ids: Optional[List[str]] = None, n_results: int = 10,
+                  keyword_weight: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Hybrid search: nearest neighbours over description embeddings and BM25 over description text,
+    run concurrently and merged by reciprocal rank fusion. keyword_weight (0..1, config default) is
+    the keyword retriever's share of the fused score; 0 skips it. Deleted videos are never returned.
+    """
+    video_ids = _live_scope(video_ids)
+    if video_ids == []:
+        return []
+    keyword_index = get_keyword_index()
+    keyword_weight = _keyword_weight(keyword_weight) if keyword_index is not None else 0.0
+    candidates = _candidates(n_results, keyword_weight)
+    keyword_future = _retrieval_pool.submit(keyword_index.search, query, video_ids, candidates) if keyword_weight > 0 else None
+    vector_hits = vector_search(query, video_ids, candidates) if keyword_weight < 1 else []
+    keyword_hits = keyword_future.result() if keyword_future is not None else []
+    names = name_cache.resolve(meta["video_id"] for meta in vector_hits + keyword_hits)
+    return _fused_matches(vector_hits, keyword_hits, keyword_weight, n_results, names)
+
+
+def search_frames_batch(queries: List[Dict[str, Any]], name_cache: VideoNameCache) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Run many searches ({query, video_ids, n_results, keyword_weight} dicts) with the same ranking as
+    search_frames, but amortized: every query text is embedded in one forward pass, queries sharing a
+    video_ids filter become one multi-embedding Chroma query, and keyword lookups run on the retrieval
+    pool meanwhile. Yields (index into queries, matches), one filter group at a time.
+    """
+    keyword_index = get_keyword_index()
+    vectors = query_embedding_cache.embed_many([q["query"] for q in queries])
+    weights, candidates, keyword_futures = [], [], {}
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    scopes = [_live_scope(q.get("video_ids")) for q in queries]
+    for i, q in enumerate(queries):
+        if scopes[i] == []:
+            yield i, []
+            weights.append(0.0)
+            candidates.append(0)
+            continue
+        weight = _keyword_weight(q.get("keyword_weight")) if keyword_index is not None else 0.0
+        weights.append(weight)
+        candidates.append(_candidates(q.get("n_results", 10), weight))
+        if weight > 0:
+            keyword_futures[i] = _retrieval_pool.submit(keyword_index.search, q["query"], scopes[i], candidates[i])
+        groups.setdefault(tuple(sorted(set(scopes[i] or []))), []).append(i)
+    for video_ids, members in groups.items():
+        vector_members = [i for i in members if weights[i] < 1]
+        vector_hits: Dict[int, List[Dict[str, Any]]] = {}
+        if vector_members:
+            rows = vector_search_many([vectors[i] for i in vector_members], list(video_ids) or None, max(candidates[i] for i in vector_members))
+            vector_hits = {i: hits[:candidates[i]] for i, hits in zip(vector_members, rows)}
+        keyword_hits = {i: keyword_futures[i].result() for i in members if i in keyword_futures}
+        names = name_cache.resolve(
+            meta["video_id"] for hits in list(vector_hits.values()) + list(keyword_hits.values()) for meta in hits
+        )
+        for i in members:
+            yield i, _fused_matches(vector_hits.get(i, []), keyword_hits.get(i, []), weights[i], queries[i].get("n_results", 10), names)
+
+
+def build_video_indexes(video_id: str):
+    """Build the derived per-video indexes (segments, vector cache) from a processed video's frame rows."""
+    metadatas, vectors = fetch_video_frames(video_id)
+    index_video_segments(video_id, metadatas, vectors)
+    vector_cache = get_vector_cache()
+    if vector_cache is not None:
+        vector_cache.write(video_id, metadatas, vectors)
+
+
+def delete_video_indexes(video_ids: List[str]):
+    delete_video_segments(video_ids)
+    vector_cache = get_vector_cache()
+    if vector_cache is not None:
+        for video_id in video_ids:
+            vector_cache.delete(video_id)
+
+
+def search_segments(query: str, name_cache: VideoNameCache, video_ids: Optional[List[str]] = None, n_results: int = 10) -> List[Dict[str, Any]]:
+    """Time ranges of similar adjacent frames matching the query, each with its best frame as thumbnail."""
+    video_ids = _live_scope(video_ids)
+    if video_ids == []:
+        return []
+    hits = search_segment_hits(
+        query_embedding_cache.embed(query), video_ids=video_ids, n_results=n_results,
+        exclude_video_ids=sorted(get_tombstones().pending_ids()) if video_ids is None else None
+    )
+    names = name_cache.resolve(hit["video_id"] for hit in hits)
+    for hit in hits:
+        hit["video_name"] = names.get(hit["video_id"])
+    return hits
@@ -0,0 +1,155 @@
+import logging
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..config.config import config
+from ..db import fetch_video_frames, get_frame_collection, get_segment_collection
+from ..video.utils import get_frame_url
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH = 1000
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def build_segments(metadatas: List[Dict[str, Any]], vectors: np.ndarray, min_similarity: float, max_frames: int) -> List[Dict[str, Any]]:
+    """
+    Greedily merge consecutive frames into segments: a frame joins the open segment while it directly
+    follows the segment's last frame and its cosine similarity to the segment's mean embedding is at
+    least min_similarity. Each segment carries its pooled (normalized mean) embedding and the frame
+    closest to it as representative.
+    """
+    if not metadatas:
+        return []
+    order = sorted(range(len(metadatas)), key=lambda i: metadatas[i]["frame_idx"])
+    unit = _normalize(np.asarray(vectors, dtype=np.float32))
+    runs: List[List[int]] = []
+    total = None
+    for i in order:
+        if runs:
+            last = metadatas[runs[-1][-1]]["frame_idx"]
+            pooled = total / (np.linalg.norm(total) or 1)
+            if (
+                metadatas[i]["frame_idx"] == last + 1 and len(runs[-1]) < max_frames
+                and float(unit[i] @ pooled) >= min_similarity
+            ):
+                runs[-1].append(i)
+                total += unit[i]
+                continue
+        runs.append([i])
+        total = unit[i].copy()
+    segments = []
+    for run in runs:
+        pooled = _normalize(unit[run].sum(axis=0))
+        rep = run[int(np.argmax(unit[run] @ pooled))]
+        first, last, rep_meta = metadatas[run[0]], metadatas[run[-1]], metadatas[rep]
+        segments.append({
+            "start_frame": first["frame_idx"],
+            "end_frame": last["frame_idx"],
+            "start": first.get("timestamp"),
+            "end": last.get("timestamp"),
+            "frame_idx": rep_meta["frame_idx"],
+            "timestamp": rep_meta.get("timestamp"),
+            "description": rep_meta.get("description", ""),
+            "embedding": pooled,
+        })
+    return segments
+
+
+def index_video_segments(video_id: str, metadatas: Optional[List[Dict[str, Any]]] = None, vectors=None) -> int:
+    """
+    (Re)build the segment index for one processed video from its frame rows (fetched unless given).
+    Returns the segment count.
+    """
+    settings = config.segments
+    if not settings.enabled:
+        return 0
+    if metadatas is None:
+        metadatas, vectors = fetch_video_frames(video_id)
+    segments = build_segments(metadatas, np.asarray(vectors), settings.min_similarity, settings.max_frames)
+    collection = get_segment_collection()
+    collection.delete(where={"video_id": video_id})
+    for start in range(0, len(segments), WRITE_BATCH):
+        batch = segments[start:start + WRITE_BATCH]
+        collection.upsert(
+            ids=[f"{video_id}_segment_{start + i}" for i in range(len(batch))],
+            embeddings=[segment["embedding"].tolist() for segment in batch],
+            metadatas=[
+                {"video_id": video_id, **{key: value for key, value in segment.items() if key != "embedding" and value is not None}}
+                for segment in batch
+            ]
+        )
+    logger.info(f"Indexed {len(segments)} segments for {len(metadatas)} frames of {video_id}")
+    return len(segments)
+
+
+def delete_video_segments(video_ids: List[str]):
+    get_segment_collection().delete(where={"video_id": {"$in": video_ids}})
+
+
+def _segment_filter(segment: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$and": [
+        {"video_id": segment["video_id"]},
+        {"frame_idx": {"$gte": segment["start_frame"]}},
+        {"frame_idx": {"$lte": segment["end_frame"]}},
+    ]}
+
+
+def search_segment_hits(query_vec, video_ids: Optional[List[str]] = None, n_results: int = 10,
+                        exclude_video_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Coarse-to-fine search: nearest segments first, then one frame query restricted to those segments'
+    ranges picks the best matching frame inside each as its thumbnail (the representative otherwise).
+    exclude_video_ids applies when video_ids is not given.
+    """
+    segment_query = {"query_embeddings": [query_vec], "n_results": n_results, "include": ["metadatas", "distances"]}
+    if video_ids:
+        segment_query["where"] = {"video_id": {"$in": video_ids}}
+    elif exclude_video_ids:
+        segment_query["where"] = {"video_id": {"$nin": exclude_video_ids}}
+    results = get_segment_collection().query(**segment_query)
+    segments = [dict(meta, distance=distance) for meta, distance in zip(results["metadatas"][0], results["distances"][0])]
+    if not segments:
+        return []
+    filters = [_segment_filter(segment) for segment in segments]
+    frame_rows = get_frame_collection().query(
+        query_embeddings=[query_vec],
+        n_results=len(segments) * config.segments.refine_frames_per_segment,
+        where=filters[0] if len(filters) == 1 else {"$or": filters},
+        include=["metadatas"]
+    )["metadatas"][0]
+    best: Dict[int, Dict[str, Any]] = {}
+    for frame in frame_rows:
+        for i, segment in enumerate(segments):
+            if (i not in best and frame["video_id"] == segment["video_id"]
+                    and segment["start_frame"] <= frame["frame_idx"] <= segment["end_frame"]):
+                best[i] = frame
+                break
+    hits = []
+    for i, segment in enumerate(segments):
+        frame = best.get(i, segment)
+        hits.append({
+            "video_id": segment["video_id"],
+            "range": [segment.get("start"), segment.get("end")],
+            "frame_range": [segment["start_frame"], segment["end_frame"]],
+            "frame_idx": frame["frame_idx"],
+            "timestamp": frame.get("timestamp"),
+            "description": frame.get("description", ""),
+            "thumbnail_url": get_frame_url(segment["video_id"], frame["frame_idx"]),
+            "distance": segment["distance"],
+        })
+    return hits
+
+
+if __name__ == "__main__":
+    # Build segments and vector caches for videos processed before they existed:
+    #     python -m backend.search.segments
+    from ..db import VideoDB
+    from . import build_video_indexes
+    logging.basicConfig(level=logging.INFO)
+    for video in VideoDB().list_videos():
+        if video.get("processing_state") == "success":
+            build_video_indexes(video["video_id"])
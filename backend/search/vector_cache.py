@@ -0,0 +1,170 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..config.config import config
+from ..db import sanitize_video_id
+
+SCAN_CHUNK_ROWS = 8192
+
+
+class VectorCache:
+    """
+    Per-video embedding matrices on disk, memory-mapped for exact brute-force search over a few videos.
+    Each video directory holds a quantized scan matrix (int8 with a per-row scale, or float16), the
+    float32 rows for exact reranking, squared norms and frame indexes. Directories are written aside
+    and swapped in, so readers see either the old or the new cache (or none, and fall back to Chroma).
+    """
+    def __init__(self, root: str, dtype: str = "int8", max_open: int = 256):
+        if dtype not in ("int8", "float16"):
+            raise ValueError(f"Unsupported vector cache dtype: {dtype}")
+        self.root = root
+        self.dtype = dtype
+        self.max_open = max_open
+        self._open: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, video_id: str) -> str:
+        return os.path.join(self.root, sanitize_video_id(video_id))
+
+    def write(self, video_id: str, metadatas: List[Dict[str, Any]], vectors) -> int:
+        """Replace the video's cache with the given frame rows. Returns the row count."""
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        if metadatas:
+            dim = self._write_matrices(tmp_dir, metadatas, vectors)
+        else:
+            # Nothing indexed: an empty manifest still marks the video as cached, with no matrices
+            dim = 0
+        with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+            json.dump({"video_id": video_id, "rows": len(metadatas), "dim": dim, "dtype": self.dtype}, f)
+        target = self._dir(video_id)
+        retired = f"{tmp_dir}.old"
+        if os.path.exists(target):
+            os.rename(target, retired)
+        os.rename(tmp_dir, target)
+        shutil.rmtree(retired, ignore_errors=True)
+        return len(metadatas)
+
+    def _write_matrices(self, tmp_dir: str, metadatas: List[Dict[str, Any]], vectors) -> int:
+        frame_idxs = np.array([meta["frame_idx"] for meta in metadatas], dtype=np.int64)
+        order = np.argsort(frame_idxs)
+        f32 = np.asarray(vectors, dtype=np.float32).reshape(len(metadatas), -1)[order]
+        np.save(os.path.join(tmp_dir, "frame_idx.npy"), frame_idxs[order])
+        np.save(os.path.join(tmp_dir, "f32.npy"), f32)
+        np.save(os.path.join(tmp_dir, "sqnorm.npy"), np.einsum("ij,ij->i", f32, f32))
+        if self.dtype == "int8":
+            scale = np.abs(f32).max(axis=1, initial=0.0) / 127.0
+            scale[scale == 0] = 1.0
+            np.save(os.path.join(tmp_dir, "scan.npy"), np.round(f32 / scale[:, None]).astype(np.int8))
+            np.save(os.path.join(tmp_dir, "scale.npy"), scale.astype(np.float32))
+        else:
+            np.save(os.path.join(tmp_dir, "scan.npy"), f32.astype(np.float16))
+        return int(f32.shape[1])
+
+    def delete(self, video_id: str):
+        shutil.rmtree(self._dir(video_id), ignore_errors=True)
+        with self._lock:
+            self._open.pop(video_id, None)
+
+    def _load(self, video_id: str) -> Optional[Dict[str, Any]]:
+        directory = self._dir(video_id)
+        manifest_path = os.path.join(directory, "manifest.json")
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self._open.get(video_id)
+            if entry is not None and entry[0] == mtime:
+                self._open.move_to_end(video_id)
+                return entry[1]
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in ("frame_idx", "f32", "sqnorm", "scan") + (("scale",) if manifest["dtype"] == "int8" else ())
+            } if manifest["rows"] else {}
+        except (OSError, ValueError):
+            # Swapped out mid-load; the caller falls back to Chroma
+            return None
+        arrays["rows"] = manifest["rows"]
+        with self._lock:
+            self._open[video_id] = (mtime, arrays)
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return arrays
+
+    def rows(self, video_ids: List[str]) -> Optional[int]:
+        """Total cached frames for the videos, or None if any of them has no cache."""
+        total = 0
+        for video_id in video_ids:
+            arrays = self._load(video_id)
+            if arrays is None:
+                return None
+            total += arrays["rows"]
+        return total
+
+    def _approx_distances(self, arrays: Dict[str, Any], queries: np.ndarray) -> np.ndarray:
+        """Squared L2 distance minus |q|^2 from the quantized matrix, rows x queries."""
+        out = np.empty((arrays["rows"], len(queries)), dtype=np.float32)
+        for start in range(0, arrays["rows"], SCAN_CHUNK_ROWS):
+            block = np.asarray(arrays["scan"][start:start + SCAN_CHUNK_ROWS], dtype=np.float32) @ queries.T
+            if "scale" in arrays:
+                block *= np.asarray(arrays["scale"][start:start + SCAN_CHUNK_ROWS])[:, None]
+            out[start:start + len(block)] = np.asarray(arrays["sqnorm"][start:start + SCAN_CHUNK_ROWS])[:, None] - 2 * block
+        return out
+
+    def search(self, query_vecs, video_ids: List[str], n_results: int, rerank_factor: int = 4) -> Optional[List[List[Tuple[str, int, float]]]]:
+        """
+        Nearest frames among the videos for each query as (video_id, frame_idx, squared L2 distance), best first.
+        The quantized matrices shortlist n_results * rerank_factor rows, which are re-scored on float32.
+        None if a video has no cache.
+        """
+        parts = []
+        for video_id in dict.fromkeys(video_ids):
+            arrays = self._load(video_id)
+            if arrays is None:
+                return None
+            if arrays["rows"]:
+                parts.append((video_id, arrays))
+        queries = np.asarray(query_vecs, dtype=np.float32).reshape(len(query_vecs), -1)
+        if not parts:
+            return [[] for _ in queries]
+        offsets = np.cumsum([0] + [arrays["rows"] for _, arrays in parts])
+        approx = np.concatenate([self._approx_distances(arrays, queries) for _, arrays in parts])
+        shortlist = min(len(approx), n_results * max(rerank_factor, 1))
+        results = []
+        for j, query in enumerate(queries):
+            candidates = np.argpartition(approx[:, j], shortlist - 1)[:shortlist] if shortlist < len(approx) else np.arange(len(approx))
+            scored = []
+            for global_row in candidates:
+                part = int(np.searchsorted(offsets, global_row, side="right")) - 1
+                video_id, arrays = parts[part]
+                row = int(global_row - offsets[part])
+                vector = np.asarray(arrays["f32"][row])
+                scored.append((float(np.dot(vector - query, vector - query)), video_id, int(arrays["frame_idx"][row])))
+            scored.sort()
+            results.append([(video_id, frame_idx, distance) for distance, video_id, frame_idx in scored[:n_results]])
+        return results
+
+
+_vector_cache: Optional[VectorCache] = None
+_vector_cache_lock = threading.Lock()
+
+
+def get_vector_cache() -> Optional[VectorCache]:
+    """Return the process-wide vector cache, or None when it is disabled."""
+    global _vector_cache
+    if not config.vector_cache.enabled:
+        return None
+    if _vector_cache is None:
+        with _vector_cache_lock:
+            if _vector_cache is None:
+                _vector_cache = VectorCache(config.vector_cache.root, config.vector_cache.dtype)
+    return _vector_cache
@@ -0,0 +1,59 @@
+import time
+import logging
+import threading
+from typing import Any, Dict
+from ..config.config import config
+from ..db import VideoDB, get_frame_collection, get_keyword_index, get_segment_collection
+from ..video.embedding import get_embedding_function
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+_status: Dict[str, Any] = {"ready": False, "seconds": {}, "error": None}
+
+
+def warm_up():
+    """
+    Pay every first-search cost once, before traffic: load the embedding model, open the Chroma
+    collections (and page in the frame index with one query), the keyword index and the metadata store.
+    The process is marked ready afterwards even if a step failed (the error is reported by readiness());
+    whatever did not load is then loaded lazily by the first search, as without warm-up.
+    """
+    seconds = _status["seconds"]
+
+    def step(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        seconds[name] = time.perf_counter() - started
+        return result
+
+    try:
+        vector = step("embedding_model", lambda: get_embedding_function()(["warm up"])[0])
+        collection = step("frame_collection", get_frame_collection)
+        if collection.count():
+            step("frame_query", lambda: collection.query(query_embeddings=[vector], n_results=1, include=["distances"]))
+        if config.segments.enabled:
+            step("segment_collection", lambda: get_segment_collection().count())
+        keyword_index = step("keyword_index", get_keyword_index)
+        if keyword_index is not None:
+            step("keyword_query", lambda: keyword_index.search("warm up", None, 1))
+        step("metadata_store", lambda: VideoDB().list_videos())
+    except Exception as e:
+        _status["error"] = str(e)
+        logger.exception("Search warm-up failed")
+    else:
+        logger.info(f"Search warm-up done in {sum(seconds.values()):.2f}s: {seconds}")
+    mark_ready()
+
+
+def mark_ready():
+    _status["ready"] = True
+    _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> Dict[str, Any]:
+    return {"ready": _status["ready"], "seconds": dict(_status["seconds"]), "error": _status["error"]}
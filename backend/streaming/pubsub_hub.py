@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """
+    One websocket's view of a channel: a bounded send queue drained by its own task.
+    Broadcast messages never wait on a slow client; when its queue is full the oldest message is dropped.
+    """
+    def __init__(self, channel: str, send: Callable[[str], Awaitable[Any]], max_queue: int):
+        self.channel = channel
+        self._send = send
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.sent = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, message: str):
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    async def put(self, message: str):
+        """Enqueue without dropping, for direct replies to this client."""
+        await self.queue.put(message)
+
+    async def run(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await self._send(message)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The socket is gone; the receive loop will notice and unsubscribe
+            logger.debug(f"[PubSubHub] Send on {self.channel} failed: {e}")
+
+
+class PubSubHub:
+    """
+    A single Redis pattern subscription per process, fanned out in memory to any number of
+    subscribers per channel. Delivery is event driven: the reader task blocks on the subscription
+    and hands each message to the channel's subscriber queues.
+    """
+    def __init__(self, redis_url: str, pattern: str = "progress:*", max_queue: int = 256):
+        self._redis_url = redis_url
+        self.pattern = pattern
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self.received = 0
+
+    async def ensure_started(self):
+        if self._reader is None or self._reader.done():
+            self._ready = asyncio.Event()
+            self._reader = asyncio.create_task(self._read_forever())
+        await self._ready.wait()
+
+    async def _read_forever(self):
+        backoff = 0.5
+        while True:
+            client = aioredis.from_url(self._redis_url)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(self.pattern)
+                self._ready.set()
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    self.received += 1
+                    channel = message["channel"]
+                    channel = channel.decode() if isinstance(channel, bytes) else channel
+                    subscribers = self._subscribers.get(channel)
+                    if not subscribers:
+                        continue
+                    data = message["data"]
+                    data = data.decode() if isinstance(data, bytes) else data
+                    for subscriber in list(subscribers):
+                        subscriber.offer(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Don't hold sockets hostage while Redis is down; they start receiving once we reconnect
+                self._ready.set()
+                logger.error(f"[PubSubHub] Subscription to {self.pattern} failed, reconnecting in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+
+    async def subscribe(self, channel: str, send: Callable[[str], Awaitable[Any]]) -> Subscriber:
+        await self.ensure_started()
+        subscriber = Subscriber(channel, send, self.max_queue)
+        self._subscribers.setdefault(channel, set()).add(subscriber)
+        subscriber.task = asyncio.create_task(subscriber.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.channel)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.channel]
+        if subscriber.task is not None:
+            subscriber.task.cancel()
+
+    async def close(self):
+        for subscribers in list(self._subscribers.values()):
+            for subscriber in list(subscribers):
+                self.unsubscribe(subscriber)
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+    def stats(self) -> Dict[str, Any]:
+        subscribers = [s for subs in self._subscribers.values() for s in subs]
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": len(subscribers),
+            "received": self.received,
+            "dropped": sum(s.dropped for s in subscribers),
+            "queued": sum(s.queue.qsize() for s in subscribers),
+        }
@@ -6,10 +6,17 @@ class FrameInfo(BaseModel):
     frame_url: str
     description: Optional[str] = None
     timestamp: Optional[float] = None
+    alias_of: Optional[int] = None
 
 class ProgressStateData(BaseModel):
-    in_process: List[FrameInfo]
-    done: List[FrameInfo]
+    # Frame states as [start, end) index ranges; with delta=True only frames changed since the requested seq
+    # ("<epoch>:<log length>", the epoch changing whenever the job restarts)
+    seq: str = "0:0"
+    delta: bool = False
+    in_process: List[List[int]] = []
+    done: List[List[int]] = []
+    in_process_count: int = 0
+    done_count: int = 0
     total_frames: Optional[int] = None
     first_frame_url: Optional[str] = None
 
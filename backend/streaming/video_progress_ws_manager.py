@@ -1,17 +1,22 @@
 import asyncio
+import logging
 from .websocket_manager import WebSocketManagerBase
 from fastapi import WebSocket
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from ..config.config import config
 from ..redis.redis_progress_manager import RedisProgressManager
+from ..redis.progress_writer import ProgressWriter
+
+logger = logging.getLogger(__name__)
 
 class VideoProgressWebSocketManager(WebSocketManagerBase):
     def __init__(self):
-        super().__init__(config.redis.url)
+        super().__init__(config.redis.url, pattern=f"{config.redis.pubsub_channel_prefix}:*", max_queue=config.redis.websocket_send_queue)
         self.progress = RedisProgressManager(config.redis.url)
+        self.writer = ProgressWriter(self.progress, coalesce_ms=config.redis.progress_coalesce_ms)
 
-    def get_progress_state(self, video_id: str) -> Dict[str, Any]:
-        return self.progress.get_progress_state(video_id)
+    def get_progress_state(self, video_id: str, since: Optional[str] = None) -> Dict[str, Any]:
+        return self.progress.get_progress_state(video_id, since=since)
 
     def add_frame_in_process(self, video_id: str, frame_idx: int):
         self.progress.add_frame_in_process(video_id, frame_idx)
@@ -19,10 +24,53 @@ class VideoProgressWebSocketManager(WebSocketManagerBase):
     def add_frame_done(self, video_id: str, frame_idx: int):
         self.progress.add_frame_done(video_id, frame_idx)
 
+    def reset_progress(self, video_id: str):
+        """Forget progress from an earlier run of the video's job."""
+        self.writer.flush()
+        self.progress.clear_progress(video_id)
+
+    def _publish_op(self, video_id: str, message: str):
+        return ("publish", (f"progress:{video_id}", message))
+
+    def frame_in_process(self, video_id: str, frame_idx: int, message: str):
+        """Mark a frame in process and publish its event in one round trip."""
+        self.writer.write(self.progress.frame_in_process_ops(video_id, frame_idx) + [self._publish_op(video_id, message)])
+
+    def frame_done(self, video_id: str, frame_idx: int, message: str):
+        """Move a frame from in_process to done and publish its event in one round trip."""
+        self.writer.write(self.progress.frame_done_ops(video_id, frame_idx) + [self._publish_op(video_id, message)])
+
+    def frames_done(self, video_id: str, frames, was_in_process: bool = False):
+        """Batch form of frame_done for (frame_idx, message) pairs, sent as a single pipeline."""
+        ops = []
+        for frame_idx, message in frames:
+            ops += self.progress.frame_done_ops(video_id, frame_idx, was_in_process) + [self._publish_op(video_id, message)]
+        self.writer.write(ops)
+
+    def restore_done(self, video_id: str, frame_idxs):
+        """Mark frames committed by an earlier attempt of the job as done, without publishing events."""
+        ops = []
+        for frame_idx in frame_idxs:
+            ops += self.progress.frame_done_ops(video_id, frame_idx, was_in_process=False)
+        if ops:
+            self.writer.write(ops)
+
+    def set_total_frames(self, video_id: str, total_frames: int, message: Optional[str] = None):
+        """Record the video's frame count for progress snapshots, optionally publishing an event with it."""
+        ops = self.progress.total_frames_ops(video_id, total_frames)
+        if message is not None:
+            ops.append(self._publish_op(video_id, message))
+        self.writer.write(ops)
+
+    def flush_progress(self):
+        self.writer.flush()
+
     def publish_progress_sync(self, video_id: str, message: str):
-        print(f"[VideoProgressWSManager] publish_progress_sync: {video_id} {message}")
-        asyncio.run(self.publish(f"progress:{video_id}", message))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"publish_progress_sync: {video_id} {message}")
+        self.writer.write([self._publish_op(video_id, message)])
 
     async def publish_progress(self, video_id: str, message: str):
-        print(f"[VideoProgressWSManager] publish_progress (async): {video_id} {message}")
-        await self.publish(f"progress:{video_id}", message) 
\ No newline at end of file
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"publish_progress (async): {video_id} {message}")
+        await self.publish(f"progress:{video_id}", message)
@@ -1,62 +1,84 @@
 import asyncio
 import json
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Set
 from fastapi import WebSocket, WebSocketDisconnect
 import redis.asyncio as aioredis
+from .pubsub_hub import PubSubHub, Subscriber
 
 class WebSocketManagerBase:
     """
     Base class for managing websocket connections and Redis PubSub for streaming use cases.
+    All sockets in the process share one pattern subscription (see PubSubHub); any number of
+    sockets may be connected under the same key.
     """
-    def __init__(self, redis_url: str):
-        self._active_connections: Dict[str, WebSocket] = {}
+    def __init__(self, redis_url: str, pattern: str = "progress:*", max_queue: int = 256):
+        self._active_connections: Dict[str, Set[WebSocket]] = {}
         self._redis_url = redis_url
-        self._pubsubs: Dict[str, aioredis.client.PubSub] = {}
+        self._subscribers: Dict[WebSocket, Subscriber] = {}
+        self._hub = PubSubHub(redis_url, pattern=pattern, max_queue=max_queue)
+        self._publisher: Optional[aioredis.Redis] = None
 
     async def connect(self, key: str, websocket: WebSocket):
         await websocket.accept()
-        old_ws = self._active_connections.get(key)
-        if old_ws is not None:
-            try:
-                # await old_ws.close()
-                pass
-            except Exception as e:
-                print(f"[WebSocketManagerBase] Error closing old WebSocket for key {key}: {e}")
-        self._active_connections[key] = websocket
+        self._active_connections.setdefault(key, set()).add(websocket)
 
-    def disconnect(self, key: str):
-        if key in self._active_connections:
+    def disconnect(self, key: str, websocket: Optional[WebSocket] = None):
+        sockets = self._active_connections.get(key)
+        if sockets is None:
+            return
+        if websocket is None:
+            sockets.clear()
+        else:
+            sockets.discard(websocket)
+        if not sockets:
             del self._active_connections[key]
-        if key in self._pubsubs:
-            del self._pubsubs[key]
 
     async def send_json(self, key: str, data: Any):
-        ws = self._active_connections.get(key)
-        if ws:
-            await ws.send_text(json.dumps(data))
+        message = json.dumps(data)
+        for ws in list(self._active_connections.get(key, ())):
+            await self.send_text_to(ws, message)
+
+    async def send_json_to(self, websocket: WebSocket, data: Any):
+        await self.send_text_to(websocket, json.dumps(data))
+
+    async def send_text_to(self, websocket: WebSocket, message: str):
+        # Go through the socket's send queue when it has one, so replies never interleave with fan-out sends
+        subscriber = self._subscribers.get(websocket)
+        if subscriber is not None:
+            await subscriber.put(message)
+        else:
+            await websocket.send_text(message)
 
     async def broadcast_json(self, data: Any):
-        for ws in self._active_connections.values():
-            await ws.send_text(json.dumps(data))
+        for key in list(self._active_connections):
+            await self.send_json(key, data)
 
-    async def subscribe(self, channel: str) -> aioredis.client.PubSub:
-        redis = aioredis.from_url(self._redis_url)
-        pubsub = redis.pubsub()
-        await pubsub.subscribe(channel)
-        self._pubsubs[channel] = pubsub
-        return pubsub
+    async def subscribe(self, channel: str, websocket: WebSocket, on_message: Optional[Callable[[str], Any]] = None) -> Subscriber:
+        send = on_message or websocket.send_text
+        subscriber = await self._hub.subscribe(channel, send)
+        self._subscribers[websocket] = subscriber
+        return subscriber
 
-    async def unsubscribe(self, channel: str):
-        pubsub = self._pubsubs.get(channel)
-        if pubsub:
-            # await pubsub.unsubscribe(channel)
-            # await pubsub.close()
-            del self._pubsubs[channel]
+    async def unsubscribe(self, websocket: WebSocket):
+        subscriber = self._subscribers.pop(websocket, None)
+        if subscriber is not None:
+            self._hub.unsubscribe(subscriber)
 
     async def publish(self, channel: str, message: str):
-        redis = aioredis.from_url(self._redis_url)
-        await redis.publish(channel, message)
-        # await redis.close()
+        if self._publisher is None:
+            self._publisher = aioredis.from_url(self._redis_url)
+        await self._publisher.publish(channel, message)
+
+    def pubsub_stats(self) -> Dict[str, Any]:
+        stats = self._hub.stats()
+        stats["connections"] = sum(len(s) for s in self._active_connections.values())
+        return stats
+
+    async def close(self):
+        await self._hub.close()
+        if self._publisher is not None:
+            await self._publisher.aclose()
+            self._publisher = None
 
     async def handle_websocket_with_pubsub(
         self,
@@ -65,26 +87,16 @@ class WebSocketManagerBase:
         channel: str,
         on_message: Optional[Callable[[str], Any]] = None,
         on_receive: Optional[Callable[[str], Any]] = None,
-        poll_interval: float = 0.1,
     ):
         await self.connect(key, websocket)
-        pubsub = await self.subscribe(channel)
         try:
+            await self.subscribe(channel, websocket, on_message)
             while True:
-                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=10.0)
-                if message and message["type"] == "message":
-                    if on_message:
-                        await on_message(message["data"].decode())
-                    else:
-                        await websocket.send_text(message["data"].decode())
-                try:
-                    data = await asyncio.wait_for(websocket.receive_text(), timeout=poll_interval)
-                    if on_receive:
-                        await on_receive(data)
-                except asyncio.TimeoutError:
-                    pass
-                await asyncio.sleep(poll_interval)
+                data = await websocket.receive_text()
+                if on_receive:
+                    await on_receive(data)
         except WebSocketDisconnect:
-            self.disconnect(key)
+            pass
         finally:
-            await self.unsubscribe(channel) 
\ No newline at end of file
+            await self.unsubscribe(websocket)
+            self.disconnect(key, websocket)
@@ -1,10 +1,11 @@
 import os
+import asyncio
+import hashlib
 from datetime import datetime
 import re
 
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".data"))
 UPLOAD_DIR = os.path.join(DATA_DIR, "uploaded_videos")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 def sanitize_video_id(video_id):
     return re.sub(r'[: ]', '_', video_id)
@@ -25,17 +26,45 @@ class VideoStorage:
         return self._write_file(file, save_path, chunk_size, video_id, now)
 
     async def _write_file(self, file, save_path, chunk_size, video_id, now):
-        with open(save_path, "wb") as f:
+        # Hash while streaming so duplicates can be detected without reading the file again;
+        # disk writes and hashing run in a worker thread to keep the event loop free
+        digest = hashlib.sha256()
+        f = await asyncio.to_thread(open, save_path, "wb")
+        try:
             while True:
                 chunk = await file.read(chunk_size)
                 if not chunk:
                     break
-                f.write(chunk)
+                await asyncio.to_thread(self._write_chunk, f, digest, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
         return {
             'video_id': video_id,
             'save_path': save_path,
             'file_name': file.filename,
             'created_at': now,
+            'updated_at': now,
+            'content_hash': digest.hexdigest()
+        }
+
+    @staticmethod
+    def _write_chunk(f, digest, chunk):
+        digest.update(chunk)
+        f.write(chunk)
+
+    def adopt_file(self, src_path, file_name, video_id):
+        """Move an already written file (e.g. a finished chunked upload) into the upload layout."""
+        now = datetime.utcnow().isoformat()
+        _, ext = os.path.splitext(file_name)
+        video_folder = os.path.join(UPLOAD_DIR, video_id)
+        os.makedirs(video_folder, exist_ok=True)
+        save_path = os.path.join(video_folder, f"video{ext}")
+        os.replace(src_path, save_path)
+        return {
+            'video_id': video_id,
+            'save_path': save_path,
+            'file_name': file_name,
+            'created_at': now,
             'updated_at': now
         }
 
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+from ..config.config import config
+
+
+class JobCheckpoints:
+    """
+    Per-video progress of the ingestion job, so a retried job resumes instead of starting over.
+    Records when frame extraction finished (with the frame count and the representative -> aliases plan)
+    and which frames have been committed to the vector store. Descriptions are saved as soon as the model
+    returns, so frames described but not yet committed when a worker dies are not described again. Backed by SQLite (WAL, one connection
+    per thread) so checkpoints survive a worker crash and are shared by every worker on the host.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS video_checkpoints (
+                video_id TEXT PRIMARY KEY,
+                fps INTEGER NOT NULL,
+                frame_count INTEGER,
+                plan TEXT,
+                extracted_at REAL,
+                completed_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS committed_frames (
+                video_id TEXT NOT NULL,
+                frame_idx INTEGER NOT NULL,
+                PRIMARY KEY (video_id, frame_idx)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS frame_descriptions (
+                video_id TEXT NOT NULL,
+                frame_idx INTEGER NOT NULL,
+                description TEXT NOT NULL,
+                PRIMARY KEY (video_id, frame_idx)
+            )
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT fps, frame_count, plan, extracted_at, completed_at FROM video_checkpoints WHERE video_id = ?",
+            (video_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        fps, frame_count, plan, extracted_at, completed_at = row
+        return {
+            "fps": fps,
+            "frame_count": frame_count,
+            "plan": {int(rep): aliases for rep, aliases in json.loads(plan).items()} if plan else None,
+            "extracted": extracted_at is not None,
+            "completed": completed_at is not None,
+        }
+
+    def start(self, video_id: str, fps: int):
+        """Begin tracking a video; a checkpoint for a different fps is discarded."""
+        current = self.get(video_id)
+        if current is not None and current["fps"] == fps:
+            return
+        self.clear(video_id)
+        conn = self._conn()
+        conn.execute("INSERT INTO video_checkpoints (video_id, fps) VALUES (?, ?)", (video_id, fps))
+        conn.commit()
+
+    def mark_extracted(self, video_id: str, frame_count: int, plan: Dict[int, List[int]]):
+        conn = self._conn()
+        conn.execute(
+            "UPDATE video_checkpoints SET frame_count = ?, plan = ?, extracted_at = ? WHERE video_id = ?",
+            (frame_count, json.dumps(plan), time.time(), video_id)
+        )
+        conn.commit()
+
+    def commit_frames(self, video_id: str, frame_idxs: Iterable[int]):
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR IGNORE INTO committed_frames (video_id, frame_idx) VALUES (?, ?)",
+            [(video_id, idx) for idx in frame_idxs]
+        )
+        conn.commit()
+
+    def committed_frames(self, video_id: str) -> Set[int]:
+        rows = self._conn().execute("SELECT frame_idx FROM committed_frames WHERE video_id = ?", (video_id,))
+        return {row[0] for row in rows}
+
+    def save_description(self, video_id: str, frame_idx: int, description: str):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO frame_descriptions (video_id, frame_idx, description) VALUES (?, ?, ?)",
+            (video_id, frame_idx, description)
+        )
+        conn.commit()
+
+    def description(self, video_id: str, frame_idx: int) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT description FROM frame_descriptions WHERE video_id = ? AND frame_idx = ?", (video_id, frame_idx)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def described_frames(self, video_id: str) -> Set[int]:
+        rows = self._conn().execute("SELECT frame_idx FROM frame_descriptions WHERE video_id = ?", (video_id,))
+        return {row[0] for row in rows}
+
+    def mark_completed(self, video_id: str):
+        conn = self._conn()
+        conn.execute("UPDATE video_checkpoints SET completed_at = ? WHERE video_id = ?", (time.time(), video_id))
+        # Everything is indexed; the saved descriptions were only needed to resume
+        conn.execute("DELETE FROM frame_descriptions WHERE video_id = ?", (video_id,))
+        conn.commit()
+
+    def clear(self, video_id: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM committed_frames WHERE video_id = ?", (video_id,))
+        conn.execute("DELETE FROM frame_descriptions WHERE video_id = ?", (video_id,))
+        conn.execute("DELETE FROM video_checkpoints WHERE video_id = ?", (video_id,))
+        conn.commit()
+
+
+_job_checkpoints: Optional[JobCheckpoints] = None
+_job_checkpoints_lock = threading.Lock()
+
+
+def get_job_checkpoints() -> JobCheckpoints:
+    """Return the process-wide checkpoint store at config.pipeline.checkpoint_path."""
+    global _job_checkpoints
+    if _job_checkpoints is None:
+        with _job_checkpoints_lock:
+            if _job_checkpoints is None:
+                _job_checkpoints = JobCheckpoints(config.pipeline.checkpoint_path)
+    return _job_checkpoints
@@ -0,0 +1,102 @@
+import os
+import json
+import shutil
+import logging
+from typing import Any, Dict
+from ..config.config import config
+from ..db import VideoDB, get_frame_collection, get_keyword_index, sanitize_video_id
+from ..search import build_video_indexes
+from .job_queues import DEFAULT_QUEUE, VIDEO_JOB, get_queue
+
+logger = logging.getLogger(__name__)
+
+COPY_BATCH = 1000
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Different filesystem or links unsupported
+        shutil.copy2(src, dst)
+
+
+def clone_processed_video(source: Dict[str, Any], video_id: str, save_path: str) -> int:
+    """
+    Index video_id by reference to an already processed video with identical bytes instead of
+    re-running ffmpeg and LLaVA: the upload and frame images become hard links to the source's files
+    and the source's frame rows (descriptions and vectors) are copied under the new id.
+    Returns the frame count.
+    """
+    source_id = source['video_id']
+    # Keep one copy of the bytes on disk
+    if os.path.exists(source['save_path']):
+        tmp_path = f"{save_path}.link"
+        try:
+            os.link(source['save_path'], tmp_path)
+            os.replace(tmp_path, save_path)
+        except OSError:
+            pass
+
+    source_frames = os.path.join(config.frames_dir, sanitize_video_id(source_id))
+    frames_dir = os.path.join(config.frames_dir, sanitize_video_id(video_id))
+    os.makedirs(frames_dir, exist_ok=True)
+    if os.path.isdir(source_frames):
+        for name in os.listdir(source_frames):
+            _link_or_copy(os.path.join(source_frames, name), os.path.join(frames_dir, name))
+
+    collection = get_frame_collection()
+    keyword_index = get_keyword_index()
+    copied = 0
+    while True:
+        rows = collection.get(
+            where={"video_id": source_id}, include=["embeddings", "metadatas"],
+            limit=COPY_BATCH, offset=copied
+        )
+        if not rows['ids']:
+            break
+        metadatas = []
+        for meta in rows['metadatas']:
+            meta = dict(meta, video_id=video_id)
+            if meta.get('frame_path'):
+                meta['frame_path'] = os.path.join(frames_dir, os.path.basename(meta['frame_path']))
+            metadatas.append(meta)
+        collection.upsert(
+            embeddings=rows['embeddings'],
+            metadatas=metadatas,
+            ids=[f"{video_id}_frame_{meta['frame_idx']}" for meta in metadatas]
+        )
+        if keyword_index is not None:
+            keyword_index.upsert_frames(metadatas)
+        copied += len(rows['ids'])
+    build_video_indexes(video_id)
+    logger.info(f"Indexed {video_id} from duplicate {source_id}: {copied} frame rows reused")
+    return source.get('frame_count') or copied
+
+
+def clone_video_job(source_id: str, video_id: str, save_path: str):
+    """
+    RQ job (low priority) behind a duplicate upload: clone the source's frames and rows, then mark the
+    video done. The upload request returns as soon as this is queued, with the record in 'processing'.
+    If the source was deleted in the meantime, the video is processed from scratch instead.
+    """
+    # The pipeline is only loaded on the worker, never by the API that imports this module
+    from .frame_processing import fail_video, publish_progress, video_progress_ws_manager
+    video_db = VideoDB()
+    source = video_db.get_video(source_id)
+    if source is None or source.get('processing_state') != 'success':
+        logger.info(f"Duplicate source {source_id} of {video_id} is gone; processing {video_id} from scratch")
+        get_queue(DEFAULT_QUEUE).enqueue(VIDEO_JOB, save_path, video_id)
+        return
+    try:
+        frame_count = clone_processed_video(source, video_id, save_path)
+    except Exception as e:
+        logger.exception(f"Cloning {source_id} into {video_id} failed")
+        fail_video(video_id, video_db, str(e))
+        raise
+    video_db.update_processing_state(video_id, processing_state='success', frame_count=frame_count)
+    publish_progress(video_id, json.dumps({
+        "type": "all_frames_processed",
+        "data": {"video_id": video_id}
+    }))
+    video_progress_ws_manager.flush_progress()
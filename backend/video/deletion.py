@@ -0,0 +1,118 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from ..config.config import config
+from ..db import VideoDB, get_frame_collection, get_keyword_index, get_tombstones, sanitize_video_id
+from ..metrics import metrics
+from ..redis.redis_progress_manager import RedisProgressManager
+from ..search import delete_video_indexes
+from .checkpoints import get_job_checkpoints
+
+logger = logging.getLogger(__name__)
+progress = RedisProgressManager(config.redis.url)
+
+
+def tombstone_videos(videos: List[Dict[str, Any]], video_db: Optional[VideoDB] = None):
+    """
+    Delete videos (records with video_id and save_path) the fast way: tombstone them, then drop their
+    metadata rows so listings and duplicate detection forget them. Everything else is left to the collector.
+    """
+    video_db = video_db or VideoDB()
+    get_tombstones().add(videos)
+    for video in videos:
+        video_db.delete_video(video["video_id"])
+    metrics.inc("videos_deleted_total", len(videos))
+
+
+def _remove_files(tombstone: Dict[str, Any]):
+    shutil.rmtree(os.path.join(config.frames_dir, sanitize_video_id(tombstone["video_id"])), ignore_errors=True)
+    if tombstone.get("save_path"):
+        shutil.rmtree(os.path.dirname(tombstone["save_path"]), ignore_errors=True)
+
+
+def collect_batch(batch: List[Dict[str, Any]]):
+    """Remove everything stored for the tombstoned videos, batching the vector and index deletes. Idempotent."""
+    video_ids = [tombstone["video_id"] for tombstone in batch]
+    video_db = VideoDB()
+    for video_id in video_ids:
+        video_db.delete_video(video_id)
+    get_frame_collection().delete(where={"video_id": {"$in": video_ids}})
+    keyword_index = get_keyword_index()
+    if keyword_index is not None:
+        keyword_index.delete_videos(video_ids)
+    delete_video_indexes(video_ids)
+    checkpoints = get_job_checkpoints()
+    for tombstone in batch:
+        _remove_files(tombstone)
+        checkpoints.clear(tombstone["video_id"])
+        progress.clear_progress(tombstone["video_id"], drop_epoch=True)
+
+
+def collect_once(batch_size: Optional[int] = None) -> int:
+    """Lease one batch of pending tombstones and collect it. Returns the number of videos collected."""
+    settings = config.deletion
+    tombstones = get_tombstones()
+    batch = tombstones.lease(batch_size or settings.gc_batch_size, settings.gc_lease_seconds)
+    if not batch:
+        return 0
+    video_ids = [tombstone["video_id"] for tombstone in batch]
+    try:
+        with metrics.time("video_gc_seconds"):
+            collect_batch(batch)
+    except Exception as e:
+        logger.exception(f"Collecting {len(batch)} deleted videos failed; retrying after the lease expires")
+        tombstones.mark_failed(video_ids, str(e))
+        metrics.inc("video_gc_errors_total")
+        return 0
+    tombstones.mark_collected(video_ids)
+    metrics.inc("video_gc_collected_total", len(video_ids))
+    logger.info(f"Collected {len(video_ids)} deleted videos")
+    return len(video_ids)
+
+
+class DeletionCollector:
+    """
+    Background thread draining pending tombstones: full batches back to back, then one pass per interval.
+    Deletes are not collected on arrival so that bursts (bulk cleanup) share batches. Each pass also
+    prunes tombstones collected longer ago than the retention window.
+    """
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="deletion-gc", daemon=True)
+
+    def start(self) -> "DeletionCollector":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while not self._stop.is_set() and collect_once(self.batch_size) >= self.batch_size:
+                    pass
+                pruned = get_tombstones().prune()
+                if pruned:
+                    logger.info(f"Pruned {pruned} tombstones past retention")
+            except Exception:
+                logger.exception("Deletion collector pass failed")
+            self._stop.wait(self.interval)
+
+
+if __name__ == "__main__":
+    # Run the collector on its own (with DELETION_GC_ENABLED=0 for the API):
+    #     python -m backend.video.deletion
+    logging.basicConfig(level=logging.INFO)
+    collector = DeletionCollector(config.deletion.gc_interval_seconds, config.deletion.gc_batch_size).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        collector.stop()
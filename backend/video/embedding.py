@@ -0,0 +1,216 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+from ..config.config import config
+from .stage_timer import stage_timer
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "chroma-default-all-MiniLM-L6-v2"
+
+_embedding_function = None
+_embedding_function_lock = threading.Lock()
+
+def get_embedding_function():
+    """Return the process-wide embedding function, loading the model on first use."""
+    global _embedding_function
+    if _embedding_function is None:
+        with _embedding_function_lock:
+            if _embedding_function is None:
+                logger.info("Loading embedding model...")
+                from chromadb.utils import embedding_functions
+                _embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    return _embedding_function
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU mapping query text to its embedding, so repeated searches skip the model."""
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._vectors: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, text: str):
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+                self.hits += 1
+                return vector
+            self.misses += 1
+        vector = get_embedding_function()([text])[0]
+        with self._lock:
+            self._vectors[text] = vector
+            self._vectors.move_to_end(text)
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def embed_many(self, texts: List[str]) -> List[Any]:
+        """Embeddings for many texts; the ones not cached are embedded in a single forward pass."""
+        vectors: Dict[str, Any] = {}
+        with self._lock:
+            for text in texts:
+                vector = self._vectors.get(text)
+                if vector is not None:
+                    self._vectors.move_to_end(text)
+                    vectors[text] = vector
+            missing = list(dict.fromkeys(text for text in texts if text not in vectors))
+            self.hits += len(texts) - sum(1 for text in texts if text not in vectors)
+            self.misses += len(missing)
+        if missing:
+            embedded = get_embedding_function()(missing)
+            with self._lock:
+                for text, vector in zip(missing, embedded):
+                    vectors[text] = self._vectors[text] = vector
+                    self._vectors.move_to_end(text)
+                while len(self._vectors) > self.max_size:
+                    self._vectors.popitem(last=False)
+        return [vectors[text] for text in texts]
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+
+
+class _PendingFrame:
+    __slots__ = ("collection", "frame_id", "description", "metadata", "vector", "future", "enqueued_at")
+
+    def __init__(self, collection, frame_id: str, description: str, metadata: Dict[str, Any], vector=None):
+        self.collection = collection
+        self.frame_id = frame_id
+        self.description = description
+        self.metadata = metadata
+        self.vector = vector
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Collects frame descriptions from worker threads into micro-batches, embeds each batch
+    with a single forward pass and writes it to Chroma with a single multi-row add.
+    A batch is flushed once it reaches max_batch_size or its oldest entry has waited max_wait seconds.
+    """
+    def __init__(self, max_batch_size: int = 32, max_wait: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[_PendingFrame] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "frames": 0,
+            "max_batch_size": 0,
+            "queue_wait_seconds": 0.0,
+            "embed_seconds": 0.0,
+            "write_seconds": 0.0,
+            "errors": 0,
+        }
+
+    def submit(self, collection, frame_id: str, description: str, metadata: Dict[str, Any], vector=None) -> Future:
+        """
+        Queue one frame; the returned future resolves to its embedding once the batch is written.
+        Frames with a precomputed vector (e.g. from the frame cache) skip the model but still share the batched write.
+        """
+        item = _PendingFrame(collection, frame_id, description, metadata, vector)
+        with self._cond:
+            self._ensure_thread()
+            self._pending.append(item)
+            self._cond.notify()
+        return item.future
+
+    def add(self, collection, frame_id: str, description: str, metadata: Dict[str, Any], vector=None) -> List[float]:
+        """Blocking variant of submit, for callers running inside a thread pool."""
+        return self.submit(collection, frame_id, description, metadata, vector).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        frames = stats["frames"] or 1
+        stats["avg_batch_size"] = stats["frames"] / batches
+        stats["avg_embed_ms"] = stats["embed_seconds"] * 1000 / batches
+        stats["avg_write_ms"] = stats["write_seconds"] * 1000 / batches
+        stats["avg_queue_wait_ms"] = stats["queue_wait_seconds"] * 1000 / frames
+        return stats
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> List[_PendingFrame]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._flush(batch)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+
+    def _flush(self, batch: List[_PendingFrame]):
+        started = time.perf_counter()
+        vectors = [item.vector for item in batch]
+        to_embed = [i for i, item in enumerate(batch) if item.vector is None]
+        if to_embed:
+            ef = get_embedding_function()
+            for i, vector in zip(to_embed, ef([batch[i].description for i in to_embed])):
+                vectors[i] = vector
+        embedded = time.perf_counter()
+        # Frames from different videos may share a batch; write one upsert per collection.
+        # Upserts keep a retried job from colliding with rows its previous attempt already wrote.
+        groups: Dict[int, List[int]] = {}
+        for i, item in enumerate(batch):
+            groups.setdefault(id(item.collection), []).append(i)
+        for indices in groups.values():
+            collection = batch[indices[0]].collection
+            collection.upsert(
+                embeddings=[vectors[i] for i in indices],
+                metadatas=[batch[i].metadata for i in indices],
+                ids=[batch[i].frame_id for i in indices]
+            )
+        written = time.perf_counter()
+        if to_embed:
+            stage_timer.record("embedding", embedded - started, items=len(to_embed))
+        stage_timer.record("chroma_write", written - embedded, items=len(batch))
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["frames"] += len(batch)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            self._stats["queue_wait_seconds"] += sum(started - item.enqueued_at for item in batch)
+            self._stats["embed_seconds"] += embedded - started
+            self._stats["write_seconds"] += written - embedded
+        for item, vector in zip(batch, vectors):
+            item.future.set_result(vector)
+
+
+embedding_batcher = EmbeddingBatcher(
+    max_batch_size=config.embedding.batch_size,
+    max_wait=config.embedding.max_wait_ms / 1000.0,
+)
+query_embedding_cache = QueryEmbeddingCache(max_size=config.embedding.query_cache_size)
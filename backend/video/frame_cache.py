@@ -0,0 +1,180 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from ..config.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def frame_content_key(frame_bytes: bytes) -> str:
+    return hashlib.sha256(frame_bytes).hexdigest()
+
+
+def cache_namespace(*parts: str) -> str:
+    """Fingerprint of everything that shapes a cached entry (model, prompt, embedder); changing any part invalidates the cache."""
+    return hashlib.sha1("\x00".join(parts).encode()).hexdigest()[:16]
+
+
+class FrameCache:
+    """
+    Persistent content-addressed cache of frame description + embedding, keyed by a hash of the frame bytes.
+    Backed by SQLite so it is shared by every worker process on the host; least recently used entries
+    are evicted once the cache grows past max_entries. Recency is kept at touch_seconds granularity, so
+    most hits are plain reads rather than writes serialized across the workers.
+    """
+    def __init__(self, path: str, namespace: str, max_entries: int = 200000, evict_every: int = 256, touch_seconds: float = 300.0):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.touch_seconds = touch_seconds
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._puts_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS frame_cache (
+                key TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                description TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS frame_cache_last_used ON frame_cache(last_used)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, np.ndarray]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT description, embedding, last_used FROM frame_cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[2] >= self.touch_seconds:
+            conn.execute(
+                "UPDATE frame_cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+            conn.commit()
+        return row[0], np.frombuffer(row[1], dtype=np.float32)
+
+    def put(self, key: str, description: str, embedding):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO frame_cache (key, namespace, description, embedding, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, self.namespace, description, np.asarray(embedding, dtype=np.float32).tobytes(), now, now)
+        )
+        conn.commit()
+        with self._stats_lock:
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= self.evict_every
+            if due:
+                self._puts_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        conn = self._conn()
+        (count,) = conn.execute("SELECT COUNT(*) FROM frame_cache").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM frame_cache WHERE rowid IN (SELECT rowid FROM frame_cache ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        conn.commit()
+        with self._stats_lock:
+            self.evictions += excess
+
+    def invalidate(self, all_namespaces: bool = False) -> int:
+        """Drop entries written under another model/prompt fingerprint (or everything). Returns rows removed."""
+        conn = self._conn()
+        if all_namespaces:
+            cur = conn.execute("DELETE FROM frame_cache")
+        else:
+            cur = conn.execute("DELETE FROM frame_cache WHERE namespace != ?", (self.namespace,))
+        conn.commit()
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        (entries,) = self._conn().execute(
+            "SELECT COUNT(*) FROM frame_cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+_frame_cache: Optional[FrameCache] = None
+_frame_cache_lock = threading.Lock()
+
+
+def get_frame_cache() -> Optional[FrameCache]:
+    """Return the process-wide frame cache for the configured model, prompt and embedder, or None when it is disabled."""
+    global _frame_cache
+    if not config.frame_cache.enabled:
+        return None
+    if _frame_cache is None:
+        with _frame_cache_lock:
+            if _frame_cache is None:
+                from .embedding import EMBEDDING_MODEL
+                from .llava_client import LLAVA_MODEL, LLAVA_PROMPT
+                _frame_cache = FrameCache(
+                    config.frame_cache.path,
+                    namespace=cache_namespace(LLAVA_MODEL, LLAVA_PROMPT, EMBEDDING_MODEL),
+                    max_entries=config.frame_cache.max_entries,
+                    touch_seconds=config.frame_cache.touch_seconds,
+                )
+    return _frame_cache
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    frame_cache = get_frame_cache()
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the frame description/embedding cache.")
+    parser.add_argument("--invalidate", action="store_true", help="Drop entries from other model/prompt fingerprints")
+    parser.add_argument("--all", action="store_true", help="With --invalidate, drop every entry")
+    args = parser.parse_args()
+    if frame_cache is None:
+        raise SystemExit("Frame cache is disabled (FRAME_CACHE_ENABLED)")
+    if args.invalidate:
+        removed = frame_cache.invalidate(all_namespaces=args.all)
+        print(f"Removed {removed} cache entries")
+    print(json.dumps(frame_cache.stats(), indent=2))
@@ -1,31 +1,47 @@
 import os
+import math
+import time
+import threading
 import subprocess
 import tempfile
 import logging
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict
+from contextlib import contextmanager
+from typing import AbstractSet, List, Dict, Optional, Tuple
 import requests
 import chromadb
-from chromadb.utils import embedding_functions
 import asyncio
 from ..streaming.video_progress_ws_manager import VideoProgressWebSocketManager
 from ..streaming.types import FrameProcessingEvent, FrameProcessedEvent, FrameErrorEvent
 import base64
 import json
-from ..db import VideoDB
+from ..db import VideoDB, get_frame_collection, get_keyword_index
 from .utils import get_frame_url
-import json as pyjson
+from .embedding import get_embedding_function, embedding_batcher
+from .frame_selection import hash_thumbnail_filter, hashes_from_thumbnails, select_representatives, group_aliases
+from .frame_cache import frame_content_key, get_frame_cache
+from .frame_stream import FrameStream
+from .llava_client import LLAVA_MODEL, LLAVA_PROMPT, DescriptionClient, AdaptiveConcurrencyLimiter
+from .stage_timer import stage_timer
+from . import tracing
+from ..metrics import metrics
+from .checkpoints import get_job_checkpoints
+from .probe import get_video_fps_and_duration
+from .job_queues import get_queue, shard_job_id, LOW_QUEUE
+from ..redis.shard_barrier import ShardBarrier
+from ..redis.model_slots import get_model_slots
+from ..search import build_video_indexes
+import numpy as np
+from ..config.config import config
 import re
 
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".data"))
 UPLOAD_DIR = os.path.join(DATA_DIR, "uploaded_videos")
 CHROMA_DIR = os.path.join(DATA_DIR, "chromadb")
 FRAMES_DIR = os.path.join(DATA_DIR, "frames")
-LAVA_API_URL = "http://localhost:11434/api/generate"
+LAVA_API_URL = config.ollama.api_url
 
-os.makedirs(FRAMES_DIR, exist_ok=True)
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ChromaDB setup
@@ -35,91 +51,147 @@ logger = logging.getLogger(__name__)
 VALKEY_URL = "redis://localhost:6379"
 video_progress_ws_manager = VideoProgressWebSocketManager()
 
+description_client = DescriptionClient(
+    LAVA_API_URL,
+    model=LLAVA_MODEL,
+    prompt=LLAVA_PROMPT,
+    connect_timeout=config.ollama.connect_timeout,
+    read_timeout=config.ollama.read_timeout,
+    max_retries=config.ollama.max_retries,
+    limiter=AdaptiveConcurrencyLimiter(
+        initial=config.ollama.initial_concurrency,
+        min_limit=config.ollama.min_concurrency,
+        max_limit=config.ollama.max_concurrency,
+        latency_tolerance=config.ollama.latency_tolerance,
+    ),
+    slots=get_model_slots(),
+)
+
+frame_cache = get_frame_cache()
+
+job_checkpoints = get_job_checkpoints()
+shard_barrier = ShardBarrier(config.redis.url)
+
+@contextmanager
+def job_metrics(video_id: str, kind: str):
+    """Count and time one RQ job and add its per-stage timing breakdown to the video record."""
+    before = stage_timer.snapshot()
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        yield
+        status = "success"
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.inc("video_jobs_total", kind=kind, status=status)
+        metrics.observe("video_job_seconds", elapsed, kind=kind)
+        try:
+            VideoDB().merge_job_timings(video_id, {"jobs": 1, "wall_seconds": elapsed, "stages": stage_timer.since(before)})
+        except Exception as e:
+            logger.warning(f"Could not record job timings for {video_id}: {e}")
+        metrics.flush()
+
+def publish_progress(video_id: str, message: str):
+    with stage_timer.stage("progress_publish"):
+        video_progress_ws_manager.publish_progress_sync(video_id, message)
+
 def get_embedding(text: str) -> List[float]:
     try:
-        logger.info(f"Generating embedding for text: {text[:60]}...")
-        ef = embedding_functions.DefaultEmbeddingFunction()
+        logger.debug(f"Generating embedding for text: {text[:60]}...")
+        ef = get_embedding_function()
         return ef([text])[0]
     except Exception as e:
         logger.error(f"Error in get_embedding: {e}\n{traceback.format_exc()}")
         raise
 
 # LLaVA (Ollama) description generation
-def generate_description(frame_path: str) -> str:
+def generate_description(frame_path: str, frame_bytes: Optional[bytes] = None, video_id: Optional[str] = None) -> str:
     try:
-        logger.info(f"Generating description for frame: {frame_path}")
-        with open(frame_path, "rb") as f:
-            img_b64 = base64.b64encode(f.read()).decode()
-        payload = {
-            "model": "llava",
-            "prompt": "Describe this image in detail.",
-            "images": [img_b64]
-        }
-        logger.info(f"Sending request to LAVA_API_URL: {LAVA_API_URL}")
-        response = requests.post(LAVA_API_URL, json=payload, stream=True)
-        response.raise_for_status()
-        description = ""
-        for line in response.iter_lines():
-            if line:
-                try:
-                    obj = json.loads(line)
-                    if "response" in obj:
-                        description += obj["response"]
-                except Exception as e:
-                    logger.warning(f"Error parsing line from LLaVA: {e}")
-                    continue
-        return description.strip()
+        logger.debug(f"Generating description for frame: {frame_path}")
+        if frame_bytes is None:
+            with open(frame_path, "rb") as f:
+                frame_bytes = f.read()
+        with tracing.span("base64_encode", bytes=len(frame_bytes)):
+            img_b64 = base64.b64encode(frame_bytes).decode()
+        with stage_timer.stage("description"):
+            return description_client.describe(img_b64, flow=video_id)
     except Exception as e:
         logger.error(f"Error in generate_description: {e}\n{traceback.format_exc()}")
         raise
 
-def get_video_fps_and_duration(video_path: str):
-    """Return (fps, duration) for the video using ffprobe."""
-    cmd = [
-        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
-        '-show_entries', 'stream=avg_frame_rate,duration',
-        '-of', 'json', video_path
-    ]
-    try:
-        logger.info(f"Running ffprobe: {' '.join(cmd)}")
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        info = pyjson.loads(result.stdout)
-        stream = info['streams'][0]
-        num, denom = map(int, stream['avg_frame_rate'].split('/'))
-        fps = num / denom if denom != 0 else 1
-        duration = float(stream['duration'])
-        return fps, duration
-    except Exception as e:
-        logger.error(f"ffprobe failed: {e}\nStderr: {getattr(e, 'stderr', None)}\n{traceback.format_exc()}")
-        raise
-
-def extract_frames(video_path: str, output_dir: str, fps: int = 1) -> List[str]:
+def extract_frames(video_path: str, output_dir: str, fps: int = 1, hash_size: Optional[int] = None) -> Tuple[List[str], Optional[np.ndarray]]:
+    """
+    Write every frame as a JPEG. With hash_size, the same ffmpeg pass also splits off tiny gray
+    thumbnails to stdout (as FrameStream does) and their dHashes are returned; otherwise hashes is None.
+    """
     os.makedirs(output_dir, exist_ok=True)
     frame_pattern = os.path.join(output_dir, "frame_%05d.jpg")
-    cmd = [
-        "ffmpeg", "-i", video_path, "-vf", f"fps={fps}", frame_pattern, "-hide_banner", "-loglevel", "error"
-    ]
+    if hash_size is None:
+        cmd = [
+            "ffmpeg", "-i", video_path, "-vf", f"fps={fps}", frame_pattern, "-hide_banner", "-loglevel", "error"
+        ]
+    else:
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", video_path,
+            "-filter_complex", f"[0:v]fps={fps},split=2[jpg][small];[small]{hash_thumbnail_filter(hash_size)}[hash]",
+            "-map", "[jpg]", frame_pattern,
+            "-map", "[hash]", "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
+        ]
     try:
         logger.info(f"Running ffmpeg: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True)
+        with stage_timer.stage("extraction"):
+            result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE if hash_size is not None else None)
     except Exception as e:
         logger.error(f"ffmpeg failed: {e}\nStderr: {getattr(e, 'stderr', None)}\n{traceback.format_exc()}")
         raise
     frames = sorted([
         os.path.join(output_dir, f) for f in os.listdir(output_dir) if f.startswith("frame_")
     ])
-    return frames
+    hashes = hashes_from_thumbnails(result.stdout, hash_size) if hash_size is not None else None
+    return frames, hashes
 
 def sanitize_video_id(video_id):
     return re.sub(r'[: ]', '_', video_id)
 
-def process_frame(frame_path: str, video_id: str, frame_idx: int, timestamp: float, collection=None) -> Dict:
+def write_frame_aliases(collection, video_id: str, rep_idx: int, vector, description: str, aliases: List[Tuple[int, str, float]], total_frames):
+    """
+    Index near-duplicate frames under the representative's description and vector so search covers the full timeline.
+    Returns the aliases' metadata.
+    """
+    metadatas = [{
+        "video_id": video_id,
+        "frame_idx": alias_idx,
+        "frame_path": alias_path,
+        "description": description,
+        "timestamp": alias_ts,
+        "alias_of": rep_idx
+    } for alias_idx, alias_path, alias_ts in aliases]
+    collection.upsert(
+        embeddings=[vector] * len(aliases),
+        metadatas=metadatas,
+        ids=[f"{video_id}_frame_{alias_idx}" for alias_idx, _, _ in aliases]
+    )
+    events = []
+    for alias_idx, _, alias_ts in aliases:
+        event = FrameProcessedEvent(data={
+            "frame_idx": alias_idx,
+            "frame_url": get_frame_url(video_id, alias_idx),
+            "description": description,
+            "timestamp": alias_ts,
+            "alias_of": rep_idx,
+            "total_frames": total_frames
+        })
+        events.append((alias_idx, event.json()))
+    with stage_timer.stage("progress_publish", items=len(events)):
+        video_progress_ws_manager.frames_done(video_id, events)
+    return metadatas
+
+def process_frame(frame_path: str, video_id: str, frame_idx: int, timestamp: float, collection=None, aliases: Optional[List[Tuple[int, str, float]]] = None) -> Dict:
     try:
         if collection is None:
             client = chromadb.PersistentClient(path=CHROMA_DIR)
             collection = client.get_or_create_collection("video_frames")
         frame_url = get_frame_url(video_id, frame_idx)
-        video_progress_ws_manager.add_frame_in_process(video_id, frame_idx)
         video_db = VideoDB()
         _, total_frames = video_db.get_processing_state(video_id)
         event = FrameProcessingEvent(data={
@@ -128,9 +200,24 @@ def process_frame(frame_path: str, video_id: str, frame_idx: int, timestamp: flo
             "timestamp": timestamp,
             "total_frames": total_frames
         })
-        video_progress_ws_manager.publish_progress_sync(video_id, event.json())
-        description = generate_description(frame_path)
-        vector = get_embedding(description)
+        with stage_timer.stage("progress_publish"):
+            video_progress_ws_manager.frame_in_process(video_id, frame_idx, event.json())
+        with open(frame_path, "rb") as f:
+            frame_bytes = f.read()
+        cache_key = frame_content_key(frame_bytes) if frame_cache else None
+        cached = frame_cache.get(cache_key) if frame_cache else None
+        if cached is not None:
+            description, cached_vector = cached
+            source = "cache"
+        else:
+            cached_vector = None
+            description = job_checkpoints.description(video_id, frame_idx)
+            source = "checkpoint"
+            if description is None:
+                description = generate_description(frame_path, frame_bytes, video_id)
+                job_checkpoints.save_description(video_id, frame_idx, description)
+                source = "model"
+        metrics.inc("video_frames_total", source=source)
         metadata = {
             "video_id": video_id,
             "frame_idx": frame_idx,
@@ -138,12 +225,10 @@ def process_frame(frame_path: str, video_id: str, frame_idx: int, timestamp: flo
             "description": description,
             "timestamp": timestamp
         }
-        collection.add(
-            embeddings=[vector],
-            metadatas=[metadata],
-            ids=[f"{video_id}_frame_{frame_idx}"]
-        )
-        video_progress_ws_manager.add_frame_done(video_id, frame_idx)
+        # Embedding and the Chroma write are batched across frames by the shared batcher
+        vector = embedding_batcher.add(collection, f"{video_id}_frame_{frame_idx}", description, metadata, cached_vector)
+        if frame_cache and cached is None:
+            frame_cache.put(cache_key, description, vector)
         event = FrameProcessedEvent(data={
             "frame_idx": frame_idx,
             "frame_url": frame_url,
@@ -151,46 +236,322 @@ def process_frame(frame_path: str, video_id: str, frame_idx: int, timestamp: flo
             "timestamp": timestamp,
             "total_frames": total_frames
         })
-        video_progress_ws_manager.publish_progress_sync(video_id, event.json())
+        with stage_timer.stage("progress_publish"):
+            video_progress_ws_manager.frame_done(video_id, frame_idx, event.json())
+        indexed = [metadata]
+        if aliases:
+            indexed += write_frame_aliases(collection, video_id, frame_idx, vector, description, aliases, total_frames)
+            metrics.inc("video_frames_total", len(aliases), source="alias")
+        keyword_index = get_keyword_index()
+        if keyword_index is not None:
+            with stage_timer.stage("keyword_index", items=len(indexed)):
+                keyword_index.upsert_frames(indexed)
+        job_checkpoints.commit_frames(video_id, [frame_idx] + [alias_idx for alias_idx, _, _ in aliases or []])
         return metadata
     except Exception as e:
         logger.error(f"Error in process_frame (frame_idx={frame_idx}): {e}\n{traceback.format_exc()}")
         raise
 
-def process_video_frames(video_id: str, video_path: str, fps: int = 1, max_workers: int = 4):
+def select_frames(frames: List[str], hashes: Optional[np.ndarray]) -> Dict[int, List[int]]:
+    """
+    Map each frame that should be described to the near-duplicate frames that will reuse its result,
+    from the hashes extract_frames produced. Falls back to describing every frame when selection is
+    disabled or the hashes don't line up with the frames.
+    """
+    every_frame = {idx: [] for idx in range(len(frames))}
+    settings = config.frame_selection
+    if not settings.enabled or not frames or hashes is None:
+        return every_frame
+    if len(hashes) != len(frames):
+        logger.warning(f"Frame selection skipped, {len(hashes)} hashes for {len(frames)} frames")
+        return every_frame
+    with stage_timer.stage("frame_selection", items=len(frames)):
+        representatives, aliases = select_representatives(hashes, settings.max_hamming_distance,
+                                                          max_run=config.pipeline.max_alias_run)
+    logger.info(f"Frame selection kept {len(representatives)} of {len(frames)} frames")
+    return group_aliases(representatives, aliases)
+
+def publish_frame_errors(video_id: str, frame_idxs: List[int], error: Exception):
+    metrics.inc("video_frame_errors_total")
+    for failed_idx in frame_idxs:
+        event = FrameErrorEvent(data={"frame_idx": failed_idx, "error": str(error)})
+        publish_progress(video_id, event.json())
+
+def publish_frames_extracted(video_id: str, frame_count: int, final: bool = True):
+    message = json.dumps({
+        "type": "frames_extracted",
+        "data": {"frame_count": frame_count, "video_id": video_id, "final": final}
+    })
+    if not final:
+        publish_progress(video_id, message)
+        return
+    with stage_timer.stage("progress_publish"):
+        video_progress_ws_manager.set_total_frames(video_id, frame_count, message)
+
+def list_extracted_frames(output_dir: str) -> List[str]:
+    if not os.path.isdir(output_dir):
+        return []
+    return sorted(os.path.join(output_dir, f) for f in os.listdir(output_dir) if f.startswith("frame_"))
+
+def prepare_frames_batch(video_id: str, video_path: str, frame_output_dir: str, fps: int, video_db,
+                         checkpoint: Optional[Dict] = None, committed: AbstractSet[int] = frozenset()) -> Tuple[List[str], Dict[int, List[int]]]:
+    """
+    Extract every frame up front and select the ones to describe. Returns the frame paths and the
+    representative -> aliases groups still to be described.
+    With a checkpoint from an earlier attempt whose frames are still on disk, extraction and selection
+    are skipped; groups whose representative is in `committed` are dropped.
+    """
+    frames = list_extracted_frames(frame_output_dir) if checkpoint and checkpoint["extracted"] else []
+    if frames and len(frames) == checkpoint["frame_count"]:
+        alias_groups = checkpoint["plan"]
+        logger.info(f"Resuming {video_id}: reusing {len(frames)} extracted frames, {len(committed)} already committed")
+    else:
+        selection = config.frame_selection
+        frames, hashes = extract_frames(video_path, frame_output_dir, fps=fps,
+                                        hash_size=selection.hash_size if selection.enabled else None)
+        alias_groups = select_frames(frames, hashes)
+        job_checkpoints.mark_extracted(video_id, len(frames), alias_groups)
+    video_db.update_processing_state(video_id, processing_state='processing', frame_count=len(frames))
+    publish_frames_extracted(video_id, len(frames))
+    return frames, {idx: alias_idxs for idx, alias_idxs in alias_groups.items() if idx not in committed}
+
+def describe_frames(video_id: str, frames: List[str], alias_groups: Dict[int, List[int]], fps: int, max_workers: int, collection) -> List[Dict]:
+    """Describe the representative of each group in a thread pool; failed groups are reported as frame errors."""
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_idx = {
+            executor.submit(
+                tracing.queued(process_frame, frame_idx=idx), frames[idx], video_id, idx, idx / fps, collection,
+                [(alias_idx, frames[alias_idx], alias_idx / fps) for alias_idx in alias_idxs]
+            ): idx
+            for idx, alias_idxs in alias_groups.items()
+        }
+        for future in as_completed(future_to_idx):
+            idx = future_to_idx[future]
+            try:
+                result = future.result()
+                results.append(result)
+            except Exception as e:
+                logger.error(f"Error processing frame {idx}: {e}\n{traceback.format_exc()}")
+                publish_frame_errors(video_id, [idx] + alias_groups[idx], e)
+    return results
+
+def split_shards(alias_groups: Dict[int, List[int]], shard_size: int) -> List[Dict[int, List[int]]]:
+    """Split groups into contiguous runs of at most shard_size representatives (one shard when shard_size is 0)."""
+    reps = sorted(alias_groups)
+    if shard_size <= 0 or len(reps) <= shard_size:
+        return [alias_groups]
+    return [
+        {idx: alias_groups[idx] for idx in reps[start:start + shard_size]}
+        for start in range(0, len(reps), shard_size)
+    ]
+
+def dispatch_shards(video_id: str, fps: int, frame_count: int, shards: List[Dict[int, List[int]]]):
+    """
+    Fan a video's remaining groups out as shard jobs; the last shard to finish finalizes the video.
+    A retried parent job only enqueues shards that are not queued, running or finished already.
+    """
+    from rq import Callback, Retry
+    from rq.job import JobStatus
+    queue = get_queue(LOW_QUEUE)
+    job_ids = [shard_job_id(video_id, shard_idx, len(shards)) for shard_idx in range(len(shards))]
+    existing = [queue.fetch_job(job_id) for job_id in job_ids]
+    if not any(existing):
+        shard_barrier.reset(video_id)
+    live = {JobStatus.QUEUED, JobStatus.STARTED, JobStatus.SCHEDULED, JobStatus.DEFERRED, JobStatus.FINISHED}
+    # Shards of a traced job are traced too, each writing its own file
+    trace = True if tracing.active() is not None else None
+    enqueued = 0
+    for shard_idx, (groups, job) in enumerate(zip(shards, existing)):
+        if job is not None and job.get_status(refresh=False) in live:
+            continue
+        queue.enqueue(
+            process_video_shard, video_id, fps, shard_idx, len(shards), groups, frame_count,
+            trace=trace, job_id=job_ids[shard_idx], job_timeout=config.pipeline.shard_job_timeout,
+            retry=Retry(max=config.pipeline.shard_retries) if config.pipeline.shard_retries > 0 else None,
+            on_failure=Callback(on_shard_failure),
+        )
+        enqueued += 1
+    logger.info(f"Fanned {video_id} out into {len(shards)} shard jobs on {LOW_QUEUE} ({enqueued} enqueued now)")
+
+def on_shard_failure(job, connection, exc_type, exc_value, exc_traceback):
+    """RQ failure callback of shard jobs: once a shard has no retries left the video can never finish, so fail it."""
+    if job.retries_left:
+        return
+    video_id = job.args[0]
+    fail_video(video_id, VideoDB(), f"Shard {job.args[2] + 1}/{job.args[3]} failed: {exc_value}")
+
+def missing_frames(video_id: str, frame_count: int) -> List[int]:
+    """Frames of the plan (every extracted frame, representatives and aliases) not committed to the index yet."""
+    committed = job_checkpoints.committed_frames(video_id)
+    return [idx for idx in range(frame_count) if idx not in committed]
+
+def fail_video(video_id: str, video_db, reason: str):
+    video_db.update_processing_state(video_id, processing_state='failed')
+    publish_progress(video_id, json.dumps({
+        "type": "processing_failed",
+        "data": {"video_id": video_id, "error": reason}
+    }))
+    video_progress_ws_manager.flush_progress()
+
+def finalize_video(video_id: str, frame_count: int, video_db):
+    missing = missing_frames(video_id, frame_count)
+    if missing:
+        # Leave the checkpoint open so a retry describes only the missing frames
+        reason = f"{len(missing)} of {frame_count} frames of {video_id} were not indexed"
+        fail_video(video_id, video_db, reason)
+        raise RuntimeError(reason)
     try:
-        video_db = VideoDB()
-        sanitized_video_id = sanitize_video_id(video_id)
-        frame_output_dir = os.path.join(FRAMES_DIR, sanitized_video_id)
-        actual_fps, duration = get_video_fps_and_duration(video_path)
-        frames = extract_frames(video_path, frame_output_dir, fps=fps)
-        video_db.update_processing_state(video_id, processing_state='processing', frame_count=len(frames))
-        video_progress_ws_manager.publish_progress_sync(video_id, json.dumps({
-            "type": "frames_extracted",
-            "data": {"frame_count": len(frames), "video_id": video_id}
-        }))
-        results = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            timestamps = [(i / fps) for i in range(len(frames))]
-            future_to_idx = {
-                executor.submit(process_frame, frame, video_id, idx, timestamps[idx]): idx
-                for idx, frame in enumerate(frames)
-            }
-            for future in as_completed(future_to_idx):
-                idx = future_to_idx[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"Error processing frame {idx}: {e}\n{traceback.format_exc()}")
-                    event = FrameErrorEvent(data={"frame_idx": idx, "error": str(e)})
-                    video_progress_ws_manager.publish_progress_sync(video_id, event.json())
-        video_db.update_processing_state(video_id, processing_state='success')
-        video_progress_ws_manager.publish_progress_sync(video_id, json.dumps({
-            "type": "all_frames_processed",
-            "data": {"video_id": video_id}
-        }))
-        return results
+        with stage_timer.stage("video_indexes"):
+            build_video_indexes(video_id)
     except Exception as e:
-        logger.error(f"Error in process_video_frames: {e}\n{traceback.format_exc()}")
-        raise 
\ No newline at end of file
+        # Frame-level Chroma search still covers the video; rebuild with `python -m backend.search.segments`
+        logger.warning(f"Building segment index / vector cache failed for {video_id}: {e}")
+    video_db.update_processing_state(video_id, processing_state='success', frame_count=frame_count)
+    job_checkpoints.mark_completed(video_id)
+    publish_progress(video_id, json.dumps({
+        "type": "all_frames_processed",
+        "data": {"video_id": video_id}
+    }))
+    video_progress_ws_manager.flush_progress()
+
+def process_video_shard(video_id: str, fps: int, shard_idx: int, shard_count: int, alias_groups: Dict[int, List[int]],
+                        frame_count: int, max_workers: Optional[int] = None, trace: Optional[bool] = None) -> int:
+    """
+    RQ job describing one shard of a fanned-out video from the frames its parent job extracted.
+    Groups committed by an earlier attempt are skipped. Returns the number of frames described.
+    """
+    with tracing.trace_job(video_id, "shard", enabled=trace), job_metrics(video_id, "shard"):
+        try:
+            if max_workers is None:
+                max_workers = config.ollama.max_concurrency
+            frames = list_extracted_frames(os.path.join(FRAMES_DIR, sanitize_video_id(video_id)))
+            if len(frames) != frame_count:
+                raise RuntimeError(f"Expected {frame_count} extracted frames for {video_id}, found {len(frames)}")
+            committed = job_checkpoints.committed_frames(video_id)
+            pending = {idx: alias_idxs for idx, alias_idxs in alias_groups.items() if idx not in committed}
+            logger.info(f"Shard {shard_idx + 1}/{shard_count} of {video_id}: {len(pending)} of {len(alias_groups)} frames to describe")
+            results = describe_frames(video_id, frames, pending, fps, max_workers, get_frame_collection())
+            video_progress_ws_manager.flush_progress()
+            committed = job_checkpoints.committed_frames(video_id)
+            missing = [idx for rep, alias_idxs in alias_groups.items() for idx in [rep] + alias_idxs if idx not in committed]
+            if missing:
+                # Fail without arriving so RQ retries the shard, which describes only these frames
+                raise RuntimeError(f"Shard {shard_idx + 1}/{shard_count} of {video_id}: {len(missing)} frames were not indexed")
+            if shard_barrier.arrive(video_id, shard_idx, shard_count):
+                finalize_video(video_id, frame_count, VideoDB())
+            return len(results)
+        except Exception as e:
+            logger.error(f"Error in process_video_shard: {e}\n{traceback.format_exc()}")
+            raise
+
+def process_frames_streaming(video_id: str, video_path: str, frame_output_dir: str, fps: int, max_workers: int, collection,
+                             committed: AbstractSet[int] = frozenset()) -> Tuple[List[Dict], int]:
+    """
+    Describe frames while ffmpeg is still decoding. Near-duplicate runs are aliased on the fly;
+    a representative is submitted once its run closes (a changed frame, max_alias_run reached, or end of video).
+    At most max_in_flight_frames representatives are queued or running, which in turn throttles ffmpeg.
+    Runs whose representative is in `committed` (from an earlier attempt) are not described again.
+    """
+    settings = config.pipeline
+    selection = config.frame_selection
+    stream = FrameStream(video_path, frame_output_dir, fps=fps, hash_size=selection.hash_size, max_queued=settings.max_queued_frames)
+    in_flight = threading.BoundedSemaphore(max(settings.max_in_flight_frames, max_workers))
+    results = []
+    plan: Dict[int, List[int]] = {}
+
+    def on_done(future, frame_idxs):
+        in_flight.release()
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.error(f"Error processing frame {frame_idxs[0]}: {e}")
+            publish_frame_errors(video_id, frame_idxs, e)
+
+    def submit(rep, aliases):
+        rep_idx, rep_path, _ = rep
+        plan[rep_idx] = [alias_idx for alias_idx, _, _ in aliases]
+        if rep_idx in committed:
+            return
+        in_flight.acquire()
+        future = executor.submit(
+            tracing.queued(process_frame, frame_idx=rep_idx), rep_path, video_id, rep_idx, rep_idx / fps, collection,
+            [(alias_idx, alias_path, alias_idx / fps) for alias_idx, alias_path, _ in aliases]
+        )
+        frame_idxs = [rep_idx] + [alias_idx for alias_idx, _, _ in aliases]
+        future.add_done_callback(lambda f: on_done(f, frame_idxs))
+
+    rep = None
+    aliases = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for frame_idx, frame_path, frame_hash in stream:
+                if (frame_idx + 1) % settings.extraction_event_every == 0:
+                    publish_frames_extracted(video_id, frame_idx + 1, final=False)
+                if (
+                    rep is not None and selection.enabled and len(aliases) < settings.max_alias_run
+                    and np.count_nonzero(frame_hash != rep[2]) <= selection.max_hamming_distance
+                ):
+                    aliases.append((frame_idx, frame_path, frame_hash))
+                    continue
+                if rep is not None:
+                    submit(rep, aliases)
+                rep = (frame_idx, frame_path, frame_hash)
+                aliases = []
+            if rep is not None:
+                submit(rep, aliases)
+        finally:
+            stream.close()
+    job_checkpoints.mark_extracted(video_id, stream.frame_count, plan)
+    publish_frames_extracted(video_id, stream.frame_count)
+    return results, stream.frame_count
+
+def process_video_frames(video_id: str, video_path: str, fps: int = 1, max_workers: Optional[int] = None, streaming: Optional[bool] = None):
+    with job_metrics(video_id, "video"):
+        try:
+            if max_workers is None:
+                # Size the pool for the largest limit the description client may reach; the limiter decides actual concurrency
+                max_workers = config.ollama.max_concurrency
+            if streaming is None:
+                streaming = config.pipeline.streaming
+            video_db = VideoDB()
+            sanitized_video_id = sanitize_video_id(video_id)
+            frame_output_dir = os.path.join(FRAMES_DIR, sanitized_video_id)
+            actual_fps, duration = get_video_fps_and_duration(video_path)
+            collection = get_frame_collection()
+            checkpoint = job_checkpoints.get(video_id)
+            if checkpoint is not None and checkpoint["fps"] != fps:
+                checkpoint = None
+            if checkpoint is not None and checkpoint["completed"]:
+                # A retry of an attempt that finished everything but the bookkeeping
+                logger.info(f"Job for {video_id} already completed, nothing to resume")
+                finalize_video(video_id, checkpoint["frame_count"], video_db)
+                return []
+            job_checkpoints.start(video_id, fps)
+            committed = job_checkpoints.committed_frames(video_id) if checkpoint is not None else set()
+            video_progress_ws_manager.reset_progress(video_id)
+            video_progress_ws_manager.restore_done(video_id, sorted(committed))
+            if streaming and not (checkpoint is not None and checkpoint["extracted"]):
+                # Until decoding finishes the frame count is an estimate from the container duration
+                estimated_frames = math.ceil(duration * fps)
+                video_db.update_processing_state(video_id, processing_state='processing', frame_count=estimated_frames)
+                video_progress_ws_manager.set_total_frames(video_id, estimated_frames)
+                results, frame_count = process_frames_streaming(video_id, video_path, frame_output_dir, fps, max_workers, collection, committed)
+            else:
+                frames, alias_groups = prepare_frames_batch(video_id, video_path, frame_output_dir, fps, video_db, checkpoint, committed)
+                frame_count = len(frames)
+                shards = split_shards(alias_groups, config.pipeline.shard_size)
+                if len(shards) > 1:
+                    dispatch_shards(video_id, fps, frame_count, shards)
+                    video_progress_ws_manager.flush_progress()
+                    return []
+                results = describe_frames(video_id, frames, alias_groups, fps, max_workers, collection)
+            logger.info(f"Embedding batcher stats: {embedding_batcher.stats()}")
+            logger.info(f"Description client stats: {description_client.stats()}")
+            if frame_cache:
+                logger.info(f"Frame cache stats: {frame_cache.stats()}")
+            finalize_video(video_id, frame_count, video_db)
+            return results
+        except Exception as e:
+            logger.error(f"Error in process_video_frames: {e}\n{traceback.format_exc()}")
+            raise
@@ -0,0 +1,62 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+def hash_thumbnail_filter(hash_size: int) -> str:
+    """ffmpeg filter shrinking frames to the hash_size x (hash_size + 1) gray thumbnails dHash is computed on."""
+    return f"scale={hash_size + 1}:{hash_size}:flags=area,format=gray"
+
+
+def hashes_from_thumbnails(raw: bytes, hash_size: int = 8) -> np.ndarray:
+    """
+    Return a (frames, hash_size * hash_size) boolean array of difference hashes (dHash) from the raw
+    gray thumbnails ffmpeg wrote through hash_thumbnail_filter, one row per frame.
+    """
+    width, height = hash_size + 1, hash_size
+    pixels = np.frombuffer(raw, dtype=np.uint8)
+    frame_size = width * height
+    pixels = pixels[:len(pixels) - len(pixels) % frame_size].reshape(-1, height, width)
+    return dhash_from_pixels(pixels)
+
+
+def dhash_from_pixels(pixels: np.ndarray) -> np.ndarray:
+    """Vectorized dHash over a (frames, h, h + 1) gray stack: one bit per horizontally adjacent pixel pair."""
+    bits = pixels[:, :, 1:] > pixels[:, :, :-1]
+    return bits.reshape(len(pixels), -1)
+
+
+def select_representatives(hashes: np.ndarray, max_distance: int, window: int = 256,
+                           max_run: Optional[int] = None) -> Tuple[List[int], Dict[int, int]]:
+    """
+    Walk the frames in order and keep a frame only when its hash differs from the current
+    representative by more than max_distance bits, or when the representative already has max_run
+    aliases (the same rule as the streaming pipeline). Returns (representative indices, alias -> representative).
+    """
+    representatives: List[int] = []
+    aliases: Dict[int, int] = {}
+    n = len(hashes)
+    i = 0
+    while i < n:
+        representatives.append(i)
+        end = n if max_run is None else min(n, i + 1 + max_run)
+        nxt = end
+        start = i + 1
+        while start < end:
+            stop = min(end, start + window)
+            distances = np.count_nonzero(hashes[start:stop] != hashes[i], axis=1)
+            changed = np.flatnonzero(distances > max_distance)
+            if changed.size:
+                nxt = start + int(changed[0])
+                break
+            start = stop
+        for j in range(i + 1, nxt):
+            aliases[j] = i
+        i = nxt
+    return representatives, aliases
+
+
+def group_aliases(representatives: List[int], aliases: Dict[int, int]) -> Dict[int, List[int]]:
+    groups: Dict[int, List[int]] = {idx: [] for idx in representatives}
+    for alias_idx, rep_idx in sorted(aliases.items()):
+        groups[rep_idx].append(alias_idx)
+    return groups
@@ -0,0 +1,111 @@
+import os
+import time
+import queue
+import logging
+import threading
+import subprocess
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from .frame_selection import dhash_from_pixels, hash_thumbnail_filter
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class FrameStream:
+    """
+    Runs a single ffmpeg process that writes frame JPEGs to output_dir and, through a split filter,
+    streams a tiny gray thumbnail of every frame on stdout. Iterating yields (frame_idx, frame_path, dhash)
+    as soon as each frame is on disk, while ffmpeg keeps decoding.
+
+    Backpressure: at most max_queued frames are buffered; when the consumer stops pulling,
+    the reader thread blocks, the stdout pipe fills and ffmpeg pauses.
+    """
+    def __init__(self, video_path: str, output_dir: str, fps: int = 1, hash_size: int = 8, max_queued: int = 32, file_timeout: float = 30.0):
+        self.video_path = video_path
+        self.output_dir = output_dir
+        self.fps = fps
+        self.hash_size = hash_size
+        self.file_timeout = file_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queued)
+        self._proc: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self.frame_count = 0
+
+    def frame_path(self, frame_idx: int) -> str:
+        return os.path.join(self.output_dir, f"frame_{frame_idx + 1:05d}.jpg")
+
+    def _command(self):
+        filters = (
+            f"[0:v]fps={self.fps},split=2[jpg][small];"
+            f"[small]{hash_thumbnail_filter(self.hash_size)}[hash]"
+        )
+        return [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", self.video_path,
+            "-filter_complex", filters,
+            "-map", "[jpg]", "-atomic_writing", "1", os.path.join(self.output_dir, "frame_%05d.jpg"),
+            "-map", "[hash]", "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1",
+        ]
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        cmd = self._command()
+        logger.info(f"Running streaming ffmpeg: {' '.join(cmd)}")
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._reader = threading.Thread(target=self._read, name="frame-stream-reader", daemon=True)
+        self._reader.start()
+        return self
+
+    def _read(self):
+        frame_size = (self.hash_size + 1) * self.hash_size
+        try:
+            while True:
+                buf = self._proc.stdout.read(frame_size)
+                if not buf or len(buf) < frame_size:
+                    break
+                pixels = np.frombuffer(buf, dtype=np.uint8).reshape(1, self.hash_size, self.hash_size + 1)
+                self._queue.put(dhash_from_pixels(pixels)[0])
+            returncode = self._proc.wait()
+            if returncode != 0:
+                stderr = self._proc.stderr.read().decode(errors="replace")
+                self._error = RuntimeError(f"ffmpeg exited with {returncode}: {stderr}")
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._queue.put(_END)
+
+    def _wait_for_file(self, path: str):
+        # With -atomic_writing the JPEG only appears under its final name once complete.
+        deadline = time.monotonic() + self.file_timeout
+        while not os.path.exists(path):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Frame file {path} did not appear within {self.file_timeout}s")
+            time.sleep(0.01)
+
+    def __iter__(self) -> Iterator[Tuple[int, str, np.ndarray]]:
+        if self._proc is None:
+            self.start()
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                break
+            frame_idx = self.frame_count
+            path = self.frame_path(frame_idx)
+            self._wait_for_file(path)
+            self.frame_count += 1
+            yield frame_idx, path, item
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        # Unblock the reader if it is waiting on a full queue
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
@@ -0,0 +1,37 @@
+from typing import TYPE_CHECKING, Optional
+from redis import Redis
+from ..config.config import config
+
+if TYPE_CHECKING:
+    from rq import Queue
+
+# Workers drain these in order: short uploads first, then regular video jobs, then the shards of long
+# videos, so one giant video fanned out over every worker does not starve later uploads.
+HIGH_QUEUE = "video-jobs-high"
+DEFAULT_QUEUE = "video-jobs"
+LOW_QUEUE = "video-jobs-low"
+QUEUE_NAMES = [HIGH_QUEUE, DEFAULT_QUEUE, LOW_QUEUE]
+
+# Enqueued by dotted path so the API never imports the worker module (and the pipeline behind it)
+VIDEO_JOB = f"{__name__.rsplit('.', 1)[0]}.video_worker.process_video_job"
+CLONE_JOB = f"{__name__.rsplit('.', 1)[0]}.dedup.clone_video_job"
+
+redis_conn = Redis.from_url(config.redis.url)
+
+
+def get_queue(name: str) -> "Queue":
+    from rq import Queue
+    return Queue(name, connection=redis_conn)
+
+
+def shard_job_id(video_id: str, shard_idx: int, shard_count: int) -> str:
+    """Stable RQ job id of one shard, so a retried parent job finds the shards it already dispatched."""
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in video_id)
+    return f"shard-{safe}-{shard_idx}-of-{shard_count}"
+
+
+def queue_for_duration(duration: Optional[float]) -> "Queue":
+    """Queue for a new video's job; unknown durations get the default priority."""
+    if duration is not None and duration <= config.pipeline.priority_max_seconds:
+        return get_queue(HIGH_QUEUE)
+    return get_queue(DEFAULT_QUEUE)
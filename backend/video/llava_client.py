@@ -0,0 +1,184 @@
+import json
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+LLAVA_MODEL = "llava"
+LLAVA_PROMPT = "Describe this image in detail."
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on in-flight model requests.
+    Each fast, successful request adds 1/limit (about +1 per round trip of the whole window);
+    an error or a latency above latency_tolerance x the observed floor multiplies the limit by backoff_ratio,
+    at most once per cooldown so one slow burst doesn't collapse the limit.
+    """
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 latency_tolerance: float = 2.0, backoff_ratio: float = 0.7, cooldown: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.cooldown = cooldown
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._min_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: Optional[float] = None, error: bool = False):
+        with self._cond:
+            self._in_flight -= 1
+            if latency is not None and not error:
+                if self._min_latency is None or latency < self._min_latency:
+                    self._min_latency = latency
+                else:
+                    # Let the floor drift up slowly so a permanently slower model is not treated as overload forever
+                    self._min_latency += (latency - self._min_latency) * 0.01
+            overloaded = error or (
+                latency is not None and self._min_latency is not None
+                and latency > self._min_latency * self.latency_tolerance
+            )
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= self.cooldown:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                    self._last_decrease = now
+            elif self._in_flight + 1 >= self.limit:
+                # Only grow when the current limit is actually being used
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "min_latency_ms": (self._min_latency or 0.0) * 1000,
+            }
+
+
+class DescriptionClient:
+    """
+    Keep-alive, concurrency-controlled client for Ollama's /api/generate.
+    Safe to share between threads: connections are pooled by one requests.Session and
+    the number of concurrent requests is governed by an AdaptiveConcurrencyLimiter, then by the
+    cluster-wide slots when given (a FairModelSemaphore shared by all workers).
+    """
+    def __init__(self, api_url: str, model: str, prompt: str, connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 limiter: Optional[AdaptiveConcurrencyLimiter] = None, slots=None):
+        self.api_url = api_url
+        self.model = model
+        self.prompt = prompt
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.slots = slots
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.limiter.max_limit, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def describe(self, img_b64: str, flow: Optional[str] = None) -> str:
+        """Describe one image; flow (the video id) is the unit the cluster-wide slots are shared fairly between."""
+        with tracing.span("request_encode"):
+            body = json.dumps({"model": self.model, "prompt": self.prompt, "images": [img_b64]})
+        attempt = 0
+        while True:
+            with tracing.span("limiter_wait"):
+                self.limiter.acquire()
+            started = None
+            try:
+                token = None
+                if self.slots is not None:
+                    with tracing.span("global_slot_wait"):
+                        token = self.slots.acquire(flow or "default")
+                started = time.perf_counter()
+                try:
+                    with tracing.span("model_request", attempt=attempt):
+                        description = self._post(body)
+                finally:
+                    if token is not None:
+                        self.slots.release(token)
+            except Exception as e:
+                self.limiter.release(time.perf_counter() - started if started is not None else None, error=True)
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    with self._stats_lock:
+                        self.failures += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"LLaVA request failed ({e}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                with self._stats_lock:
+                    self.retries += 1
+                attempt += 1
+                with tracing.span("retry_backoff"):
+                    time.sleep(delay)
+                continue
+            self.limiter.release(time.perf_counter() - started)
+            with self._stats_lock:
+                self.requests += 1
+            return description
+
+    def _post(self, body: str) -> str:
+        headers = {"Content-Type": "application/json"}
+        with self.session.post(self.api_url, data=body, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            description = ""
+            for line in response.iter_lines():
+                if line:
+                    try:
+                        obj = json.loads(line)
+                        if "response" in obj:
+                            description += obj["response"]
+                    except Exception as e:
+                        logger.warning(f"Error parsing line from LLaVA: {e}")
+                        continue
+        return description.strip()
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return error.response.status_code in RETRYABLE_STATUS
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.limiter.stats()
+        with self._stats_lock:
+            stats.update({"requests": self.requests, "retries": self.retries, "failures": self.failures})
+        return stats
@@ -0,0 +1,28 @@
+import json
+import logging
+import subprocess
+import traceback
+from .stage_timer import stage_timer
+
+logger = logging.getLogger(__name__)
+
+def get_video_fps_and_duration(video_path: str):
+    """Return (fps, duration) for the video using ffprobe."""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=avg_frame_rate,duration',
+        '-of', 'json', video_path
+    ]
+    try:
+        logger.info(f"Running ffprobe: {' '.join(cmd)}")
+        with stage_timer.stage("ffprobe"):
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        info = json.loads(result.stdout)
+        stream = info['streams'][0]
+        num, denom = map(int, stream['avg_frame_rate'].split('/'))
+        fps = num / denom if denom != 0 else 1
+        duration = float(stream['duration'])
+        return fps, duration
+    except Exception as e:
+        logger.error(f"ffprobe failed: {e}\nStderr: {getattr(e, 'stderr', None)}\n{traceback.format_exc()}")
+        raise
@@ -0,0 +1,57 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+from ..metrics import metrics
+from . import tracing
+
+
+class StageTimer:
+    """Thread-safe accumulator of wall time and item counts per pipeline stage, mirrored into the shared metrics."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, seconds: float, items: int = 1):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {"calls": 0, "items": 0, "seconds": 0.0, "max_seconds": 0.0}
+            entry["calls"] += 1
+            entry["items"] += items
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        tracer = tracing.active()
+        if tracer is not None:
+            tracer.complete(stage, (time.perf_counter() - seconds) * 1e6, seconds * 1e6, {"items": items})
+        metrics.observe("video_stage_seconds", seconds, stage=stage)
+        metrics.inc("video_stage_items_total", items, stage=stage)
+
+    @contextmanager
+    def stage(self, stage: str, items: int = 1):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, items)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {stage: dict(entry) for stage, entry in self._stages.items()}
+
+    def since(self, before: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Calls, items and seconds per stage accumulated after the `before` snapshot."""
+        delta = {}
+        for stage, entry in self.snapshot().items():
+            base = before.get(stage, {})
+            calls = entry["calls"] - base.get("calls", 0)
+            if calls:
+                delta[stage] = {key: entry[key] - base.get(key, 0) for key in ("calls", "items", "seconds")}
+        return delta
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+stage_timer = StageTimer()
@@ -0,0 +1,220 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from ..config.config import config
+
+logger = logging.getLogger(__name__)
+
+SAMPLER_PID = 2
+_TRACE_SUFFIX = re.compile(r"\d{8}T\d{12}-(video|shard)-\d+\.json")
+
+
+def _now_us() -> float:
+    return time.perf_counter() * 1e6
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "started")
+
+    def __init__(self, tracer: "JobTracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = _now_us()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.started, _now_us() - self.started, self.args)
+        return False
+
+
+class StackSampler:
+    """
+    Samples every thread's Python stack at a fixed interval and turns runs of identical frames into
+    nested complete events, giving a flame chart per thread under a separate "sampler" process.
+    """
+    def __init__(self, tracer: "JobTracer", interval: float, max_depth: int = 40):
+        self.tracer = tracer
+        self.interval = interval
+        self.max_depth = max_depth
+        self._open: Dict[int, List[List[Any]]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        now = _now_us()
+        for tid, stack in self._open.items():
+            self._close(tid, stack, 0, now)
+
+    def _close(self, tid: int, stack: List[List[Any]], depth: int, now: float):
+        while len(stack) > depth:
+            name, started = stack.pop()
+            self.tracer.complete(name, started, now - started, tid=tid, pid=SAMPLER_PID, cat="sample")
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = _now_us()
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                names = names[::-1][:self.max_depth]
+                stack = self._open.setdefault(tid, [])
+                common = 0
+                while common < len(stack) and common < len(names) and stack[common][0] == names[common]:
+                    common += 1
+                self._close(tid, stack, common, now)
+                stack.extend([name, now] for name in names[common:])
+
+
+class JobTracer:
+    """Collects Chrome trace events (complete spans, thread names) for one job and writes them as JSON."""
+    def __init__(self, video_id: str, kind: str):
+        self.video_id = video_id
+        self.kind = kind
+        self.pid = os.getpid()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **args) -> _Span:
+        return _Span(self, name, args)
+
+    def complete(self, name: str, started_us: float, duration_us: float, args: Optional[Dict[str, Any]] = None,
+                 tid: Optional[int] = None, pid: Optional[int] = None, cat: str = "job"):
+        if tid is None:
+            tid = threading.get_ident()
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+        event = {"name": name, "cat": cat, "ph": "X", "ts": started_us, "dur": duration_us, "pid": pid or self.pid, "tid": tid}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    def write(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        names = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": f"{self.kind} job {self.video_id}"}},
+            {"name": "process_name", "ph": "M", "pid": SAMPLER_PID, "args": {"name": "sampling profiler"}},
+        ] + [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._threads.items() for pid in (self.pid, SAMPLER_PID)
+        ]
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(directory, f"{trace_prefix(self.video_id)}{stamp}-{self.kind}-{self.pid}.json")
+        with self._lock:
+            trace = {"traceEvents": names + self._events, "displayTimeUnit": "ms"}
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        return path
+
+
+# One job runs at a time per worker process, so the active tracer is process-wide (thread pools included)
+_active: Optional[JobTracer] = None
+
+
+def trace_prefix(video_id: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in video_id) + "--"
+
+
+def active() -> Optional[JobTracer]:
+    return _active
+
+
+def span(name: str, **args):
+    """Context manager timing a block in the active trace; a shared no-op when tracing is off."""
+    tracer = _active
+    if tracer is None:
+        return _NOOP
+    return tracer.span(name, **args)
+
+
+def queued(fn, **args):
+    """
+    Wrap a callable about to be submitted to a pool so the trace shows how long it waited for a thread
+    ("queue_wait") and then how long it ran (a span named after the function), both tagged with args.
+    """
+    tracer = _active
+    if tracer is None:
+        return fn
+    submitted = _now_us()
+
+    def run(*a, **kw):
+        started = _now_us()
+        tracer.complete("queue_wait", submitted, started - submitted, args)
+        try:
+            return fn(*a, **kw)
+        finally:
+            tracer.complete(fn.__name__, started, _now_us() - started, args)
+    return run
+
+
+@contextmanager
+def trace_job(video_id: str, kind: str, enabled: Optional[bool] = None, profile: Optional[bool] = None):
+    """Trace one job when enabled (job flag, else config) and write the trace file when it ends."""
+    global _active
+    settings = config.tracing
+    if not (settings.enabled if enabled is None else enabled):
+        yield None
+        return
+    tracer = JobTracer(video_id, kind)
+    sampler = StackSampler(tracer, settings.sample_interval_ms / 1000.0) if (settings.profile if profile is None else profile) else None
+    _active = tracer
+    if sampler:
+        sampler.start()
+    started = _now_us()
+    try:
+        yield tracer
+    finally:
+        tracer.complete(f"{kind}_job", started, _now_us() - started, {"video_id": video_id})
+        if sampler:
+            sampler.stop()
+        _active = None
+        try:
+            logger.info(f"Wrote trace {tracer.write(settings.dir)}")
+        except OSError as e:
+            logger.warning(f"Could not write trace for {video_id}: {e}")
+
+
+def list_traces(video_id: str) -> List[str]:
+    directory = config.tracing.dir
+    if not os.path.isdir(directory):
+        return []
+    prefix = trace_prefix(video_id)
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(prefix) and _TRACE_SUFFIX.fullmatch(name[len(prefix):])
+    )
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from ..config.config import config
+
+Range = List[int]
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Sort and coalesce overlapping or adjacent [start, end) ranges."""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(received: List[Range], size: int) -> List[Range]:
+    missing, cursor = [], 0
+    for start, end in received:
+        if start > cursor:
+            missing.append([cursor, start])
+        cursor = max(cursor, end)
+    if cursor < size:
+        missing.append([cursor, size])
+    return missing
+
+
+class UploadSessionStore:
+    """
+    Resumable uploads: each session owns a file preallocated to the final size that chunks are written
+    into at their offsets (in any order, from any number of connections or API processes), plus a
+    JSON manifest of the byte ranges received so far. Manifest updates are serialized with a file lock.
+    """
+    def __init__(self, root: str, max_chunk_bytes: int):
+        self.root = root
+        self.max_chunk_bytes = max_chunk_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, upload_id: str) -> str:
+        # upload ids are uuid4 hex; refuse anything else so ids can't escape the root
+        if len(upload_id) != 32 or any(c not in "0123456789abcdef" for c in upload_id):
+            raise KeyError(upload_id)
+        return os.path.join(self.root, upload_id)
+
+    def data_path(self, upload_id: str) -> str:
+        return os.path.join(self._dir(upload_id), "data")
+
+    def _manifest_path(self, upload_id: str) -> str:
+        return os.path.join(self._dir(upload_id), "manifest.json")
+
+    @contextmanager
+    def _locked_manifest(self, upload_id: str):
+        manifest_path = self._manifest_path(upload_id)
+        if not os.path.exists(manifest_path):
+            raise KeyError(upload_id)
+        with open(os.path.join(self._dir(upload_id), "lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                yield manifest
+                tmp_path = f"{manifest_path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(manifest, f)
+                os.replace(tmp_path, manifest_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def create(self, file_name: str, size: int) -> Dict[str, Any]:
+        upload_id = uuid.uuid4().hex
+        session_dir = self._dir(upload_id)
+        os.makedirs(session_dir)
+        with open(os.path.join(session_dir, "data"), "wb") as f:
+            if size:
+                try:
+                    os.posix_fallocate(f.fileno(), 0, size)
+                except (AttributeError, OSError):
+                    f.truncate(size)
+        manifest = {"upload_id": upload_id, "file_name": file_name, "size": size, "received": [], "created_at": time.time()}
+        with open(self._manifest_path(upload_id), "w") as f:
+            json.dump(manifest, f)
+        return self.status(upload_id)
+
+    def get(self, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        manifest = self.get(upload_id)
+        received = manifest["received"]
+        return {
+            "upload_id": upload_id,
+            "file_name": manifest["file_name"],
+            "size": manifest["size"],
+            "received": received,
+            "missing": missing_ranges(received, manifest["size"]),
+            "received_bytes": sum(end - start for start, end in received),
+            "max_chunk_bytes": self.max_chunk_bytes,
+        }
+
+    def open_for_write(self, upload_id: str) -> int:
+        """File descriptor for positional writes into the session's data file."""
+        self.get(upload_id)
+        return os.open(self.data_path(upload_id), os.O_WRONLY)
+
+    def mark_received(self, upload_id: str, start: int, end: int):
+        if end <= start:
+            return
+        with self._locked_manifest(upload_id) as manifest:
+            manifest["received"] = merge_ranges(manifest["received"] + [[start, end]])
+
+    def is_complete(self, upload_id: str) -> bool:
+        return not self.status(upload_id)["missing"]
+
+    def content_hash(self, upload_id: str, block_size: int = 4 * 1024 * 1024) -> str:
+        digest = hashlib.sha256()
+        with open(self.data_path(upload_id), "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                digest.update(block)
+        return digest.hexdigest()
+
+    def delete(self, upload_id: str):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def expire(self, max_age_seconds: float) -> int:
+        """Remove sessions older than max_age_seconds. Returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - max_age_seconds
+        for upload_id in os.listdir(self.root):
+            try:
+                if self.get(upload_id)["created_at"] < cutoff:
+                    self.delete(upload_id)
+                    removed += 1
+            except (KeyError, ValueError, OSError):
+                continue
+        return removed
+
+
+_upload_sessions: Optional[UploadSessionStore] = None
+_upload_sessions_lock = threading.Lock()
+
+
+def get_upload_sessions() -> UploadSessionStore:
+    """Return the process-wide upload session store at config.upload.sessions_dir."""
+    global _upload_sessions
+    if _upload_sessions is None:
+        with _upload_sessions_lock:
+            if _upload_sessions is None:
+                _upload_sessions = UploadSessionStore(config.upload.sessions_dir, config.upload.max_chunk_bytes)
+    return _upload_sessions
@@ -3,18 +3,20 @@ import time
 import logging
 import multiprocessing
 multiprocessing.set_start_method("spawn", force=True)
-from redis import Redis
-from rq import Worker, Queue
+from rq import Worker
 from ..video.frame_processing import process_video_frames
+from ..video.tracing import trace_job
+from ..video.job_queues import get_queue, redis_conn, QUEUE_NAMES
 from ..config.config import config
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger(__name__)
 
-def process_video_job(video_path, job_id):
+def process_video_job(video_path, job_id, trace=None):
     try:
         logger.info("=== Starting process_video_frames ===")
-        process_video_frames(job_id, video_path)
+        with trace_job(job_id, "video", enabled=trace):
+            process_video_frames(job_id, video_path)
         logger.info("=== Finished process_video_frames ===")
     except Exception as e:
         logger.exception("Error during job")
@@ -22,11 +24,11 @@ def process_video_job(video_path, job_id):
 
 if __name__ == "__main__":
     try:
-        redis_conn = Redis.from_url(config.redis.url)
-        from rq import SimpleWorker, Queue
-        queue = Queue('video-jobs', connection=redis_conn)
-        worker = SimpleWorker([queue], connection=redis_conn)
-        logger.info("Starting RQ SimpleWorker for 'video-jobs' queue (no fork, for debugging)...")
+        from rq import SimpleWorker
+        # Queues are listed highest priority first; RQ always takes from the first non-empty one
+        queues = [get_queue(name) for name in QUEUE_NAMES]
+        worker = SimpleWorker(queues, connection=redis_conn)
+        logger.info(f"Starting RQ SimpleWorker for {', '.join(QUEUE_NAMES)} (no fork, for debugging)...")
         worker.work()
     except Exception as e:
         logger.exception("Worker failed to start or crashed.")
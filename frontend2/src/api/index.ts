@@ -9,7 +9,54 @@ export async function getVideos() {
   return res.json();
 }
 
+const CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+const UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024;
+const UPLOAD_PARALLELISM = 4;
+
+// Resumable upload: pass a previous uploadId to send only the ranges the server is missing.
+export async function uploadVideoChunked(file: File, uploadId?: string, onProgress?: (received: number, total: number) => void) {
+  let session;
+  if (uploadId) {
+    const res = await fetch(`${API_BASE}/uploads/${uploadId}`);
+    if (res.ok) session = await res.json();
+  }
+  if (!session) {
+    const res = await fetch(`${API_BASE}/uploads`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ file_name: file.name, size: file.size }),
+    });
+    if (!res.ok) throw new Error('Failed to start upload');
+    session = await res.json();
+  }
+  const chunkSize = Math.min(UPLOAD_CHUNK_SIZE, session.max_chunk_bytes);
+  const chunks: [number, number][] = [];
+  session.missing.forEach(([start, end]: [number, number]) => {
+    for (let offset = start; offset < end; offset += chunkSize) {
+      chunks.push([offset, Math.min(offset + chunkSize, end)]);
+    }
+  });
+  let received = session.received_bytes;
+  const worker = async () => {
+    for (let chunk = chunks.shift(); chunk; chunk = chunks.shift()) {
+      const [start, end] = chunk;
+      const res = await fetch(`${API_BASE}/uploads/${session.upload_id}?offset=${start}`, {
+        method: 'PUT',
+        body: file.slice(start, end),
+      });
+      if (!res.ok) throw Object.assign(new Error('Failed to upload chunk'), { uploadId: session.upload_id });
+      received += end - start;
+      onProgress?.(received, file.size);
+    }
+  };
+  await Promise.all(Array.from({ length: UPLOAD_PARALLELISM }, worker));
+  const res = await fetch(`${API_BASE}/uploads/${session.upload_id}/complete`, { method: 'POST' });
+  if (!res.ok) throw Object.assign(new Error('Failed to finish upload'), { uploadId: session.upload_id });
+  return res.json();
+}
+
 export async function uploadVideo(file: File) {
+  if (file.size >= CHUNKED_UPLOAD_THRESHOLD) return uploadVideoChunked(file);
   const formData = new FormData();
   formData.append('file', file);
   const res = await fetch(`${API_BASE}/upload`, {
@@ -5,6 +5,10 @@ import VideoProgressFrames from './VideoProgressFrames';
 // Module-level cache for WebSocket instances and ref counts
 const wsCache: Map<string, { ws: WebSocket, refCount: number, isOpen: boolean }> = new Map();
 
+// Mirrors backend/video/utils.py get_frame_url
+const frameUrl = (videoId: string, frameIdx: number) =>
+  `/frames/${videoId}/frame_${String(frameIdx + 1).padStart(5, '0')}.jpg`;
+
 type VideoProgressProps = {
   videoId: string;
 };
@@ -16,6 +20,8 @@ const VideoProgress: React.FC<VideoProgressProps> = ({ videoId }) => {
   const [loading, setLoading] = useState(true);
   const [extractionInProgress, setExtractionInProgress] = useState(true);
   const [frameCount, setFrameCount] = useState(0);
+  // Frames decoded so far while extraction is still running (streaming pipeline); null once it finished
+  const [framesExtracted, setFramesExtracted] = useState<number | null>(null);
   const mountedRef = useRef(false);
 
   useEffect(() => {
@@ -35,6 +41,12 @@ const VideoProgress: React.FC<VideoProgressProps> = ({ videoId }) => {
         if (!msg.type) return;
         if (msg.type === 'frames_extracted') {
           const count = msg.data?.frame_count || 0;
+          if (msg.data?.final === false) {
+            // Partial count: extraction progress only, the total stays at the estimate until the final event
+            setFramesExtracted(count);
+            return;
+          }
+          setFramesExtracted(null);
           setFrameCount(count);
           setExtractionInProgress(false);
           setLoading(false);
@@ -43,16 +55,18 @@ const VideoProgress: React.FC<VideoProgressProps> = ({ videoId }) => {
             progress: { frameCount: count, frameStatus: progressState.frameStatus || {} },
           });
         } else if (msg.type === 'progress_state') {
-          const { in_process, done, total_frames, first_frame_url, extraction_in_progress } = msg.data ? msg.data : msg;
+          const { in_process, done, total_frames, first_frame_url } = msg.data ? msg.data : msg;
+          // Frame states arrive as [start, end) index ranges; URLs are derived here
           let merged: any = {};
-          if (in_process && done) {
-            in_process.forEach((item: { frame_idx: number, frame_url: string }) => {
-              merged[item.frame_idx] = { status: 'processing', url: item.frame_url };
-            });
-            done.forEach((item: { frame_idx: number, frame_url: string }) => {
-              merged[item.frame_idx] = { status: 'done', url: item.frame_url };
+          const expand = (ranges: [number, number][], status: string) => {
+            (ranges || []).forEach(([start, end]) => {
+              for (let idx = start; idx < end; idx++) {
+                merged[idx] = { status, url: frameUrl(videoId, idx) };
+              }
             });
-          }
+          };
+          expand(in_process, 'processing');
+          expand(done, 'done');
           if (total_frames && total_frames > 0) {
             setFrameCount(total_frames);
             setExtractionInProgress(false);
@@ -124,18 +138,32 @@ const VideoProgress: React.FC<VideoProgressProps> = ({ videoId }) => {
     // eslint-disable-next-line
   }, [videoId]);
 
+  const extractionStatus = framesExtracted !== null && (
+    <div style={{ textAlign: 'center', margin: '8px 0' }}>
+      Extracting frames: {framesExtracted}{frameCount > 0 ? ` of ~${frameCount}` : ''}
+    </div>
+  );
+
   if (loading || extractionInProgress || frameCount === 0) {
-    return <div style={{ textAlign: 'center', marginTop: 40 }}>Extracting frames, please wait...</div>;
+    return (
+      <div style={{ textAlign: 'center', marginTop: 40 }}>
+        Extracting frames, please wait...
+        {extractionStatus}
+      </div>
+    );
   }
 
   return (
-    <VideoProgressFrames
-      frameCount={frameCount}
-      frameStatus={progressState.frameStatus}
-      showPlayer={progressState.showPlayer}
-      videoId={videoId}
-      firstFrameUrl={progressState.firstFrameUrl}
-    />
+    <>
+      {extractionStatus}
+      <VideoProgressFrames
+        frameCount={frameCount}
+        frameStatus={progressState.frameStatus}
+        showPlayer={progressState.showPlayer}
+        videoId={videoId}
+        firstFrameUrl={progressState.firstFrameUrl}
+      />
+    </>
   );
 };
 